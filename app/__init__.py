@@ -16,9 +16,18 @@ CONFIG_NAME_MAPPER = {
     'local': 'local_config.LocalConfig',
 }
 
-def create_app(flask_config_name=None, **kwargs):
+def create_app(flask_config_name=None, wsgi_only=False, **kwargs):
     """
     Entry point to the Flask RESTful Server application.
+
+    Arguments:
+        flask_config_name (str) - a name of the config (see
+            ``CONFIG_NAME_MAPPER``), defaults to ``FLASK_CONFIG`` environment
+            variable or ``local``.
+        wsgi_only (bool) - the application is only going to be served by a
+            WSGI server (no ``url_for`` outside of requests, swagger export or
+            tasks), so the modules loading can be deferred until the first
+            request if ``MODULES_LAZY_LOADING`` is enabled.
     """
     # This is a workaround for Alpine Linux (musl libc) quirk:
     # https://github.com/docker-library/python/issues/211
@@ -59,6 +68,14 @@ def create_app(flask_config_name=None, **kwargs):
     extensions.init_app(app)
 
     from . import modules
-    modules.init_app(app)
+    modules.init_app(app, lazy=wsgi_only and app.config['MODULES_LAZY_LOADING'])
 
     return app
+
+
+def create_wsgi_app():
+    """
+    Entry point for WSGI servers, which defers the modules loading if it is
+    configured (see ``create_app``).
+    """
+    return create_app(wsgi_only=True)
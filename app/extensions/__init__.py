@@ -12,6 +12,9 @@ Please, put new extension instantiations and initializations here.
 from .logging import Logging
 logging = Logging()
 
+from .instrumentation import Instrumentation
+instrumentation = Instrumentation()
+
 from flask_cors import CORS
 cross_origin_resource_sharing = CORS()
 
@@ -40,6 +43,7 @@ def init_app(app):
     """
     for extension in (
             logging,
+            instrumentation,
             cross_origin_resource_sharing,
             db,
             login_manager,
@@ -28,25 +28,27 @@ class Api(BaseApi):
                     "OAuth scope %s already exists" % scope_name
                 authorization_settings['scopes'][scope_name] = scope_description
 
-    def add_namespace(self, ns, path=None):
+    def register_resource(self, namespace, resource, *urls, **kwargs):
         # Rewrite security rules for OAuth scopes since Namespaces don't have
-        # enough information about authorization methods.
-        for resource, _, _ in ns.resources:
-            for method in resource.methods:
-                method_func = getattr(resource, method.lower())
-
-                if (
-                        hasattr(method_func, '__apidoc__')
-                        and
-                        'security' in method_func.__apidoc__
-                        and
-                        '__oauth__' in method_func.__apidoc__['security']
-                ):
-                    oauth_scopes = method_func.__apidoc__['security']['__oauth__']['scopes']
-                    method_func.__apidoc__['security'] = {
-                        auth_name: oauth_scopes
-                        for auth_name, auth_settings in iteritems(self.authorizations)
-                        if auth_settings['type'].startswith('oauth')
-                    }
-
-        super(Api, self).add_namespace(ns, path=path)
+        # enough information about authorization methods. NOTE: This is done
+        # here rather than in `add_namespace`, so the resources which are
+        # added to an already registered namespace (e.g. by another module)
+        # are covered as well.
+        for method in resource.methods:
+            method_func = getattr(resource, method.lower())
+
+            if (
+                    hasattr(method_func, '__apidoc__')
+                    and
+                    'security' in method_func.__apidoc__
+                    and
+                    '__oauth__' in method_func.__apidoc__['security']
+            ):
+                oauth_scopes = method_func.__apidoc__['security']['__oauth__']['scopes']
+                method_func.__apidoc__['security'] = {
+                    auth_name: oauth_scopes
+                    for auth_name, auth_settings in iteritems(self.authorizations)
+                    if auth_settings['type'].startswith('oauth')
+                }
+
+        return super(Api, self).register_resource(namespace, resource, *urls, **kwargs)
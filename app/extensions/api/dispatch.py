@@ -0,0 +1,73 @@
+# encoding: utf-8
+"""
+Application-specific dispatch steps
+-----------------------------------
+
+The semantics of the application-specific resources decorators for the flat
+dispatchers (see :mod:`flask_restplus_patched.dispatch`).
+"""
+
+from flask_restplus_patched.dispatch import DispatchResponse, DispatchStep
+
+
+class OAuth2Step(DispatchStep):
+    """
+    Requires a valid OAuth2 access token with the given scopes.
+    """
+
+    phase = 'auth'
+    has_before = True
+
+    def __init__(self, func, oauth2, oauth_scopes, locations):
+        super(OAuth2Step, self).__init__(func)
+        self.oauth2 = oauth2
+        self.oauth_scopes = oauth_scopes
+        self.locations = locations
+
+    def before(self, args, kwargs):
+        invalid_response = self.oauth2.authorize_request(self.oauth_scopes, self.locations)
+        if invalid_response is not None:
+            raise DispatchResponse(invalid_response)
+        return args
+
+
+class PermissionStep(DispatchStep):
+    """
+    Checks a permission, which is optionally instantiated with the arguments
+    from ``kwargs_on_request``.
+    """
+
+    phase = 'permission'
+    has_before = True
+
+    def __init__(self, func, permission, kwargs_on_request=None):
+        super(PermissionStep, self).__init__(func)
+        self.permission = permission
+        self.kwargs_on_request = kwargs_on_request
+
+    def before(self, args, kwargs):
+        if self.kwargs_on_request is None:
+            if not self.permission.check():
+                raise DispatchResponse(self.permission.deny())
+        else:
+            with self.permission(**self.kwargs_on_request(kwargs)):
+                pass
+        return args
+
+
+class PaginateStep(DispatchStep):
+    """
+    Paginates the returned queryset with ``paginate_queryset`` of the
+    pagination Parameters (e.g. applies ``limit`` and ``offset`` parameters
+    and reports the total count in ``X-Total-Count`` header).
+    """
+
+    phase = 'paginate'
+    has_after = True
+
+    def __init__(self, func, paginate_queryset):
+        super(PaginateStep, self).__init__(func)
+        self.paginate_queryset = paginate_queryset
+
+    def after(self, response, args):
+        return self.paginate_queryset(response, args[1])
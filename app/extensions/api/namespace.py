@@ -7,13 +7,18 @@ from contextlib import contextmanager
 from functools import wraps
 import logging
 
+import flask
 import flask_marshmallow
+from marshmallow import ValidationError
 import sqlalchemy
 
+from flask_restplus_patched import timing
+from flask_restplus_patched.dispatch import record_dispatch_step
+from flask_restplus_patched.model import get_load_only_options
 from flask_restplus_patched.namespace import Namespace as BaseNamespace
 from flask_restplus._http import HTTPStatus
 
-from . import http_exceptions
+from . import dispatch, http_exceptions
 from .webargs_parser import CustomWebargsParser
 
 
@@ -31,6 +36,9 @@ class Namespace(BaseNamespace):
         """
         A helper decorator to resolve DB record instance by id.
 
+        If a client requested a sparse fieldset (``?fields=``), only the
+        relevant columns get loaded.
+
         Arguments:
             model (type) - a Flask-SQLAlchemy model class with
                 ``query.get_or_404`` method
@@ -56,12 +64,23 @@ class Namespace(BaseNamespace):
             identity_arg_names = ('%s_id' % object_arg_name, )
         elif not isinstance(identity_arg_names, (list, tuple)):
             identity_arg_names = (identity_arg_names, )
-        return self.resolve_object(
-            object_arg_name,
-            resolver=lambda kwargs: model.query.get_or_404(
-                [kwargs.pop(identity_arg_name) for identity_arg_name in identity_arg_names]
-            )
-        )
+
+        def resolver(kwargs):
+            # pylint: disable=missing-docstring
+            identity = [kwargs.pop(identity_arg_name) for identity_arg_name in identity_arg_names]
+            field_names = self.get_sparse_fieldset()
+            if field_names:
+                return model.query.options(
+                    *get_load_only_options(model, field_names)
+                ).get_or_404(identity)
+
+            from app.extensions import db
+            obj = db.hot_get(model, identity)
+            if obj is None:
+                flask.abort(HTTPStatus.NOT_FOUND)
+            return obj
+
+        return self.resolve_object(object_arg_name, resolver=resolver)
 
     def model(self, name=None, model=None, **kwargs):
         # pylint: disable=arguments-differ
@@ -155,7 +174,13 @@ class Namespace(BaseNamespace):
 
             oauth_protection_decorator = oauth2.require_oauth(*_oauth_scopes, locations=locations)
             self._register_access_restriction_decorator(protected_func, oauth_protection_decorator)
-            oauth_protected_func = oauth_protection_decorator(protected_func)
+            oauth_protected_func = timing.timed('auth', oauth_protection_decorator)(
+                protected_func
+            )
+            record_dispatch_step(
+                oauth_protected_func,
+                dispatch.OAuth2Step(protected_func, oauth2, _oauth_scopes, locations)
+            )
 
             if 'form' in locations:
                 oauth_protected_func = self.param(
@@ -243,7 +268,11 @@ class Namespace(BaseNamespace):
                                 return func(*args, **kwargs)
                         return wrapper
 
-                protected_func = _permission_decorator(func)
+                protected_func = timing.timed('permission', _permission_decorator)(func)
+                record_dispatch_step(
+                    protected_func,
+                    dispatch.PermissionStep(func, permission, kwargs_on_request)
+                )
                 self._register_access_restriction_decorator(protected_func, _permission_decorator)
 
             # Apply `_role_permission_applied` marker for Role Permissions,
@@ -294,9 +323,9 @@ class Namespace(BaseNamespace):
         Also, any custom Parameters can be used, but it needs to have ``limit`` and ``offset``
         fields.
         """
+        from app.extensions.api.parameters import PaginationParameters
         if not parameters:
             # Use default parameters if None specified
-            from app.extensions.api.parameters import PaginationParameters
             parameters = PaginationParameters()
 
         if not all(
@@ -306,22 +335,42 @@ class Namespace(BaseNamespace):
             raise AttributeError(
                 '`limit` and `offset` fields must be in Parameter passed to `paginate()`'
             )
+        # Custom Parameters may not be derived from PaginationParameters
+        paginate_queryset = getattr(
+            parameters, 'paginate_queryset', PaginationParameters.paginate_queryset
+        )
 
         def decorator(func):
             @wraps(func)
             def wrapper(self_, parameters_args, *args, **kwargs):
                 queryset = func(self_, parameters_args, *args, **kwargs)
-                total_count = queryset.count()
-                return (
-                    queryset
-                        .offset(parameters_args['offset'])
-                        .limit(parameters_args['limit']),
-                    HTTPStatus.OK,
-                    {'X-Total-Count': total_count}
-                )
+                with timing.span('paginate'):
+                    return paginate_queryset(queryset, parameters_args)
+            record_dispatch_step(wrapper, dispatch.PaginateStep(func, paginate_queryset))
             return self.parameters(parameters, locations)(wrapper)
         return decorator
 
+    def read_only(self, func_or_class):
+        """
+        A decorator which marks resource methods as read-only, so their
+        database queries are routed to the read replicas even if they don't
+        use a safe HTTP method (e.g. a search with the query in a POST body).
+
+        Example:
+        >>> @namespace.route('/search')
+        ... class UsersSearch(Resource):
+        ...     @namespace.read_only
+        ...     def post(self):
+        ...         return User.query.filter(...)
+        """
+        # pylint: disable=no-self-use
+        if isinstance(func_or_class, type):
+            # pylint: disable=protected-access
+            func_or_class._apply_decorator_to_methods(self.read_only)
+            return func_or_class
+        func_or_class.__read_only__ = True
+        return func_or_class
+
     @contextmanager
     def commit_or_abort(self, session, default_error_message="The operation failed to complete"):
         """
@@ -343,6 +392,10 @@ class Namespace(BaseNamespace):
         except ValueError as exception:
             log.info("Database transaction was rolled back due to: %r", exception)
             http_exceptions.abort(code=HTTPStatus.CONFLICT, message=str(exception))
+        except ValidationError as exception:
+            # e.g. a failed `test` operation of a PATCH request
+            log.info("Database transaction was rolled back due to: %r", exception)
+            http_exceptions.abort(code=HTTPStatus.CONFLICT, message=str(exception))
         except sqlalchemy.exc.IntegrityError as exception:
             log.info("Database transaction was rolled back due to: %r", exception)
             http_exceptions.abort(
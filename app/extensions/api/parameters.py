@@ -4,11 +4,19 @@ Common reusable Parameters classes
 ----------------------------------
 """
 
-from marshmallow import validate
+import base64
+from datetime import datetime
+import json
+
+from flask_restplus._http import HTTPStatus
+from marshmallow import validate, validates, post_load, ValidationError
+import sqlalchemy
 
 from flask_marshmallow import base_fields
 from flask_restplus_patched import Parameters
 
+from .http_exceptions import abort
+
 
 class PaginationParameters(Parameters):
     """
@@ -25,3 +33,182 @@ class PaginationParameters(Parameters):
         missing=0,
         validate=validate.Range(min=0)
     )
+
+    @classmethod
+    def paginate_queryset(cls, queryset, args):
+        """
+        Apply ``offset`` and ``limit`` to the queryset and report the total
+        count in ``X-Total-Count`` header.
+
+        Returns:
+            queryset, status, headers (tuple) - the resource response.
+        """
+        return (
+            queryset
+                .offset(args['offset'])
+                .limit(args['limit']),
+            HTTPStatus.OK,
+            {'X-Total-Count': queryset.count()}
+        )
+
+
+class KeysetPaginationParameters(Parameters):
+    """
+    Helper Parameters class to reuse keyset (cursor) pagination.
+
+    ``cursor`` is an opaque string which encodes the sort key of the last
+    item of the previous page (see :meth:`encode_cursor`), so the next page
+    is found with an index seek instead of skipping ``offset`` items. The
+    decoded sort key (a list) is available as ``cursor`` argument.
+    """
+
+    limit = base_fields.Integer(
+        description="limit a number of items (allowed range is 1-100), default is 20.",
+        missing=20,
+        validate=validate.Range(min=1, max=100)
+    )
+    cursor = base_fields.String(
+        description="a cursor of the next page (`X-Next-Cursor` header of the previous page)."
+    )
+
+    @staticmethod
+    def encode_cursor(*sort_key):
+        """
+        Encode the sort key of the last item of a page as the next page cursor.
+        """
+        return base64.urlsafe_b64encode(
+            json.dumps(sort_key, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        # pylint: disable=missing-docstring
+        try:
+            sort_key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid cursor.")
+        if not isinstance(sort_key, list):
+            raise ValidationError("Invalid cursor.")
+        return sort_key
+
+    @classmethod
+    def get_page(cls, items, limit, get_sort_key):
+        """
+        Cut a page out of ``limit + 1`` fetched items.
+
+        Returns:
+            items, headers (tuple) - the page items and the response headers
+            (``X-Next-Cursor`` unless it is the last page).
+        """
+        headers = {}
+        if len(items) > limit:
+            items = items[:limit]
+            headers['X-Next-Cursor'] = cls.encode_cursor(*get_sort_key(items[-1]))
+        return items, headers
+
+    @validates('cursor')
+    def validate_cursor(self, data):
+        # pylint: disable=missing-docstring
+        self.decode_cursor(data)
+
+    @post_load
+    def load_cursor(self, data):
+        # pylint: disable=missing-docstring
+        if 'cursor' in data:
+            data['cursor'] = self.decode_cursor(data['cursor'])
+        return data
+
+
+class UpdatedSincePaginationParameters(PaginationParameters, KeysetPaginationParameters):
+    """
+    Helper Parameters class to reuse pagination of the collections which
+    support incremental sync.
+
+    Once ``updated_since`` or ``cursor`` is given, only the items changed
+    since then are returned ordered by ``TIMESTAMP_FIELD`` and the primary
+    key (so the index on these columns is used), and ``X-Next-Cursor`` header
+    is set on every page: a client keeps the cursor of the last page (it has
+    less than ``limit`` items) to fetch only the next changes later.
+    """
+
+    TIMESTAMP_FIELD = 'updated'
+
+    updated_since = base_fields.DateTime(
+        description="only the items changed since this time (ISO 8601, UTC by default)."
+    )
+
+    @validates('cursor')
+    def validate_updated_cursor(self, data):
+        # pylint: disable=missing-docstring
+        sort_key = self.decode_cursor(data)
+        if len(sort_key) < 2 or not all(
+                isinstance(value, int) and not isinstance(value, bool) for value in sort_key[1:]
+            ):
+            raise ValidationError("Invalid cursor.")
+        self._load_timestamp(sort_key[0])
+
+    @staticmethod
+    def _load_timestamp(value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f')
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid cursor.")
+
+    @post_load
+    def load_cursor(self, data):
+        # pylint: disable=missing-docstring
+        data = super(UpdatedSincePaginationParameters, self).load_cursor(data)
+        if 'cursor' in data:
+            data['cursor'][0] = self._load_timestamp(data['cursor'][0])
+        updated_since = data.get('updated_since')
+        if updated_since is not None and updated_since.tzinfo is not None:
+            # The timestamps are stored as naive UTC datetimes
+            data['updated_since'] = (
+                updated_since - updated_since.utcoffset()
+            ).replace(tzinfo=None)
+        return data
+
+    @classmethod
+    def paginate_queryset(cls, queryset, args):
+        if args.get('updated_since') is None and 'cursor' not in args:
+            return super(UpdatedSincePaginationParameters, cls).paginate_queryset(queryset, args)
+
+        model = queryset.column_descriptions[0]['entity']
+        sort_columns = [getattr(model, cls.TIMESTAMP_FIELD)] + list(
+            sqlalchemy.inspect(model).primary_key
+        )
+        if 'cursor' in args:
+            sort_key = args['cursor']
+            if len(sort_key) != len(sort_columns):
+                abort(code=HTTPStatus.UNPROCESSABLE_ENTITY, message="Invalid cursor.")
+            queryset = queryset.filter(
+                sort_columns[0] >= sort_key[0],
+                _get_keyset_filter(sort_columns, sort_key)
+            )
+        else:
+            queryset = queryset.filter(sort_columns[0] >= args['updated_since'])
+        items = queryset.order_by(None).order_by(*sort_columns).limit(args['limit']).all()
+
+        if items:
+            sort_key = [getattr(items[-1], column.key) for column in sort_columns]
+        elif 'cursor' in args:
+            sort_key = args['cursor']
+        else:
+            # Nothing has changed yet, so the next changes are the ones which
+            # follow `updated_since` (it is not inclusive for cursors).
+            sort_key = [args['updated_since']] + [0] * (len(sort_columns) - 1)
+        sort_key[0] = sort_key[0].strftime('%Y-%m-%dT%H:%M:%S.%f')
+        return items, HTTPStatus.OK, {'X-Next-Cursor': cls.encode_cursor(*sort_key)}
+
+
+def _get_keyset_filter(columns, values):
+    """
+    Build a portable ``(columns) > (values)`` row values comparison.
+    """
+    condition = columns[-1] > values[-1]
+    for column, value in reversed(list(zip(columns[:-1], values[:-1]))):
+        condition = sqlalchemy.or_(
+            column > value,
+            sqlalchemy.and_(column == value, condition)
+        )
+    return condition
@@ -15,10 +15,12 @@ from datetime import datetime, timedelta
 import functools
 import logging
 
+from flask import g
 from flask_login import current_user
 from flask_oauthlib import provider
 from flask_restplus._http import HTTPStatus
 import sqlalchemy
+from werkzeug import cached_property
 
 from app.extensions import api, db
 
@@ -41,7 +43,7 @@ class OAuth2RequestValidator(provider.OAuth2RequestValidator):
         super(OAuth2RequestValidator, self).__init__(
             usergetter=self._usergetter,
             clientgetter=self._client_class.find,
-            tokengetter=self._token_class.find,
+            tokengetter=self._tokengetter,
             grantgetter=self._grant_class.find,
             tokensetter=self._tokensetter,
             grantsetter=self._grantsetter,
@@ -53,6 +55,16 @@ class OAuth2RequestValidator(provider.OAuth2RequestValidator):
         from app.modules.users.models import User
         return User.find_with_password(username, password)
 
+    def _tokengetter(self, access_token=None, refresh_token=None):
+        # pylint: disable=method-hidden
+        # Access tokens which have already been verified within the current
+        # application context (e.g. by a batch request) can be shared with
+        # the nested requests, so they don't hit the database again.
+        verified_tokens = g.get('oauth2_verified_tokens')
+        if access_token and verified_tokens and access_token in verified_tokens:
+            return verified_tokens[access_token]
+        return self._token_class.find(access_token=access_token, refresh_token=refresh_token)
+
     def _tokensetter(self, token, request, *args, **kwargs):
         # pylint: disable=method-hidden,unused-argument
         # TODO: review expiration time
@@ -119,7 +131,51 @@ class OAuth2Provider(provider.OAuth2Provider):
     def init_app(self, app):
         assert app.config['SECRET_KEY'], "SECRET_KEY must be configured!"
         super(OAuth2Provider, self).init_app(app)
-        self._validator = OAuth2RequestValidator()
+
+    @cached_property
+    def _validator(self):
+        # The validator is created on the first use since it requires the
+        # auth models, which can be loaded lazily (see `app.modules`).
+        return OAuth2RequestValidator()
+
+    def authorize_request(self, scopes, locations):
+        """
+        Verify the OAuth2 access token of the current request (looked up in
+        the specified locations) against the required scopes.
+
+        This is the same procedure as ``require_oauth`` decorator performs.
+
+        Returns:
+            ``None`` if the request is authorized, otherwise a response
+            produced by the invalid response handler.
+        """
+        from flask import abort, request
+
+        if 'headers' not in locations:
+            # Invalidate authorization if developer specifically
+            # disables the lookup in the headers.
+            request.authorization = '!'
+        if 'form' in locations:
+            if 'access_token' in request.form:
+                request.authorization = 'Bearer %s' % request.form['access_token']
+
+        for func in self._before_request_funcs:
+            func()
+
+        if getattr(request, 'oauth', None):
+            return None
+
+        valid, req = self.verify_request(scopes)
+
+        for func in self._after_request_funcs:
+            valid, req = func(valid, req)
+
+        if not valid:
+            if self._invalid_response:
+                return self._invalid_response(req)
+            return abort(HTTPStatus.UNAUTHORIZED)
+        request.oauth = req
+        return None
 
     def require_oauth(self, *args, **kwargs):
         # pylint: disable=arguments-differ
@@ -135,25 +191,17 @@ class OAuth2Provider(provider.OAuth2Provider):
             function: a decorator.
         """
         locations = kwargs.pop('locations', ('cookies',))
-        origin_decorator = super(OAuth2Provider, self).require_oauth(*args, **kwargs)
 
         def decorator(func):
             # pylint: disable=missing-docstring
-            from flask import request
-
-            origin_decorated_func = origin_decorator(func)
 
-            @functools.wraps(origin_decorated_func)
-            def wrapper(*args, **kwargs):
+            @functools.wraps(func)
+            def wrapper(*args_, **kwargs_):
                 # pylint: disable=missing-docstring
-                if 'headers' not in locations:
-                    # Invalidate authorization if developer specifically
-                    # disables the lookup in the headers.
-                    request.authorization = '!'
-                if 'form' in locations:
-                    if 'access_token' in request.form:
-                        request.authorization = 'Bearer %s' % request.form['access_token']
-                return origin_decorated_func(*args, **kwargs)
+                invalid_response = self.authorize_request(args, locations)
+                if invalid_response is not None:
+                    return invalid_response
+                return func(*args_, **kwargs_)
 
             return wrapper
 
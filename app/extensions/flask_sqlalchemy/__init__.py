@@ -3,14 +3,62 @@
 Flask-SQLAlchemy adapter
 ------------------------
 """
+import functools
+import random
 import sqlite3
+import time
 
-from sqlalchemy import engine, MetaData
+import flask
+from flask import current_app
+from flask_sqlalchemy import get_state, SignallingSession, SQLAlchemy as BaseSQLAlchemy
+from sqlalchemy import event, orm, MetaData
+from sqlalchemy.ext import baked
+from sqlalchemy.pool import NullPool, QueuePool
+from sqlalchemy.sql.dml import UpdateBase
 
-from flask_sqlalchemy import SQLAlchemy as BaseSQLAlchemy
 
+# SQLite pragmas applied to every new connection (``SQLALCHEMY_SQLITE_PROFILE``
+# config variable selects the profile):
+#
+# * ``default`` - rollback journal, fsync on every commit;
+# * ``wal`` - write-ahead log, so readers don't block the writer and vice
+#   versa; still fsync on every commit;
+# * ``wal-fast`` - write-ahead log, fsync only on checkpoints (a power loss may
+#   roll back the last transactions, but never corrupts the database), and
+#   bigger page cache and memory-mapped I/O.
+#
+# https://www.sqlite.org/pragma.html
+SQLITE_PROFILES = {
+    'default': (
+        ('foreign_keys', 'ON'),
+    ),
+    'wal': (
+        ('foreign_keys', 'ON'),
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'FULL'),
+        ('busy_timeout', 5000),
+        ('cache_size', -8000),
+        ('mmap_size', 0),
+        ('temp_store', 'MEMORY'),
+    ),
+    'wal-fast': (
+        ('foreign_keys', 'ON'),
+        ('journal_mode', 'WAL'),
+        ('synchronous', 'NORMAL'),
+        ('busy_timeout', 5000),
+        ('cache_size', -64000),
+        ('mmap_size', 256 * 2**20),
+        ('temp_store', 'MEMORY'),
+    ),
+}
 
-def set_sqlite_pragma(dbapi_connection, connection_record):
+# Private engine options passed from ``apply_driver_hacks``, where the
+# application is known, to ``create_engine``
+_SQLITE_PROFILE_OPTION = '_sqlite_profile'
+_POOL_STATISTICS_OPTION = '_pool_statistics'
+
+
+def set_sqlite_pragma(dbapi_connection, connection_record, pragmas=SQLITE_PROFILES['default']):
     # pylint: disable=unused-argument
     """
     SQLite supports FOREIGN KEY syntax when emitting CREATE statements for
@@ -18,14 +66,257 @@ def set_sqlite_pragma(dbapi_connection, connection_record):
     operation of the table.
 
     http://docs.sqlalchemy.org/en/latest/dialects/sqlite.html#foreign-key-support
+
+    The rest of the pragmas (see ``SQLITE_PROFILES``) are also set once per
+    connection.
     """
     if not isinstance(dbapi_connection, sqlite3.Connection):
         return
     cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA foreign_keys=ON")
+    for name, value in pragmas:
+        cursor.execute("PRAGMA %s=%s" % (name, value))
     cursor.close()
 
 
+def listen_sqlite_pragmas(engine, sqlite_profile='default'):
+    """
+    Apply the pragmas of ``sqlite_profile`` (see ``SQLITE_PROFILES``) to
+    every new SQLite connection of ``engine`` (e.g. the engine of database
+    migrations). The connections of other databases are left as is.
+    """
+    event.listen(
+        engine,
+        'connect',
+        functools.partial(set_sqlite_pragma, pragmas=SQLITE_PROFILES[sqlite_profile])
+    )
+
+
+def get_pools_metrics():
+    """
+    Get the connection pools statistics of the current application engines.
+    """
+    pools_statistics = current_app.extensions.get('sqlalchemy_pools_statistics', {})
+    return {
+        database: pool_statistics.get_metrics()
+        for database, pool_statistics in list(pools_statistics.items())
+    }
+
+
+# The cookie holding the time (UNIX timestamp) until which the client's
+# requests are routed to the primary database after a write
+PRIMARY_STICKINESS_COOKIE = 'db_primary_until'
+
+_SAFE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+
+class RequestRouting(object):
+    """
+    Read/write routing state of a single request.
+    """
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = ('replica_bind', 'has_writes')
+
+    def __init__(self, replica_bind):
+        self.replica_bind = replica_bind
+        self.has_writes = False
+
+
+def get_request_routing():
+    """
+    Get the routing state of the current request, or ``None`` outside of a
+    request (or if there are no read replicas configured).
+    """
+    request_context = flask._request_ctx_stack.top  # pylint: disable=protected-access
+    if request_context is None:
+        return None
+    return getattr(request_context, 'db_routing', None)
+
+
+def is_read_only_request():
+    """
+    Check if the current request is not supposed to write to the database:
+    it uses a safe HTTP method, or its resource method is marked with
+    ``Namespace.read_only`` decorator.
+    """
+    if flask.request.method in _SAFE_METHODS:
+        return True
+    view_function = current_app.view_functions.get(flask.request.endpoint)
+    view_class = getattr(view_function, 'view_class', None)
+    method_func = getattr(view_class, flask.request.method.lower(), None)
+    return getattr(method_func, '__read_only__', False)
+
+
+class RoutingSession(SignallingSession):
+    """
+    A session which routes the queries of read-only requests to one of the
+    read replicas (``SQLALCHEMY_REPLICA_BINDS`` config variable).
+
+    Flushes, Core DML statements, and everything inside explicit
+    transactions (e.g. ``api.commit_or_abort``) always go to the primary
+    database, and the writes make the client stick to it for a while (see
+    :func:`finish_request_routing`).
+
+    In the request-transaction mode (``SQLALCHEMY_REQUEST_TRANSACTIONS``
+    config variable), all the queries of a request outside of explicit
+    transactions share a single connection and a single (read) transaction
+    instead of checking out a connection per statement. An explicit
+    ``session.begin()`` upgrades the request transaction to a write
+    transaction, which gets committed at the end of its block, and the
+    following queries start a new request transaction.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(RoutingSession, self).__init__(*args, **kwargs)
+        self._request_transactions = False
+        self._request_transaction = None
+
+    def start_request_transactions(self):
+        """
+        Run the following queries outside of explicit transactions in request
+        transactions.
+        """
+        self._request_transactions = True
+
+    def end_request_transactions(self, commit=True):
+        """
+        Finish the current request transaction (if any) releasing its
+        connection.
+        """
+        self._request_transactions = False
+        request_transaction, self._request_transaction = self._request_transaction, None
+        if request_transaction is not None and request_transaction is self.transaction:
+            if commit:
+                request_transaction.commit()
+            else:
+                request_transaction.rollback()
+
+    def begin(self, subtransactions=False, nested=False):
+        if (
+                self._request_transaction is not None
+                and self._request_transaction is self.transaction
+                and not subtransactions
+                and not nested
+        ):
+            # Upgrade the request transaction to a write transaction, so it is
+            # committed (or rolled back) by the caller.
+            transaction, self._request_transaction = self._request_transaction, None
+            return transaction
+        return super(RoutingSession, self).begin(subtransactions=subtransactions, nested=nested)
+
+    def _connection_for_bind(self, engine, execution_options=None, **kwargs):
+        # pylint: disable=arguments-differ
+        if self._request_transactions and self.transaction is None:
+            self._request_transaction = super(RoutingSession, self).begin()
+        return super(RoutingSession, self)._connection_for_bind(
+            engine,
+            execution_options,
+            **kwargs
+        )
+
+    def get_bind(self, mapper=None, clause=None):
+        routing = get_request_routing()
+        if routing is not None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                # Both the flushes and Core DML statements (e.g. bulk
+                # ``session.execute(table.insert(), rows)`` or
+                # ``query.update()``) write to the primary database.
+                routing.has_writes = True
+            elif (
+                    routing.replica_bind is not None
+                    and (self.transaction is None or self.transaction is self._request_transaction)
+                    and not _get_bind_key(mapper)
+            ):
+                return get_state(self.app).db.get_engine(self.app, bind=routing.replica_bind)
+        return super(RoutingSession, self).get_bind(mapper=mapper, clause=clause)
+
+
+def _get_bind_key(mapper):
+    # Models with ``__bind_key__`` live in their own databases, which are not
+    # replicated.
+    if mapper is None:
+        return None
+    return mapper.persist_selectable.info.get('bind_key')
+
+
+def start_request_routing():
+    """
+    Choose the database for the current request: a random read replica for
+    read-only requests, unless the client has written to the primary database
+    within the last ``SQLALCHEMY_REPLICA_STICKINESS`` seconds
+    ("read-your-writes" consistency).
+    """
+    replica_bind = None
+    try:
+        primary_until = float(flask.request.cookies.get(PRIMARY_STICKINESS_COOKIE, 0))
+    except ValueError:
+        primary_until = 0
+    if primary_until < time.time() and is_read_only_request():
+        replica_bind = random.choice(current_app.config['SQLALCHEMY_REPLICA_BINDS'])
+    # pylint: disable=protected-access
+    flask._request_ctx_stack.top.db_routing = RequestRouting(replica_bind)
+
+
+def finish_request_routing(response):
+    """
+    Make the following requests of the client stick to the primary database
+    after a write.
+    """
+    routing = get_request_routing()
+    if routing is not None and routing.has_writes:
+        stickiness = current_app.config['SQLALCHEMY_REPLICA_STICKINESS']
+        response.set_cookie(
+            PRIMARY_STICKINESS_COOKIE,
+            '%d' % (time.time() + stickiness + 1),
+            max_age=stickiness + 1,
+            httponly=True
+        )
+    return response
+
+
+def start_request_transactions():
+    """
+    Start the request-transaction mode of the current session (see
+    :class:`RoutingSession`).
+    """
+    if current_app.config['SQLALCHEMY_REQUEST_TRANSACTIONS']:
+        get_state(current_app).db.session().start_request_transactions()
+
+
+def end_request_transactions(exception=None):
+    """
+    Commit (or roll back on errors) the request transaction of the current
+    session, so its connection gets back to the pool.
+    """
+    session = get_state(current_app).db.session
+    if current_app.config['SQLALCHEMY_REQUEST_TRANSACTIONS'] and session.registry.has():
+        session().end_request_transactions(commit=exception is None)
+
+
+class HotQuery(object):
+    """
+    A query executed on (nearly) every request, which is constructed and
+    compiled to SQL once per process (it is a SQLAlchemy baked query), so
+    its executions only bind new parameters.
+
+    Use :meth:`SQLAlchemy.hot_query` to register hot queries.
+    """
+
+    def __init__(self, db, name, build_query, cache_key=()):
+        # pylint: disable=invalid-name
+        self.db = db
+        self.name = name
+        self.baked_query = db.bakery(build_query, *cache_key)
+
+    def __call__(self, **params):
+        """
+        Get the (lazy) ``baked.Result`` of the query with the given
+        ``bindparam`` values in the current session, e.g.
+        ``hot_query(username='root').first()``.
+        """
+        return self.baked_query(self.db.session()).params(**params)
+
+
 class AlembicDatabaseMigrationConfig(object):
     """
     Helper config holder that provides missing functions of Flask-Alembic
@@ -42,6 +333,16 @@ class SQLAlchemy(BaseSQLAlchemy):
     """
     Customized Flask-SQLAlchemy adapter with enabled autocommit, constraints
     auto-naming conventions and ForeignKey constraints for SQLite.
+
+    Connection pools are configured with ``SQLALCHEMY_POOL_OPTIONS`` config
+    variable (``pool_size``, ``max_overflow``, ``pool_timeout``,
+    ``pool_recycle``, ``pool_pre_ping``), and their usage statistics are
+    served at the instrumentation metrics endpoint when
+    ``SQLALCHEMY_POOL_METRICS`` is enabled.
+
+    Read-only requests are routed to the read replicas (see
+    :class:`RoutingSession`) listed in ``SQLALCHEMY_REPLICA_BINDS`` config
+    variable (the names of ``SQLALCHEMY_BINDS``).
     """
 
     def __init__(self, *args, **kwargs):
@@ -60,13 +361,124 @@ class SQLAlchemy(BaseSQLAlchemy):
             }
         )
         super(SQLAlchemy, self).__init__(*args, **kwargs)
+        self.bakery = baked.bakery(size=200)
+        self.hot_queries = {}
+
+    def hot_query(self, name, *cache_key):
+        """
+        A decorator registering a hot query (see :class:`HotQuery`) built by
+        the decorated function from a session. The query parameters have to
+        be ``sqlalchemy.bindparam`` placeholders. The cached compiled query is
+        looked up by the code of the function and ``cache_key`` values, so the
+        function must not depend on any other variables.
+
+        Example:
+        >>> @db.hot_query('User.find_by_username')
+        ... def find_user_by_username(session):
+        ...     return session.query(User).filter(User.username == bindparam('username'))
+        ...
+        >>> find_user_by_username(username='root').first()
+        <User(id=1, username="root", ...)>
+        """
+        def decorator(build_query):
+            # pylint: disable=missing-docstring
+            hot_query = HotQuery(self, name, build_query, cache_key)
+            self.hot_queries[name] = hot_query
+            return hot_query
+        return decorator
+
+    def hot_get(self, model, ident):
+        """
+        The same as ``model.query.get(ident)`` (the identity map is checked
+        first), but with the query compiled once per model.
+        """
+        name = '%s.get' % model.__name__
+        hot_query = self.hot_queries.get(name)
+        if hot_query is None:
+            def build_query(session):
+                # pylint: disable=missing-docstring
+                return session.query(model)
+            hot_query = self.hot_query(name, model)(build_query)
+        return hot_query().get(ident)
 
     def init_app(self, app):
+        app.config.setdefault('SQLALCHEMY_SQLITE_PROFILE', 'default')
+        app.config.setdefault('SQLALCHEMY_POOL_OPTIONS', {})
+        app.config.setdefault('SQLALCHEMY_POOL_METRICS', False)
+        app.config.setdefault('SQLALCHEMY_POOL_METRICS_SAMPLES', 1000)
+        app.config.setdefault('SQLALCHEMY_REPLICA_BINDS', ())
+        app.config.setdefault('SQLALCHEMY_REPLICA_STICKINESS', 5)
+        app.config.setdefault('SQLALCHEMY_REQUEST_TRANSACTIONS', False)
         super(SQLAlchemy, self).init_app(app)
 
         database_uri = app.config['SQLALCHEMY_DATABASE_URI']
         assert database_uri, "SQLALCHEMY_DATABASE_URI must be configured!"
-        if database_uri.startswith('sqlite:'):
-            self.event.listens_for(engine.Engine, "connect")(set_sqlite_pragma)
+        assert app.config['SQLALCHEMY_SQLITE_PROFILE'] in SQLITE_PROFILES, (
+            "SQLALCHEMY_SQLITE_PROFILE must be one of: %s" % ', '.join(sorted(SQLITE_PROFILES))
+        )
 
         app.extensions['migrate'] = AlembicDatabaseMigrationConfig(self, compare_type=True)
+
+        app.before_request(start_request_transactions)
+        app.teardown_request(end_request_transactions)
+
+        replica_binds = app.config['SQLALCHEMY_REPLICA_BINDS']
+        if replica_binds:
+            binds = app.config['SQLALCHEMY_BINDS'] or {}
+            assert all(replica_bind in binds for replica_bind in replica_binds), (
+                "SQLALCHEMY_REPLICA_BINDS must be configured in SQLALCHEMY_BINDS"
+            )
+            app.before_request(start_request_routing)
+            app.after_request(finish_request_routing)
+
+        if app.config['SQLALCHEMY_POOL_METRICS']:
+            from app.extensions import instrumentation
+
+            app.extensions['sqlalchemy_pools_statistics'] = {}
+            instrumentation.register_metrics_provider('db_pools', get_pools_metrics)
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        sa_url, options = super(SQLAlchemy, self).apply_driver_hacks(app, sa_url, options)
+        if sa_url.drivername.startswith('sqlite'):
+            sqlite_profile = app.config['SQLALCHEMY_SQLITE_PROFILE']
+            options[_SQLITE_PROFILE_OPTION] = sqlite_profile
+            if sqlite_profile != 'default' and options.get('poolclass') is NullPool:
+                # Keep the connections (and their page caches) open, so the
+                # pragmas are not applied on every checkout. The pool
+                # guarantees that a connection is used by one thread at a
+                # time.
+                options['poolclass'] = QueuePool
+                options.setdefault('connect_args', {})['check_same_thread'] = False
+
+        # Pool options are not applied to NullPool (nothing to tune) and
+        # StaticPool (SQLite in-memory database must never be recycled).
+        poolclass = options.get('poolclass')
+        if poolclass is None or issubclass(poolclass, QueuePool):
+            options.update(app.config['SQLALCHEMY_POOL_OPTIONS'])
+
+        if app.config['SQLALCHEMY_POOL_METRICS']:
+            from app.extensions.instrumentation import PoolStatistics
+
+            pool_statistics = PoolStatistics(app.config['SQLALCHEMY_POOL_METRICS_SAMPLES'])
+            app.extensions['sqlalchemy_pools_statistics'][
+                sa_url.__to_string__(hide_password=True)
+            ] = pool_statistics
+            options[_POOL_STATISTICS_OPTION] = pool_statistics
+        return sa_url, options
+
+    def create_engine(self, sa_url, engine_opts):
+        sqlite_profile = engine_opts.pop(_SQLITE_PROFILE_OPTION, None)
+        pool_statistics = engine_opts.pop(_POOL_STATISTICS_OPTION, None)
+        if pool_statistics is not None:
+            engine_opts['poolclass'] = pool_statistics.get_pool_class(
+                engine_opts.get('poolclass') or sa_url.get_dialect().get_pool_class(sa_url)
+            )
+        engine = super(SQLAlchemy, self).create_engine(sa_url, engine_opts)
+        if pool_statistics is not None:
+            pool_statistics.attach(engine)
+        if sqlite_profile is not None:
+            listen_sqlite_pragmas(engine, sqlite_profile)
+        return engine
@@ -0,0 +1,477 @@
+# encoding: utf-8
+"""
+Instrumentation adapter
+-----------------------
+"""
+from collections import Counter, deque
+import logging
+import math
+import re
+import threading
+import time
+
+import flask
+from flask_restplus._http import HTTPStatus
+from sqlalchemy import engine, event
+from sqlalchemy.pool import QueuePool
+
+from flask_restplus_patched import timing
+
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+_SQL_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_SQL_NUMBER_LITERAL_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SQL_PARAMETERS_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SQL_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(statement):
+    """
+    Get a "shape" of an SQL statement, i.e. the statement with all the
+    literals replaced with placeholders and collapsed lists of values, so
+    ``id IN (1, 2)`` and ``id IN (3)`` become the same ``id IN (?)``.
+    """
+    statement = _SQL_STRING_LITERAL_RE.sub('?', statement)
+    statement = _SQL_NUMBER_LITERAL_RE.sub('?', statement)
+    statement = re.sub(r'%\(\w+\)s|%s|:\w+', '?', statement)
+    statement = _SQL_PARAMETERS_LIST_RE.sub('(?)', statement)
+    return _SQL_WHITESPACE_RE.sub(' ', statement).strip()
+
+
+class SQLStatistics(object):
+    """
+    Per-request SQL queries statistics.
+    """
+
+    def __init__(self):
+        self.queries_count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.pool_checkouts_count = 0
+        self.pool_checkout_duration = 0.0
+
+    def add(self, statement, duration):
+        # pylint: disable=missing-docstring
+        self.queries_count += 1
+        self.duration += duration
+        self.statements[normalize_sql(statement)] += 1
+
+    def add_pool_checkout(self, duration):
+        # pylint: disable=missing-docstring
+        self.pool_checkouts_count += 1
+        self.pool_checkout_duration += duration
+
+    def get_repeated_statements(self, threshold):
+        """
+        Get the statements executed more than ``threshold`` times, which are
+        likely to be caused by N+1 query patterns.
+        """
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count > threshold
+        ]
+
+
+class Histogram(object):
+    """
+    A histogram of the most recent ``max_samples`` observed values.
+    """
+
+    def __init__(self, max_samples):
+        self.count = 0
+        self.samples = deque(maxlen=max_samples)
+
+    def observe(self, value):
+        # pylint: disable=missing-docstring
+        self.count += 1
+        self.samples.append(value)
+
+    def get_percentiles(self, percents=(50, 95, 99)):
+        """
+        Get ``{'p50': ..., 'p95': ..., 'p99': ...}`` (nearest-rank) percentiles
+        of the collected samples.
+        """
+        samples = sorted(self.samples)
+        if not samples:
+            return {}
+        return {
+            'p%d' % percent: samples[max(int(math.ceil(percent / 100.0 * len(samples))) - 1, 0)]
+            for percent in percents
+        }
+
+
+class PhasesHistograms(object):
+    """
+    Per-endpoint histograms of request phases durations (in milliseconds).
+    """
+
+    TOTAL = 'total'
+
+    def __init__(self, max_samples):
+        self.max_samples = max_samples
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def _get_histogram(self, origin, phase):
+        try:
+            return self.endpoints[origin][phase]
+        except KeyError:
+            with self._lock:
+                phases = self.endpoints.setdefault(origin, {})
+                return phases.setdefault(phase, Histogram(self.max_samples))
+
+    def observe(self, origin, phases):
+        """
+        Record phases durations (in seconds) of a single request.
+        """
+        for phase, duration in phases.items():
+            self._get_histogram(origin, phase).observe(duration * 1000)
+        self._get_histogram(origin, self.TOTAL).observe(sum(phases.values()) * 1000)
+
+    def get_metrics(self):
+        # pylint: disable=missing-docstring
+        return {
+            origin: {
+                'count': phases[self.TOTAL].count,
+                'phases': {
+                    phase: histogram.get_percentiles()
+                    for phase, histogram in list(phases.items())
+                },
+            }
+            for origin, phases in list(self.endpoints.items())
+        }
+
+
+class _InstrumentedPoolMixin(object):
+    """
+    A mixin of the connection pool classes, which times the connections
+    checkouts (see :meth:`PoolStatistics.get_pool_class`).
+    """
+
+    pool_statistics = None
+
+    def connect(self):
+        # pylint: disable=missing-docstring
+        return self.pool_statistics.checkout(self, super(_InstrumentedPoolMixin, self).connect)
+
+    def unique_connection(self):
+        # pylint: disable=missing-docstring
+        # NOTE: ``Engine.raw_connection()`` checks out the connections with
+        # this method in SQLAlchemy < 1.4.
+        return self.pool_statistics.checkout(
+            self,
+            super(_InstrumentedPoolMixin, self).unique_connection
+        )
+
+
+class PoolStatistics(object):
+    """
+    Connection pool usage statistics of a single engine.
+
+    Checkout time is the time spent getting a connection from the pool
+    (including opening new connections and pre-pings), and wait time is the
+    checkout time of the checkouts which found the pool exhausted, so the
+    pool starvation can be told apart from slow queries.
+
+    The engine has to be created with the pool class returned from
+    :meth:`get_pool_class`, and then passed to :meth:`attach`.
+    """
+
+    def __init__(self, max_samples):
+        self.engine = None
+        self.pool_class = None
+        self.checkouts_count = 0
+        self.checkout_time = Histogram(max_samples)
+        self.waits_count = 0
+        self.wait_time = Histogram(max_samples)
+        self.overflow_checkouts_count = 0
+        self.connects_count = 0
+        self.invalidations_count = 0
+        self.soft_invalidations_count = 0
+
+    def get_pool_class(self, pool_class):
+        """
+        Get a subclass of ``pool_class`` which reports its checkouts to these
+        statistics (the pools recreated by ``Engine.dispose()`` keep the
+        class).
+        """
+        self.pool_class = pool_class
+        return type(
+            'Instrumented%s' % pool_class.__name__,
+            (_InstrumentedPoolMixin, pool_class),
+            {'pool_statistics': self}
+        )
+
+    def attach(self, engine_):
+        """
+        Start collecting the statistics of the engine connection pool.
+        """
+        assert isinstance(engine_.pool, _InstrumentedPoolMixin), (
+            "The engine has to be created with `PoolStatistics.get_pool_class()` pool class"
+        )
+        self.engine = engine_
+        # NOTE: Pool events listeners are kept when the pool is recreated by
+        # ``Engine.dispose()``.
+        event.listen(engine_, 'connect', self._on_connect)
+        event.listen(engine_, 'invalidate', self._on_invalidate)
+        event.listen(engine_, 'soft_invalidate', self._on_soft_invalidate)
+
+    def checkout(self, pool, checkout):
+        """
+        Check out a connection with ``checkout`` function recording the time
+        it takes.
+        """
+        # pylint: disable=protected-access
+        is_queue_pool = isinstance(pool, QueuePool)
+        is_exhausted = (
+            is_queue_pool
+            and pool._max_overflow > -1
+            and pool.checkedout() >= pool.size() + pool._max_overflow
+        )
+        is_overflow = False
+        start_time = time.time()
+        try:
+            connection = checkout()
+            is_overflow = is_queue_pool and pool.checkedout() > pool.size()
+            return connection
+        finally:
+            duration = time.time() - start_time
+            self.checkouts_count += 1
+            self.checkout_time.observe(duration * 1000)
+            if is_exhausted:
+                self.waits_count += 1
+                self.wait_time.observe(duration * 1000)
+            if is_overflow:
+                self.overflow_checkouts_count += 1
+            sql_statistics = get_sql_statistics()
+            if sql_statistics is not None:
+                sql_statistics.add_pool_checkout(duration)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        # pylint: disable=unused-argument
+        self.connects_count += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        # pylint: disable=unused-argument
+        self.invalidations_count += 1
+
+    def _on_soft_invalidate(self, dbapi_connection, connection_record, exception):
+        # pylint: disable=unused-argument
+        self.soft_invalidations_count += 1
+
+    def get_metrics(self):
+        # pylint: disable=missing-docstring
+        metrics = {
+            'pool_class': self.pool_class.__name__ if self.pool_class else None,
+            'checkouts': self.checkouts_count,
+            'checkout_ms': self.checkout_time.get_percentiles(),
+            'waits': self.waits_count,
+            'wait_ms': self.wait_time.get_percentiles(),
+            'overflow_checkouts': self.overflow_checkouts_count,
+            'connects': self.connects_count,
+            'invalidations': self.invalidations_count,
+            'soft_invalidations': self.soft_invalidations_count,
+        }
+        pool = self.engine.pool if self.engine else None
+        if isinstance(pool, QueuePool):
+            metrics.update({
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': max(pool.overflow(), 0),
+            })
+        return metrics
+
+
+def get_sql_statistics():
+    """
+    Get SQL statistics of the current request or ``None`` outside of an
+    instrumented request.
+    """
+    request_context = flask._request_ctx_stack.top  # pylint: disable=protected-access
+    if request_context is None:
+        return None
+    return getattr(request_context, 'sql_statistics', None)
+
+
+def get_request_origin():
+    """
+    Get a human-readable name of the resource method handling the current
+    request, e.g. ``app.modules.users.resources.UserByID.get``.
+    """
+    view_function = flask.current_app.view_functions.get(flask.request.endpoint)
+    view_class = getattr(view_function, 'view_class', None)
+    if view_class is None:
+        return flask.request.endpoint
+    return '%s.%s.%s' % (view_class.__module__, view_class.__name__, flask.request.method.lower())
+
+
+def add_server_timing(response, metric):
+    """
+    Append a metric to ``Server-Timing`` response header.
+    """
+    if 'Server-Timing' in response.headers:
+        response.headers['Server-Timing'] = '%s, %s' % (response.headers['Server-Timing'], metric)
+    else:
+        response.headers['Server-Timing'] = metric
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # pylint: disable=unused-argument,too-many-arguments
+    # NOTE: The start time is kept on the execution context of the statement
+    # (not on the connection), so the failed statements, which don't trigger
+    # `after_cursor_execute`, leave nothing behind.
+    if context is not None:
+        context._query_start_time = time.time()  # pylint: disable=protected-access
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # pylint: disable=unused-argument,too-many-arguments
+    query_start_time = getattr(context, '_query_start_time', None)
+    if query_start_time is None:
+        return
+    sql_statistics = get_sql_statistics()
+    if sql_statistics is not None:
+        sql_statistics.add(statement, time.time() - query_start_time)
+
+
+class Instrumentation(object):
+    """
+    This is a helper extension, which collects per-request SQL statistics
+    (queries count, DB time and repeated statements), reports them in
+    ``Server-Timing`` response header and log records, and warns about likely
+    N+1 query patterns.
+
+    It is enabled with ``SQL_INSTRUMENTATION`` config variable. Statements
+    executed more than ``SQL_N_PLUS_ONE_THRESHOLD`` times in a single request
+    are reported as N+1 suspects. The time spent on the database connections
+    checkouts (see :class:`PoolStatistics`) is reported as ``db-pool`` metric.
+
+    With ``REQUEST_PHASE_TIMING`` config variable, the time spent in every
+    phase of the resources decorators pipeline (auth, permission, resolve,
+    parse, handler, dump) is aggregated per endpoint into histograms.
+
+    The collected metrics are served as JSON at ``METRICS_URL`` (if it is
+    configured) for the clients from ``METRICS_ALLOWED_REMOTE_ADDRS`` only.
+    Behind a local reverse proxy every client has the proxy address, so the
+    endpoint must not be enabled there. Other extensions can contribute their
+    metrics with :meth:`register_metrics_provider`.
+    """
+
+    def __init__(self, app=None):
+        self.phases_histograms = None
+        self._metrics_providers = {}
+        if app:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """
+        Common Flask interface to initialize the instrumentation according to
+        the application configuration.
+        """
+        if app.config['SQL_INSTRUMENTATION']:
+            if not event.contains(engine.Engine, 'before_cursor_execute', _before_cursor_execute):
+                event.listen(engine.Engine, 'before_cursor_execute', _before_cursor_execute)
+                event.listen(engine.Engine, 'after_cursor_execute', _after_cursor_execute)
+
+            app.before_request(self.start_request_statistics)
+            app.after_request(self.report_request_statistics)
+
+        if app.config['REQUEST_PHASE_TIMING']:
+            self.phases_histograms = PhasesHistograms(app.config['REQUEST_PHASE_TIMING_SAMPLES'])
+            self.register_metrics_provider('request_phases', self.phases_histograms.get_metrics)
+            app.before_request(timing.start_phase_timer)
+            app.after_request(self.report_request_phases)
+
+        if app.config['METRICS_URL']:
+            app.add_url_rule(
+                app.config['METRICS_URL'],
+                endpoint='instrumentation_metrics',
+                view_func=self.metrics_view
+            )
+
+    def register_metrics_provider(self, name, provider):
+        """
+        Register a callable returning JSON-serializable metrics, which are
+        served under ``name`` key at the metrics endpoint.
+        """
+        self._metrics_providers[name] = provider
+
+    def get_metrics(self):
+        # pylint: disable=missing-docstring
+        return {name: provider() for name, provider in self._metrics_providers.items()}
+
+    def metrics_view(self):
+        # pylint: disable=missing-docstring
+        allowed_remote_addrs = flask.current_app.config['METRICS_ALLOWED_REMOTE_ADDRS']
+        if flask.request.remote_addr not in allowed_remote_addrs:
+            flask.abort(HTTPStatus.FORBIDDEN)
+        return flask.jsonify(self.get_metrics())
+
+    def report_request_phases(self, response):
+        # pylint: disable=missing-docstring
+        phase_timer = timing.get_phase_timer()
+        if phase_timer is not None and phase_timer.phases and flask.request.endpoint:
+            self.phases_histograms.observe(get_request_origin(), phase_timer.phases)
+        return response
+
+    @staticmethod
+    def start_request_statistics():
+        # pylint: disable=missing-docstring,protected-access
+        flask._request_ctx_stack.top.sql_statistics = SQLStatistics()
+
+    @staticmethod
+    def report_request_statistics(response):
+        # pylint: disable=missing-docstring
+        sql_statistics = get_sql_statistics()
+        if sql_statistics is None:
+            return response
+
+        add_server_timing(
+            response,
+            'db;dur=%.3f;desc="%d queries"' % (
+                sql_statistics.duration * 1000,
+                sql_statistics.queries_count
+            )
+        )
+        if sql_statistics.pool_checkouts_count:
+            add_server_timing(
+                response,
+                'db-pool;dur=%.3f;desc="%d checkouts"' % (
+                    sql_statistics.pool_checkout_duration * 1000,
+                    sql_statistics.pool_checkouts_count
+                )
+            )
+
+        origin = get_request_origin()
+        log.debug(
+            "%s executed %d SQL queries in %.3f ms",
+            origin,
+            sql_statistics.queries_count,
+            sql_statistics.duration * 1000,
+            extra={
+                'origin': origin,
+                'sql_queries_count': sql_statistics.queries_count,
+                'sql_duration_ms': sql_statistics.duration * 1000,
+            }
+        )
+
+        repeated_statements = sql_statistics.get_repeated_statements(
+            flask.current_app.config['SQL_N_PLUS_ONE_THRESHOLD']
+        )
+        for statement, count in repeated_statements:
+            log.warning(
+                "Likely N+1 queries pattern in %s: the statement was executed %d times: %s",
+                origin,
+                count,
+                statement,
+                extra={
+                    'origin': origin,
+                    'sql_statement': statement,
+                    'sql_statement_count': count,
+                }
+            )
+        return response
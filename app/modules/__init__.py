@@ -7,11 +7,69 @@ Modules enable logical resource separation.
 
 You may control enabled modules by modifying ``ENABLED_MODULES`` config
 variable.
+
+With ``MODULES_LAZY_LOADING`` config variable, the applications which are
+served by WSGI servers only (see ``app.create_wsgi_app``) don't load the
+modules (their models, schemas, resources and API namespaces) on the
+application creation, but right before the first request is handled, so the
+workers start faster. The rest of the applications (e.g. the ones of Invoke
+tasks, which use ``url_for`` and the API specs) load the modules eagerly.
 """
+import threading
 
 
-def init_app(app, **kwargs):
+def load_modules(app, **kwargs):
+    """
+    Import and initialize all the enabled modules.
+    """
     from importlib import import_module
 
     for module_name in app.config['ENABLED_MODULES']:
         import_module('.%s' % module_name, package=__name__).init_app(app, **kwargs)
+
+
+class LazyModulesLoader(object):
+    """
+    WSGI middleware, which loads the modules once before the first request
+    gets to the application.
+    """
+
+    def __init__(self, app, wsgi_app, **kwargs):
+        self.app = app
+        self.wsgi_app = wsgi_app
+        self.kwargs = kwargs
+        self.loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        # pylint: disable=missing-docstring
+        if self.loaded:
+            return
+        with self._lock:
+            if not self.loaded:
+                load_modules(self.app, **self.kwargs)
+                self.loaded = True
+
+    def __call__(self, environ, start_response):
+        if not self.loaded:
+            self.load()
+        return self.wsgi_app(environ, start_response)
+
+
+def ensure_loaded(app):
+    """
+    Load the modules if their loading was deferred (e.g. to warm up the
+    application before forking workers).
+    """
+    loader = app.extensions.get('lazy_modules_loader')
+    if loader is not None:
+        loader.load()
+
+
+def init_app(app, lazy=False, **kwargs):
+    if lazy:
+        loader = LazyModulesLoader(app, app.wsgi_app, **kwargs)
+        app.extensions['lazy_modules_loader'] = loader
+        app.wsgi_app = loader
+        return
+    load_modules(app, **kwargs)
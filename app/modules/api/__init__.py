@@ -11,6 +11,20 @@ from app.extensions import api
 
 def init_app(app, **kwargs):
     # pylint: disable=unused-argument
+    # Touch underlying modules
+    from . import resources
+
+    api.api_v1.add_namespace(resources.api)
+
     api_v1_blueprint = Blueprint('api', __name__, url_prefix='/api/v1')
     api.api_v1.init_app(api_v1_blueprint)
     app.register_blueprint(api_v1_blueprint)
+
+    # All the namespaces are registered at this point, so the specs can be
+    # prepared before the first request hits them.
+    if app.config['SWAGGER_SPECS_PATH']:
+        with open(app.config['SWAGGER_SPECS_PATH']) as specs_file:
+            api.api_v1.load_specs(specs_file)
+    if app.config['SWAGGER_SPECS_PRECOMPUTE'] or app.config['SWAGGER_SPECS_PATH']:
+        with app.test_request_context():
+            api.api_v1.get_encoded_specs()
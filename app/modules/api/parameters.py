@@ -0,0 +1,70 @@
+# encoding: utf-8
+# pylint: disable=wrong-import-order
+"""
+Input arguments (Parameters) for API helper resources
+-----------------------------------------------------
+"""
+
+from flask import current_app, request
+from flask_marshmallow import base_fields
+from flask_restplus_patched import Parameters
+from marshmallow import validate, validates, validates_schema, ValidationError
+
+
+class BatchRequestParameters(Parameters):
+    """
+    A list of sub-requests to be dispatched within a single HTTP round-trip.
+    """
+
+    method = base_fields.String(
+        description="HTTP method, default is GET.",
+        missing='GET',
+        validate=validate.OneOf(('GET', 'POST', 'PUT', 'PATCH', 'DELETE'))
+    )
+    path = base_fields.String(
+        description="Example: /api/v1/users/me",
+        required=True
+    )
+    query = base_fields.Dict(
+        description="Query string arguments.",
+        required=False
+    )
+    headers = base_fields.Dict(
+        description=(
+            "Extra headers. Authorization header of the batch request is used unless "
+            "overridden here."
+        ),
+        required=False
+    )
+    form = base_fields.Dict(
+        description="Form data payload.",
+        required=False
+    )
+    body = base_fields.Raw(
+        description="JSON payload.",
+        required=False
+    )
+
+    def __init__(self, **kwargs):
+        kwargs['many'] = True
+        super(BatchRequestParameters, self).__init__(**kwargs)
+
+    @validates('path')
+    def validate_path(self, data):
+        # pylint: disable=no-self-use
+        if not data.startswith('/'):
+            raise ValidationError("Path must begin with /")
+        if data.split('?', 1)[0].rstrip('/') == request.path.rstrip('/'):
+            raise ValidationError("Nested batch requests are not supported.")
+
+    @validates_schema(pass_many=True)
+    def validate_batch_size(self, data, many):
+        # pylint: disable=no-self-use,unused-argument
+        max_requests = current_app.config['BATCH_API_MAX_REQUESTS']
+        if len(data) > max_requests:
+            raise ValidationError(
+                "It is only allowed to batch up to %d requests." % max_requests
+            )
+        for sub_request in data:
+            if 'form' in sub_request and 'body' in sub_request:
+                raise ValidationError("`form` and `body` cannot be used together.")
@@ -0,0 +1,136 @@
+# encoding: utf-8
+# pylint: disable=too-few-public-methods
+"""
+RESTful API helper resources
+----------------------------
+"""
+
+import json
+import logging
+from multiprocessing.pool import ThreadPool
+
+import flask
+from flask_restplus_patched import Resource
+from werkzeug.test import EnvironBuilder
+
+from app.extensions import db, oauth2
+from app.extensions.api import Namespace
+
+from . import parameters, schemas
+
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+api = Namespace('batch', description="Batch requests")  # pylint: disable=invalid-name
+
+
+def _build_sub_request_environ(sub_request):
+    """
+    Build a WSGI environment of a sub-request inheriting the host and the
+    authorization of the current (batch) request.
+    """
+    headers = {}
+    if 'Authorization' in flask.request.headers:
+        headers['Authorization'] = flask.request.headers['Authorization']
+    headers.update(sub_request.get('headers') or {})
+
+    builder_kwargs = {}
+    if 'body' in sub_request:
+        builder_kwargs['data'] = json.dumps(sub_request['body'])
+        builder_kwargs['content_type'] = 'application/json'
+    elif 'form' in sub_request:
+        builder_kwargs['data'] = sub_request['form']
+
+    builder = EnvironBuilder(
+        path=sub_request['path'],
+        base_url=flask.request.host_url,
+        method=sub_request['method'],
+        query_string=sub_request.get('query'),
+        headers=headers,
+        environ_base={'REMOTE_ADDR': flask.request.remote_addr},
+        **builder_kwargs
+    )
+    try:
+        return builder.get_environ()
+    finally:
+        builder.close()
+
+
+def _dispatch_sub_request(app, environ):
+    """
+    Dispatch a sub-request through the application URL map and handlers in
+    the current application context.
+    """
+    with app.request_context(environ):
+        try:
+            response = app.full_dispatch_request()
+        except Exception as exception:  # pylint: disable=broad-except
+            log.exception("Batched sub-request has failed.")
+            response = app.handle_exception(exception)
+
+    data = response.get_data(as_text=True)
+    if not data:
+        body = None
+    elif response.mimetype == 'application/json':
+        # NOTE: Falsy JSON documents (e.g. an empty list) are kept as is
+        body = json.loads(data)
+    else:
+        body = data
+    return {
+        'status': response.status_code,
+        # The repeated headers (e.g. `Set-Cookie`) are kept as separate pairs
+        'headers': [[name, value] for name, value in response.headers.to_wsgi_list()],
+        'body': body,
+    }
+
+
+@api.route('')
+class Batch(Resource):
+    """
+    Multiplexing of API calls.
+    """
+
+    @api.parameters(parameters.BatchRequestParameters())
+    @api.response(schemas.BatchResponseSchema(many=True))
+    def post(self, args):
+        """
+        Dispatch a list of requests in a single HTTP round-trip.
+
+        Each sub-request is dispatched as an individual request (permissions
+        and OAuth2 scopes are checked separately), but the access token is
+        verified and the current user is loaded only once. The results are
+        returned in the order of the sub-requests.
+        """
+        app = flask.current_app._get_current_object()  # pylint: disable=protected-access
+        environs = [_build_sub_request_environ(sub_request) for sub_request in args]
+
+        verified_tokens = {}
+        if 'Authorization' in flask.request.headers:
+            is_valid, oauth = oauth2.verify_request(scopes=[])
+            if is_valid:
+                verified_tokens[oauth.access_token.access_token] = oauth.access_token
+
+        workers = min(app.config['BATCH_API_WORKERS'], len(environs))
+        if workers <= 1:
+            flask.g.oauth2_verified_tokens = verified_tokens
+            try:
+                return [_dispatch_sub_request(app, environ) for environ in environs]
+            finally:
+                flask.g.oauth2_verified_tokens = None
+
+        def threaded_dispatch(environ):
+            # pylint: disable=missing-docstring
+            with app.app_context():
+                # Each thread has its own DB session, so the already loaded
+                # token (and its user) are copied over without extra queries.
+                flask.g.oauth2_verified_tokens = {
+                    access_token: db.session.merge(token, load=False)
+                    for access_token, token in verified_tokens.items()
+                }
+                return _dispatch_sub_request(app, environ)
+
+        pool = ThreadPool(workers)
+        try:
+            return pool.map(threaded_dispatch, environs)
+        finally:
+            pool.close()
+            pool.join()
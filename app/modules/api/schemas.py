@@ -0,0 +1,23 @@
+# encoding: utf-8
+# pylint: disable=too-few-public-methods
+"""
+Serialization schemas for API helper resources
+----------------------------------------------
+"""
+
+from flask_marshmallow import base_fields
+from flask_restplus_patched import Schema
+
+
+class BatchResponseSchema(Schema):
+    """
+    A result of a single batched sub-request.
+    """
+
+    status = base_fields.Integer(required=True)
+    headers = base_fields.List(
+        base_fields.List(base_fields.String()),
+        required=True,
+        description="a list of `[name, value]` pairs (repeated headers are kept)"
+    )
+    body = base_fields.Raw()
@@ -11,6 +11,7 @@ More details are available here:
 """
 import enum
 
+from sqlalchemy import bindparam
 from sqlalchemy_utils.types import ScalarListType
 
 from app.extensions import db
@@ -49,7 +50,7 @@ class OAuth2Client(db.Model):
     def find(cls, client_id):
         if not client_id:
             return None
-        return cls.query.get(client_id)
+        return db.hot_get(cls, client_id)
 
     def validate_scopes(self, scopes):
         # The only reason for this override is that Swagger UI has a bug which leads to that
@@ -127,11 +128,25 @@ class OAuth2Token(db.Model):
     @classmethod
     def find(cls, access_token=None, refresh_token=None):
         if access_token:
-            return cls.query.filter_by(access_token=access_token).first()
+            return _find_token_by_access_token(access_token=access_token).first()
         if refresh_token:
-            return cls.query.filter_by(refresh_token=refresh_token).first()
+            return _find_token_by_refresh_token(refresh_token=refresh_token).first()
         return None
 
     def delete(self):
         with db.session.begin():
             db.session.delete(self)
+
+
+@db.hot_query('OAuth2Token.find_by_access_token')
+def _find_token_by_access_token(session):
+    return session.query(OAuth2Token).filter(
+        OAuth2Token.access_token == bindparam('access_token')
+    )
+
+
+@db.hot_query('OAuth2Token.find_by_refresh_token')
+def _find_token_by_refresh_token(session):
+    return session.query(OAuth2Token).filter(
+        OAuth2Token.refresh_token == bindparam('refresh_token')
+    )
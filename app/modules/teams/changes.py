@@ -0,0 +1,102 @@
+# encoding: utf-8
+"""
+Teams change feed
+-----------------
+
+Every committed change of the teams memberships is appended to the ordered
+log (``TeamChange``), so the clients can follow the changes since the
+sequence number they have seen last instead of polling the members lists.
+
+The clients waiting for new changes (long polling) are parked on an
+in-process condition, which is notified after the commits of the sessions
+which have appended changes, so an idle feed costs no queries. The changes
+committed by the other processes (or by raw SQL) are noticed by re-checking
+the log every ``TEAMS_CHANGES_POLL_INTERVAL`` seconds.
+"""
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event
+
+from app.extensions import db
+
+from .models import TeamChange
+
+
+class ChangesBroadcast(object):
+    """
+    A condition which wakes up the waiting threads on new changes.
+
+    The version counter is incremented on every notification, so the
+    notifications sent between a check of the log and the following wait are
+    not missed.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self.version = 0
+
+    def notify(self):
+        """
+        Wake up all the waiting threads.
+        """
+        with self._condition:
+            self.version += 1
+            self._condition.notify_all()
+
+    def wait(self, version, timeout):
+        """
+        Wait for a notification unless there has been one since ``version``.
+        """
+        with self._condition:
+            if self.version == version:
+                self._condition.wait(timeout)
+
+
+broadcast = ChangesBroadcast()  # pylint: disable=invalid-name
+
+
+@event.listens_for(db.session, 'after_commit')
+def _notify_committed_changes(session):
+    if session.info.pop(TeamChange.SESSION_INFO_KEY, False):
+        broadcast.notify()
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_rolled_back_changes(session):
+    session.info.pop(TeamChange.SESSION_INFO_KEY, None)
+
+
+def get_changes(since, limit):
+    """
+    Get the changes which follow the sequence number ``since``.
+    """
+    # NOTE: The explicit (short) transaction reads from the primary database
+    # and doesn't keep the connection (and the snapshot of a request
+    # transaction) while the caller waits. The rows are not ORM objects, so
+    # the commit doesn't expire them.
+    with db.session.begin():
+        return db.session.execute(
+            TeamChange.__table__.select().where(
+                TeamChange.id > since
+            ).order_by(
+                TeamChange.id
+            ).limit(limit)
+        ).fetchall()
+
+
+def wait_for_changes(since, limit, wait):
+    """
+    Get the changes which follow the sequence number ``since`` waiting up to
+    ``wait`` seconds for new changes if there are none yet.
+    """
+    poll_interval = current_app.config['TEAMS_CHANGES_POLL_INTERVAL']
+    deadline = time.time() + wait
+    while True:
+        version = broadcast.version
+        changes = get_changes(since, limit)
+        timeout = deadline - time.time()
+        if changes or timeout <= 0:
+            return changes
+        broadcast.wait(version, min(timeout, poll_interval))
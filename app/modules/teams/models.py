@@ -4,32 +4,45 @@ Team database models
 --------------------
 """
 
+from datetime import datetime
+import enum
+
+from sqlalchemy import bindparam, event, exists, func, literal, orm, select
 from sqlalchemy_utils import Timestamp
 
 from app.extensions import db
+from app.modules.users.models import User
 
 
-class TeamMember(db.Model):
+class TeamMember(db.Model, Timestamp):
     """
     Team-member database model.
     """
     __tablename__ = 'team_member'
 
-    team_id = db.Column(db.Integer, db.ForeignKey('team.id'), primary_key=True)
+    # The memberships of a deleted team or user are deleted by the database
+    # (ON DELETE CASCADE) instead of being loaded and deleted one by one.
+    team_id = db.Column(db.Integer, db.ForeignKey('team.id', ondelete='CASCADE'), primary_key=True)
     team = db.relationship(
         'Team',
-        backref=db.backref('members', cascade='delete, delete-orphan')
+        backref=db.backref('members', cascade='delete, delete-orphan', passive_deletes=True)
     )
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
     user = db.relationship(
         'User',
-        backref=db.backref('teams_membership', cascade='delete, delete-orphan')
+        backref=db.backref(
+            'teams_membership',
+            cascade='delete, delete-orphan',
+            passive_deletes=True
+        )
     )
 
     is_leader = db.Column(db.Boolean(name='is_leader'), default=False, nullable=False)
 
     __table_args__ = (
         db.UniqueConstraint(team_id, user_id),
+        # Serves the teams of a user (the primary key starts with `team_id`)
+        db.Index('ix_team_member_user_id_team_id', user_id, team_id),
     )
 
     def __repr__(self):
@@ -50,6 +63,28 @@ class TeamMember(db.Model):
     def check_supervisor(self, user):
         return self.team.check_owner(user)
 
+    @classmethod
+    def find(cls, team_id, user_id):
+        """
+        Find a membership of a user in a team.
+        """
+        return _find_team_member(team_id=team_id, user_id=user_id).first()
+
+    @classmethod
+    def get_user_memberships(cls, user_id, limit, after_team_id=None):
+        """
+        Get memberships of a user along with their teams (in a single query)
+        ordered by team id.
+        """
+        query = cls.query.join(cls.team).options(
+            db.contains_eager(cls.team)
+        ).filter(
+            cls.user_id == user_id
+        )
+        if after_team_id is not None:
+            query = query.filter(cls.team_id > after_team_id)
+        return query.order_by(cls.team_id).limit(limit).all()
+
 
 class Team(db.Model, Timestamp):
     """
@@ -58,6 +93,11 @@ class Team(db.Model, Timestamp):
 
     id = db.Column(db.Integer, primary_key=True)  # pylint: disable=invalid-name
     title = db.Column(db.String(length=50), nullable=False)
+    # Denormalized number of the team members, which is maintained in the
+    # same transaction as the memberships (see the events below and
+    # `update_member_count` for the bulk paths) and can be repaired with
+    # `invoke app.teams.reconcile-member-counts`.
+    member_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
 
     def __repr__(self):
         return (
@@ -80,8 +120,318 @@ class Team(db.Model, Timestamp):
         """
         This is a helper method for OwnerRolePermission integration.
         """
-        if db.session.query(
-                TeamMember.query.filter_by(team=self, is_leader=True, user=user).exists()
-        ).scalar():
+        if _is_team_leader(team_id=self.id, user_id=getattr(user, 'id', None)).scalar():
             return True
         return False
+
+    @classmethod
+    def update_member_count(cls, team_id, delta, connection=None):
+        """
+        Atomically add ``delta`` to the members count of a team. This has to
+        be called by the code which inserts or deletes memberships bypassing
+        the ORM (e.g. bulk statements).
+        """
+        if not delta:
+            return
+        if connection is None:
+            connection = db.session
+        connection.execute(
+            cls.__table__.update().where(
+                cls.id == team_id
+            ).values(
+                member_count=cls.member_count + delta
+            )
+        )
+
+
+class TeamTombstone(db.Model):
+    """
+    A record of a deleted team (``user_id`` is NULL) or a deleted team
+    membership, so the clients can sync the deletions incrementally.
+    """
+    __tablename__ = 'team_tombstone'
+
+    id = db.Column(db.Integer, primary_key=True)  # pylint: disable=invalid-name
+    # NOTE: There are no foreign keys as the team and the user may be gone
+    team_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    deleted = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return (
+            "<{class_name}("
+            "team_id={self.team_id}, "
+            "user_id={self.user_id}, "
+            "deleted=\"{self.deleted}\""
+            ")>".format(
+                class_name=self.__class__.__name__,
+                self=self
+            )
+        )
+
+    @classmethod
+    def record(cls, team_id, user_ids=(None, ), connection=None):
+        """
+        Record the deletion of a team (by default) or of its memberships.
+        """
+        if connection is None:
+            connection = db.session
+        deleted = datetime.utcnow()
+        connection.execute(
+            cls.__table__.insert(),
+            [
+                {'team_id': team_id, 'user_id': user_id, 'deleted': deleted}
+                for user_id in user_ids
+            ]
+        )
+
+
+class TeamChange(db.Model):
+    """
+    An entry of the ordered log of the teams memberships changes (the change
+    feed), which ``id`` is the sequence number of the change.
+    """
+    __tablename__ = 'team_change'
+
+    # The key of ``Session.info`` flag of the sessions which have appended
+    # changes in their current transaction (see ``changes.py``)
+    SESSION_INFO_KEY = 'has_team_changes'
+    # The key of the PostgreSQL advisory lock of the log writers
+    ADVISORY_LOCK_KEY = 0x7465616d
+
+    class Actions(str, enum.Enum):
+        # pylint: disable=missing-docstring,invalid-name
+        member_added = 'member_added'
+        member_updated = 'member_updated'
+        member_removed = 'member_removed'
+        team_deleted = 'team_deleted'
+
+    # NOTE: AUTOINCREMENT prevents SQLite from reusing the sequence numbers
+    # of the purged changes
+    id = db.Column(db.Integer, primary_key=True)  # pylint: disable=invalid-name
+    # NOTE: There are no foreign keys as the team and the user may be gone
+    team_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=True)
+    action = db.Column(db.Enum(Actions, name='teamchangeactions'), nullable=False)
+    created = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        {'sqlite_autoincrement': True},
+    )
+
+    def __repr__(self):
+        return (
+            "<{class_name}("
+            "id={self.id}, "
+            "team_id={self.team_id}, "
+            "user_id={self.user_id}, "
+            "action=\"{self.action}\""
+            ")>".format(
+                class_name=self.__class__.__name__,
+                self=self
+            )
+        )
+
+    @classmethod
+    def record(cls, session, team_id, action, user_ids=(None, )):
+        """
+        Append changes of a team (or of its members) to the log in the
+        current transaction of the session.
+        """
+        created = datetime.utcnow()
+        cls._append(
+            session,
+            cls.__table__.insert(),
+            [
+                {'team_id': team_id, 'user_id': user_id, 'action': action, 'created': created}
+                for user_id in user_ids
+            ]
+        )
+
+    @classmethod
+    def record_user_memberships_removal(cls, session, user_id):
+        """
+        Append the removals of all the memberships of a user to the log.
+        """
+        cls._append(
+            session,
+            cls.__table__.insert().from_select(
+                [cls.team_id, cls.user_id, cls.action, cls.created],
+                select([
+                    TeamMember.team_id,
+                    TeamMember.user_id,
+                    literal(cls.Actions.member_removed, type_=cls.action.type),
+                    literal(datetime.utcnow()),
+                ]).where(TeamMember.user_id == user_id)
+            )
+        )
+
+    @classmethod
+    def _append(cls, session, statement, *multiparams):
+        connection = session.connection(mapper=cls.__mapper__)
+        if connection.dialect.name == 'postgresql':
+            # Concurrent transactions could commit their changes out of the
+            # sequence order, so the readers would skip the late ones. The
+            # transaction-level advisory lock is taken just before the
+            # sequence numbers are drawn and is released on commit, so only
+            # the appends to the log are serialized (neither the rest of the
+            # membership writes nor the readers and the purge wait for it).
+            connection.execute(select([func.pg_advisory_xact_lock(cls.ADVISORY_LOCK_KEY)]))
+        connection.execute(statement, *multiparams)
+        session.info[cls.SESSION_INFO_KEY] = True
+
+
+# Incremental sync (`updated_since`) lists the teams, the members of a team,
+# and the tombstones in these orders
+db.Index('ix_team_updated_id', Team.updated, Team.id)
+db.Index(
+    'ix_team_member_team_id_updated_user_id',
+    TeamMember.team_id,
+    TeamMember.updated,
+    TeamMember.user_id
+)
+db.Index(
+    'ix_team_tombstone_deleted_id',
+    TeamTombstone.deleted,
+    TeamTombstone.id,
+    sqlite_where=TeamTombstone.user_id.is_(None),
+    postgresql_where=TeamTombstone.user_id.is_(None)
+)
+db.Index(
+    'ix_team_tombstone_team_id_deleted_id',
+    TeamTombstone.team_id,
+    TeamTombstone.deleted,
+    TeamTombstone.id
+)
+
+
+def get_actual_member_count():
+    """
+    Get correlated subquery counting the memberships of a team.
+    """
+    return select([func.count()]).where(
+        TeamMember.team_id == Team.id
+    ).correlate(Team.__table__).as_scalar()
+
+
+@event.listens_for(TeamMember, 'after_insert')
+def _increment_team_member_count(mapper, connection, target):
+    # pylint: disable=unused-argument
+    Team.update_member_count(target.team_id, 1, connection=connection)
+
+
+@event.listens_for(TeamMember, 'after_delete')
+def _decrement_team_member_count(mapper, connection, target):
+    # pylint: disable=unused-argument
+    Team.update_member_count(target.team_id, -1, connection=connection)
+
+
+@event.listens_for(Team, 'after_delete')
+def _record_deleted_team(mapper, connection, target):
+    # pylint: disable=unused-argument
+    TeamTombstone.record(target.id, connection=connection)
+
+
+@event.listens_for(TeamMember, 'after_delete')
+def _record_deleted_team_member(mapper, connection, target):
+    # pylint: disable=unused-argument
+    TeamTombstone.record(target.team_id, user_ids=(target.user_id, ), connection=connection)
+
+
+@event.listens_for(User, 'before_delete')
+def _record_deleted_user_team_members(mapper, connection, target):
+    # pylint: disable=unused-argument
+    connection.execute(
+        TeamTombstone.__table__.insert().from_select(
+            [TeamTombstone.team_id, TeamTombstone.user_id, TeamTombstone.deleted],
+            select([
+                TeamMember.team_id, TeamMember.user_id, literal(datetime.utcnow())
+            ]).where(TeamMember.user_id == target.id)
+        )
+    )
+
+
+@event.listens_for(TeamMember, 'after_insert')
+def _record_added_team_member(mapper, connection, target):
+    # pylint: disable=unused-argument
+    TeamChange.record(
+        orm.object_session(target),
+        target.team_id,
+        TeamChange.Actions.member_added,
+        user_ids=(target.user_id, )
+    )
+
+
+@event.listens_for(TeamMember, 'after_update')
+def _record_updated_team_member(mapper, connection, target):
+    # pylint: disable=unused-argument
+    # NOTE: The flushes of the touched (but unchanged) memberships are not
+    # changes (`updated` is bumped on every flush of an object)
+    if not db.inspect(target).attrs.is_leader.history.has_changes():
+        return
+    TeamChange.record(
+        orm.object_session(target),
+        target.team_id,
+        TeamChange.Actions.member_updated,
+        user_ids=(target.user_id, )
+    )
+
+
+@event.listens_for(TeamMember, 'after_delete')
+def _record_removed_team_member(mapper, connection, target):
+    # pylint: disable=unused-argument
+    TeamChange.record(
+        orm.object_session(target),
+        target.team_id,
+        TeamChange.Actions.member_removed,
+        user_ids=(target.user_id, )
+    )
+
+
+@event.listens_for(Team, 'after_delete')
+def _record_team_deletion_change(mapper, connection, target):
+    # pylint: disable=unused-argument
+    TeamChange.record(orm.object_session(target), target.id, TeamChange.Actions.team_deleted)
+
+
+@event.listens_for(User, 'before_delete')
+def _record_removed_user_team_members(mapper, connection, target):
+    # pylint: disable=unused-argument
+    TeamChange.record_user_memberships_removal(orm.object_session(target), target.id)
+
+
+@event.listens_for(User, 'before_delete')
+def _decrement_deleted_user_teams_member_count(mapper, connection, target):
+    # pylint: disable=unused-argument
+    # The memberships of a deleted user are deleted by the database (ON
+    # DELETE CASCADE), so the ORM events are not triggered for them. NOTE:
+    # The memberships deleted by the ORM (if they were loaded) are already
+    # gone at this point.
+    connection.execute(
+        Team.__table__.update().where(
+            Team.id.in_(
+                select([TeamMember.team_id]).where(TeamMember.user_id == target.id)
+            )
+        ).values(
+            member_count=Team.member_count - 1
+        )
+    )
+
+
+@db.hot_query('TeamMember.find')
+def _find_team_member(session):
+    return session.query(TeamMember).filter(
+        TeamMember.team_id == bindparam('team_id'),
+        TeamMember.user_id == bindparam('user_id'),
+    )
+
+
+@db.hot_query('Team.check_owner')
+def _is_team_leader(session):
+    return session.query(
+        exists().where(
+            (TeamMember.team_id == bindparam('team_id'))
+            & (TeamMember.user_id == bindparam('user_id'))
+            & TeamMember.is_leader.is_(True)
+        )
+    )
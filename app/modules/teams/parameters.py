@@ -4,11 +4,77 @@ Input arguments (Parameters) for Team resources RESTful API
 -----------------------------------------------------------
 """
 
+from collections import OrderedDict
+import numbers
+
 from flask_marshmallow import base_fields
-from flask_restplus_patched import PostFormParameters, PatchJSONParameters
+from flask_restplus_patched import Parameters, PostFormParameters, PatchJSONParameters
+from marshmallow import validate, validates, post_load, ValidationError
+
+from app.extensions.api.parameters import (
+    KeysetPaginationParameters,
+    UpdatedSincePaginationParameters,
+)
 
 from . import schemas
-from .models import Team
+from .models import Team, TeamTombstone
+
+
+# Long polling parks a worker thread, so it is limited
+MAX_CHANGES_WAIT = 60
+
+
+class ListUserTeamsParameters(KeysetPaginationParameters):
+    """
+    User teams list parameters (keyset paginated by team id).
+    """
+
+    @validates('cursor')
+    def validate_team_cursor(self, data):
+        # pylint: disable=missing-docstring
+        sort_key = self.decode_cursor(data)
+        if (
+                len(sort_key) != 1
+                or not isinstance(sort_key[0], numbers.Integral)
+                or isinstance(sort_key[0], bool)
+            ):
+            raise ValidationError("Invalid cursor.")
+
+
+class ListTeamTombstonesParameters(UpdatedSincePaginationParameters):
+    """
+    Deleted teams (or team members) list parameters.
+    """
+
+    TIMESTAMP_FIELD = TeamTombstone.deleted.key
+
+
+class ListTeamChangesParameters(Parameters):
+    """
+    Teams change feed parameters.
+    """
+
+    since = base_fields.Integer(
+        description=(
+            "a sequence number of the last seen change (`X-Last-Sequence` header of the "
+            "previous response), default is 0 (all the changes)."
+        ),
+        missing=0,
+        validate=validate.Range(min=0)
+    )
+    wait = base_fields.Integer(
+        description=(
+            "a number of seconds to wait for new changes if there are none yet "
+            "(allowed range is 0-%d), default is 0." % MAX_CHANGES_WAIT
+        ),
+        missing=0,
+        validate=validate.Range(min=0, max=MAX_CHANGES_WAIT)
+    )
+    limit = base_fields.Integer(
+        description="limit a number of changes (allowed range is 1-1000), default is 100.",
+        missing=100,
+        validate=validate.Range(min=1, max=1000)
+    )
 
 
 class CreateTeamParameters(PostFormParameters, schemas.BaseTeamSchema):
@@ -33,3 +99,30 @@ class PatchTeamDetailsParameters(PatchJSONParameters):
 class AddTeamMemberParameters(PostFormParameters):
     user_id = base_fields.Integer(required=True)
     is_leader = base_fields.Boolean(required=False)
+
+
+class AddTeamMembersParameters(Parameters):
+    """
+    A list of new team members.
+    """
+    user_id = base_fields.Integer(required=True)
+    is_leader = base_fields.Boolean(required=False)
+
+    def __init__(self, **kwargs):
+        kwargs['many'] = True
+        super(AddTeamMembersParameters, self).__init__(**kwargs)
+
+
+class RemoveTeamMembersParameters(Parameters):
+    user_ids = base_fields.List(
+        base_fields.Integer,
+        required=True,
+        validate=validate.Length(min=1)
+    )
+
+    @post_load
+    def unique_user_ids(self, data):
+        # pylint: disable=missing-docstring
+        # Every user gets a single result (in the order of the first mention)
+        data['user_ids'] = list(OrderedDict.fromkeys(data['user_ids']))
+        return data
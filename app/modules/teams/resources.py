@@ -13,12 +13,14 @@ from flask_restplus._http import HTTPStatus
 
 from app.extensions import db
 from app.extensions.api import Namespace, abort
+from app.extensions.api.parameters import UpdatedSincePaginationParameters
 from app.modules.users import permissions
 from app.modules.users.models import User
+from app.modules.users.resources import api as users_api
 
 
-from . import parameters, schemas
-from .models import Team, TeamMember
+from . import changes, parameters, schemas
+from .models import Team, TeamChange, TeamMember, TeamTombstone
 
 
 log = logging.getLogger(__name__)  # pylint: disable=invalid-name
@@ -32,13 +34,14 @@ class Teams(Resource):
     Manipulations with teams.
     """
     @api.response(schemas.BaseTeamSchema(many=True))
-    @api.paginate()
+    @api.paginate(UpdatedSincePaginationParameters())
     def get(self, args):
         """
         List of teams.
 
         Returns a list of teams starting from ``offset`` limited by ``limit``
-        parameter.
+        parameter, or the teams changed since ``updated_since`` (or
+        ``cursor``) for incremental sync (see also ``/teams/tombstones``).
         """
         return Team.query
 
@@ -61,6 +64,49 @@ class Teams(Resource):
         return team
 
 
+@api.route('/tombstones')
+@api.login_required(oauth_scopes=['teams:read'])
+class TeamTombstones(Resource):
+    """
+    Deleted teams.
+    """
+
+    @api.response(schemas.TeamTombstoneSchema(many=True))
+    @api.paginate(parameters.ListTeamTombstonesParameters())
+    def get(self, args):
+        """
+        List of deleted teams.
+
+        Use ``updated_since`` (or ``cursor``) to get only the teams deleted
+        since the last sync.
+        """
+        return TeamTombstone.query.filter(TeamTombstone.user_id.is_(None))
+
+
+@api.route('/changes')
+@api.login_required(oauth_scopes=['teams:read'])
+class TeamChanges(Resource):
+    """
+    Teams memberships change feed.
+    """
+
+    @api.permission_required(permissions.AdminRolePermission())
+    @api.parameters(parameters.ListTeamChangesParameters())
+    @api.response(schemas.TeamChangeSchema(many=True))
+    def get(self, args):
+        """
+        List of the teams memberships changes in their commit order.
+
+        Returns the changes which follow the sequence number ``since``. If
+        there are none yet, the request waits up to ``wait`` seconds for new
+        changes (long polling). Pass ``X-Last-Sequence`` response header
+        value as ``since`` parameter to get the next changes.
+        """
+        team_changes = changes.wait_for_changes(args['since'], args['limit'], args['wait'])
+        last_sequence = team_changes[-1].id if team_changes else args['since']
+        return team_changes, HTTPStatus.OK, {'X-Last-Sequence': last_sequence}
+
+
 @api.route('/<int:team_id>')
 @api.login_required(oauth_scopes=['teams:read'])
 @api.response(
@@ -102,7 +148,6 @@ class TeamByID(Resource):
                 default_error_message="Failed to update team details."
             ):
             parameters.PatchTeamDetailsParameters.perform_patch(args, obj=team)
-            db.session.merge(team)
         return team
 
     @api.login_required(oauth_scopes=['teams:write'])
@@ -143,10 +188,14 @@ class TeamMembers(Resource):
     )
     @api.permission_required(permissions.OwnerRolePermission(partial=True))
     @api.response(schemas.BaseTeamMemberSchema(many=True))
-    @api.paginate()
+    @api.paginate(UpdatedSincePaginationParameters())
     def get(self, args, team):
         """
         Get team members by team ID.
+
+        The members changed since ``updated_since`` (or ``cursor``) are
+        returned for incremental sync (see also
+        ``/teams/<team_id>/members/tombstones``).
         """
         return TeamMember.query.filter_by(team=team)
 
@@ -168,7 +217,7 @@ class TeamMembers(Resource):
                 default_error_message="Failed to update team details."
             ):
             user_id = args.pop('user_id')
-            user = User.query.get(user_id)
+            user = db.hot_get(User, user_id)
             if user is None:
                 abort(
                     code=HTTPStatus.NOT_FOUND,
@@ -181,6 +230,38 @@ class TeamMembers(Resource):
         return team_member
 
 
+@api.route('/<int:team_id>/members/tombstones')
+@api.login_required(oauth_scopes=['teams:read'])
+@api.response(
+    code=HTTPStatus.NOT_FOUND,
+    description="Team not found.",
+)
+@api.resolve_object_by_model(Team, 'team')
+class TeamMemberTombstones(Resource):
+    """
+    Deleted members of a specific team.
+    """
+
+    @api.permission_required(
+        permissions.OwnerRolePermission,
+        kwargs_on_request=lambda kwargs: {'obj': kwargs['team']}
+    )
+    @api.permission_required(permissions.OwnerRolePermission(partial=True))
+    @api.response(schemas.TeamTombstoneSchema(many=True))
+    @api.paginate(parameters.ListTeamTombstonesParameters())
+    def get(self, args, team):
+        """
+        List of deleted members of a team.
+
+        Use ``updated_since`` (or ``cursor``) to get only the members deleted
+        since the last sync.
+        """
+        return TeamTombstone.query.filter(
+            TeamTombstone.team_id == team.id,
+            TeamTombstone.user_id.isnot(None)
+        )
+
+
 @api.route('/<int:team_id>/members/<int:user_id>')
 @api.login_required(oauth_scopes=['teams:read'])
 @api.response(
@@ -208,7 +289,212 @@ class TeamMemberByID(Resource):
                 db.session,
                 default_error_message="Failed to update team details."
             ):
-            team_member = TeamMember.query.filter_by(team=team, user_id=user_id).first_or_404()
+            team_member = TeamMember.find(team.id, user_id)
+            if team_member is None:
+                abort(code=HTTPStatus.NOT_FOUND, message="Team member not found.")
             db.session.delete(team_member)
 
         return None
+
+
+@api.route('/<int:team_id>/members/bulk')
+@api.login_required(oauth_scopes=['teams:write'])
+@api.response(
+    code=HTTPStatus.NOT_FOUND,
+    description="Team not found.",
+)
+@api.resolve_object_by_model(Team, 'team')
+class TeamMembersBulk(Resource):
+    """
+    Bulk manipulations with members of a specific team.
+    """
+
+    @api.permission_required(
+        permissions.OwnerRolePermission,
+        kwargs_on_request=lambda kwargs: {'obj': kwargs['team']}
+    )
+    @api.permission_required(permissions.WriteAccessPermission())
+    @api.parameters(parameters.AddTeamMembersParameters())
+    @api.response(schemas.TeamMemberBulkResultSchema(many=True))
+    @api.response(code=HTTPStatus.CONFLICT)
+    def post(self, args, team):
+        """
+        Add a list of new members to a team.
+
+        All new members are added in a single transaction, while the items
+        which cannot be added (unknown users or existing members) are reported
+        individually in the result list.
+        """
+        user_ids = set(new_member['user_id'] for new_member in args)
+        results = []
+        with api.commit_or_abort(
+                db.session,
+                default_error_message="Failed to update team details."
+            ):
+            existing_user_ids = set(
+                user_id for user_id, in User.query.with_entities(User.id).filter(
+                    User.id.in_(user_ids)
+                )
+            )
+            member_user_ids = set(
+                user_id for user_id, in TeamMember.query.with_entities(TeamMember.user_id).filter(
+                    TeamMember.team_id == team.id,
+                    TeamMember.user_id.in_(user_ids)
+                )
+            )
+
+            new_team_members = []
+            for new_member in args:
+                user_id = new_member['user_id']
+                if user_id not in existing_user_ids:
+                    results.append({
+                        'user_id': user_id,
+                        'status': HTTPStatus.NOT_FOUND.value,
+                        'message': "User with id %d does not exist" % user_id,
+                    })
+                elif user_id in member_user_ids:
+                    results.append({
+                        'user_id': user_id,
+                        'status': HTTPStatus.CONFLICT.value,
+                        'message': "User with id %d is already a team member" % user_id,
+                    })
+                else:
+                    member_user_ids.add(user_id)
+                    new_team_members.append({
+                        'team_id': team.id,
+                        'user_id': user_id,
+                        'is_leader': new_member.get('is_leader', False),
+                    })
+                    results.append({'user_id': user_id, 'status': HTTPStatus.OK.value})
+
+            if new_team_members:
+                db.session.execute(TeamMember.__table__.insert(), new_team_members)
+                Team.update_member_count(team.id, len(new_team_members))
+                TeamChange.record(
+                    db.session,
+                    team.id,
+                    TeamChange.Actions.member_added,
+                    user_ids=[team_member['user_id'] for team_member in new_team_members]
+                )
+
+        return results
+
+    @api.permission_required(
+        permissions.OwnerRolePermission,
+        kwargs_on_request=lambda kwargs: {'obj': kwargs['team']}
+    )
+    @api.permission_required(permissions.WriteAccessPermission())
+    @api.parameters(parameters.RemoveTeamMembersParameters(), locations=('query', ))
+    @api.response(schemas.TeamMemberBulkResultSchema(many=True))
+    @api.response(code=HTTPStatus.CONFLICT)
+    def delete(self, args, team):
+        """
+        Remove a list of members from a team.
+
+        All the members are removed in a single transaction, while the users
+        who are not members of the team are reported individually in the
+        result list.
+        """
+        user_ids = args['user_ids']
+        with api.commit_or_abort(
+                db.session,
+                default_error_message="Failed to update team details."
+            ):
+            member_user_ids = set(
+                user_id for user_id, in TeamMember.query.with_entities(TeamMember.user_id).filter(
+                    TeamMember.team_id == team.id,
+                    TeamMember.user_id.in_(user_ids)
+                )
+            )
+            if member_user_ids:
+                deleted_count = db.session.execute(
+                    TeamMember.__table__.delete().where(
+                        (TeamMember.team_id == team.id)
+                        & TeamMember.user_id.in_(member_user_ids)
+                    )
+                ).rowcount
+                Team.update_member_count(team.id, -deleted_count)
+                TeamTombstone.record(team.id, user_ids=member_user_ids)
+                TeamChange.record(
+                    db.session,
+                    team.id,
+                    TeamChange.Actions.member_removed,
+                    user_ids=member_user_ids
+                )
+
+        results = []
+        for user_id in user_ids:
+            if user_id in member_user_ids:
+                results.append({'user_id': user_id, 'status': HTTPStatus.OK.value})
+            else:
+                results.append({
+                    'user_id': user_id,
+                    'status': HTTPStatus.NOT_FOUND.value,
+                    'message': "User with id %d is not a team member" % user_id,
+                })
+        return results
+
+
+def _get_user_teams(user_id, args):
+    team_members = TeamMember.get_user_memberships(
+        user_id,
+        limit=args['limit'] + 1,
+        after_team_id=args['cursor'][0] if 'cursor' in args else None
+    )
+    team_members, headers = parameters.ListUserTeamsParameters.get_page(
+        team_members,
+        args['limit'],
+        get_sort_key=lambda team_member: (team_member.team_id, )
+    )
+    return team_members, HTTPStatus.OK, headers
+
+
+@users_api.route('/me/teams')
+@users_api.login_required(oauth_scopes=['teams:read'])
+class UserMeTeams(Resource):
+    """
+    Teams of the authenticated user.
+    """
+
+    @users_api.parameters(parameters.ListUserTeamsParameters())
+    @users_api.response(
+        schemas.BaseTeamMemberSchema(many=True, exclude=(TeamMember.user.key, ))
+    )
+    def get(self, args):
+        """
+        List of the current user teams (along with the leadership flag).
+
+        Pass ``X-Next-Cursor`` response header value as ``cursor`` parameter
+        to get the next page (the header is missing on the last page).
+        """
+        return _get_user_teams(current_user.id, args)
+
+
+@users_api.route('/<int:user_id>/teams')
+@users_api.login_required(oauth_scopes=['teams:read'])
+@users_api.response(
+    code=HTTPStatus.NOT_FOUND,
+    description="User not found.",
+)
+@users_api.resolve_object_by_model(User, 'user')
+class UserTeams(Resource):
+    """
+    Teams of a specific user.
+    """
+
+    @users_api.permission_required(
+        permissions.OwnerRolePermission,
+        kwargs_on_request=lambda kwargs: {'obj': kwargs['user']}
+    )
+    @users_api.parameters(parameters.ListUserTeamsParameters())
+    @users_api.response(
+        schemas.BaseTeamMemberSchema(many=True, exclude=(TeamMember.user.key, ))
+    )
+    def get(self, args, user):
+        """
+        List of the user teams (along with the leadership flag).
+
+        Pass ``X-Next-Cursor`` response header value as ``cursor`` parameter
+        to get the next page (the header is missing on the last page).
+        """
+        return _get_user_teams(user.id, args)
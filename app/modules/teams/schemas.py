@@ -5,11 +5,11 @@ Serialization schemas for Team resources RESTful API
 """
 
 from flask_marshmallow import base_fields
-from flask_restplus_patched import ModelSchema
+from flask_restplus_patched import Schema, ModelSchema
 
 from app.modules.users.schemas import BaseUserSchema
 
-from .models import Team, TeamMember
+from .models import Team, TeamChange, TeamMember, TeamTombstone
 
 
 class BaseTeamSchema(ModelSchema):
@@ -23,9 +23,11 @@ class BaseTeamSchema(ModelSchema):
         fields = (
             Team.id.key,
             Team.title.key,
+            Team.member_count.key,
         )
         dump_only = (
             Team.id.key,
+            Team.member_count.key,
         )
 
 
@@ -60,3 +62,45 @@ class BaseTeamMemberSchema(ModelSchema):
             TeamMember.user.key,
             TeamMember.is_leader.key,
         )
+
+
+class TeamTombstoneSchema(ModelSchema):
+    """
+    A deleted team (``user_id`` is null) or a deleted team member.
+    """
+
+    class Meta:
+        # pylint: disable=missing-docstring
+        model = TeamTombstone
+        fields = (
+            TeamTombstone.team_id.key,
+            TeamTombstone.user_id.key,
+            TeamTombstone.deleted.key,
+        )
+
+
+class TeamChangeSchema(ModelSchema):
+    """
+    A change of the teams memberships (``id`` is its sequence number).
+    """
+
+    class Meta:
+        # pylint: disable=missing-docstring
+        model = TeamChange
+        fields = (
+            TeamChange.id.key,
+            TeamChange.team_id.key,
+            TeamChange.user_id.key,
+            TeamChange.action.key,
+            TeamChange.created.key,
+        )
+
+
+class TeamMemberBulkResultSchema(Schema):
+    """
+    A result of a single item of a bulk team members operation.
+    """
+
+    user_id = base_fields.Integer(required=True)
+    status = base_fields.Integer(required=True)
+    message = base_fields.String()
@@ -0,0 +1,198 @@
+# encoding: utf-8
+"""
+Bulk users creation helpers
+---------------------------
+
+bcrypt is slow by design, so password hashing dominates the users creation
+time. These helpers hash the passwords in parallel and insert users in
+batches with a single ``executemany`` statement per batch.
+
+The offline import (``invoke app.users.import``) hashes in a process pool
+across all the CPU cores. The web requests never fork: they share a
+long-lived per-process thread pool (bcrypt releases the GIL while hashing).
+"""
+from contextlib import contextmanager
+import logging
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+import threading
+
+import sqlalchemy
+from sqlalchemy_utils.types.password import Password
+
+from app.extensions import db
+
+from .models import User
+
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+def _hash_password(secret):
+    """
+    Hash a plain-text password with the ``User.password`` column settings.
+
+    NOTE: This is a top-level function, so it can be passed to a process
+    pool.
+    """
+    return User.password.property.columns[0].type.context.hash(secret)
+
+
+@contextmanager
+def password_hashing_pool(processes=None):
+    """
+    A context manager providing a process pool for password hashing.
+
+    Arguments:
+        processes (int) - a number of worker processes, ``None`` uses all
+            CPU cores, and ``0`` disables the pool (the passwords are hashed
+            in the current process).
+    """
+    if processes == 0:
+        yield None
+        return
+    pool = multiprocessing.Pool(processes)
+    try:
+        yield pool
+    finally:
+        pool.close()
+        pool.join()
+
+
+_hashing_thread_pools = {}  # pylint: disable=invalid-name
+_hashing_thread_pools_lock = threading.Lock()  # pylint: disable=invalid-name
+
+
+def get_password_hashing_thread_pool(threads):
+    """
+    Get a long-lived thread pool for password hashing, which is created once
+    per process (and number of threads) on the first use.
+
+    Arguments:
+        threads (int) - a number of worker threads, ``0`` disables the pool
+            (``None`` is returned, so the passwords are hashed in the current
+            thread).
+    """
+    if not threads:
+        return None
+    with _hashing_thread_pools_lock:
+        if threads not in _hashing_thread_pools:
+            _hashing_thread_pools[threads] = ThreadPool(threads)
+        return _hashing_thread_pools[threads]
+
+
+def hash_passwords(secrets, pool=None):
+    """
+    Hash a list of plain-text passwords using a given process (or thread)
+    pool.
+
+    Returns:
+        hashes (list) - a list of :class:`Password` instances which are stored
+        as is by ``PasswordType`` columns.
+    """
+    if pool is None:
+        hashes = [_hash_password(secret) for secret in secrets]
+    else:
+        hashes = pool.map(_hash_password, secrets, chunksize=max(1, len(secrets) // 64))
+    return [Password(password_hash) for password_hash in hashes]
+
+
+def _get_static_roles(user_data):
+    static_roles = 0
+    for role in (User.StaticRoles.ACTIVE, User.StaticRoles.REGULAR_USER, User.StaticRoles.ADMIN):
+        if user_data.get('is_%s' % role.name.lower(), role is not User.StaticRoles.ADMIN):
+            static_roles |= role.mask
+    return static_roles
+
+
+def create_users(users_data, pool=None):
+    """
+    Create a batch of users in a single transaction.
+
+    Arguments:
+        users_data (list) - a list of dicts with ``username``, ``email`` and
+            plain-text ``password`` keys, and optional ``first_name``,
+            ``middle_name``, ``last_name``, ``is_active``,
+            ``is_regular_user`` and ``is_admin`` keys.
+        pool (multiprocessing.Pool) - see :func:`password_hashing_pool` and
+            :func:`get_password_hashing_thread_pool`.
+
+    Returns:
+        results (list) - a list of ``(user_id, error_message)`` pairs in the
+        order of ``users_data``; either ``user_id`` or ``error_message`` is
+        ``None``.
+    """
+    if not users_data:
+        return []
+    usernames = set(user_data['username'] for user_data in users_data)
+    emails = set(user_data['email'] for user_data in users_data)
+    taken_usernames = set(
+        username for username, in db.session.query(User.username).filter(
+            User.username.in_(usernames)
+        )
+    )
+    taken_emails = set(
+        email for email, in db.session.query(User.email).filter(User.email.in_(emails))
+    )
+
+    errors = {}
+    new_users_data = []
+    for index, user_data in enumerate(users_data):
+        if user_data['username'] in taken_usernames:
+            errors[index] = "Username '%s' is already taken" % user_data['username']
+        elif user_data['email'] in taken_emails:
+            errors[index] = "Email '%s' is already taken" % user_data['email']
+        else:
+            taken_usernames.add(user_data['username'])
+            taken_emails.add(user_data['email'])
+            new_users_data.append(user_data)
+
+    password_hashes = hash_passwords(
+        [user_data['password'] for user_data in new_users_data],
+        pool=pool
+    )
+    # NOTE: All rows must have the same keys to be inserted with executemany.
+    rows = [
+        {
+            'username': user_data['username'],
+            'email': user_data['email'],
+            'password': password_hash,
+            'first_name': user_data.get('first_name', ''),
+            'middle_name': user_data.get('middle_name', ''),
+            'last_name': user_data.get('last_name', ''),
+            'static_roles': _get_static_roles(user_data),
+        }
+        for user_data, password_hash in zip(new_users_data, password_hashes)
+    ]
+
+    failed_usernames = set()
+    if rows:
+        try:
+            with db.session.begin():
+                db.session.execute(User.__table__.insert(), rows)
+        except sqlalchemy.exc.IntegrityError:
+            # The batch collided with concurrently created users, so we fall
+            # back to row-by-row insertion to find out the failed rows.
+            log.info("Batch insertion of users has failed, retrying row by row.")
+            for row in rows:
+                try:
+                    with db.session.begin():
+                        db.session.execute(User.__table__.insert(), row)
+                except sqlalchemy.exc.IntegrityError:
+                    failed_usernames.add(row['username'])
+
+    user_ids = dict(
+        db.session.query(User.username, User.id).filter(
+            User.username.in_([row['username'] for row in rows])
+        )
+    ) if rows else {}
+
+    results = []
+    for index, user_data in enumerate(users_data):
+        if index in errors:
+            results.append((None, errors[index]))
+        elif user_data['username'] in failed_usernames or user_data['username'] not in user_ids:
+            results.append((None, "Failed to create a new user."))
+        else:
+            results.append((user_ids[user_data['username']], None))
+    return results
@@ -5,6 +5,8 @@ User database models
 """
 import enum
 
+from sqlalchemy import bindparam, literal_column
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy_utils import types as column_types, Timestamp
 
 from app.extensions import db
@@ -12,30 +14,42 @@ from app.extensions import db
 
 def _get_is_static_role_property(role_name, static_role):
     """
-    A helper function that aims to provide a property getter and setter
-    for static roles.
+    A helper function that aims to provide a hybrid property getter, setter
+    and SQL expression for static roles.
 
     Args:
         role_name (str)
         static_role (int) - a bit mask for a specific role
 
     Returns:
-        property_method (property) - preconfigured getter and setter property
-        for accessing role.
+        property_method (hybrid_property) - preconfigured getter and setter
+        property for accessing role, which can also be used in queries, e.g.
+        ``User.query.filter(User.is_admin)``.
     """
-    @property
     def _is_static_role_property(self):
         return self.has_static_role(static_role)
 
-    @_is_static_role_property.setter
-    def _is_static_role_property(self, value):
+    def _set_is_static_role_property(self, value):
         if value:
             self.set_static_role(static_role)
         else:
             self.unset_static_role(static_role)
 
-    _is_static_role_property.fget.__name__ = role_name
-    return _is_static_role_property
+    def _is_static_role_expression(cls):
+        # NOTE: The mask and zero are rendered as literals (not bound
+        # parameters), so the query planners can match the predicate with the
+        # partial indexes predicates.
+        return (
+            cls.static_roles.op('&')(literal_column(str(static_role.mask)))
+            != literal_column('0')
+        )
+
+    _is_static_role_property.__name__ = role_name
+    return hybrid_property(
+        _is_static_role_property,
+        _set_is_static_role_property,
+        expr=_is_static_role_expression
+    )
 
 
 class User(db.Model, Timestamp):
@@ -131,9 +145,36 @@ class User(db.Model, Timestamp):
             user (User) - if there is a user with a specified username and
             password, None otherwise.
         """
-        user = cls.query.filter_by(username=username).first()
+        user = _find_user_by_username(username=username).first()
         if not user:
             return None
         if user.password == password:
             return user
         return None
+
+
+# Listing the users with a rare role (or without the common `is_active` role)
+# would scan the whole table, so these role filters are backed by partial
+# indexes (the filters matching most of the users don't need an index, since
+# a scan in the primary key order finds a page of them quickly).
+db.Index('ix_user_is_admin', User.id, sqlite_where=User.is_admin, postgresql_where=User.is_admin)
+db.Index(
+    'ix_user_is_internal',
+    User.id,
+    sqlite_where=User.is_internal,
+    postgresql_where=User.is_internal
+)
+db.Index(
+    'ix_user_is_not_active',
+    User.id,
+    sqlite_where=~User.is_active,
+    postgresql_where=~User.is_active
+)
+
+# Incremental sync (`updated_since`) lists the users in this order
+db.Index('ix_user_updated_id', User.updated, User.id)
+
+
+@db.hot_query('User.find_by_username')
+def _find_user_by_username(session):
+    return session.query(User).filter(User.username == bindparam('username'))
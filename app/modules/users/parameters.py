@@ -5,18 +5,88 @@ Input arguments (Parameters) for User resources RESTful API
 -----------------------------------------------------------
 """
 
+from datetime import datetime
+import numbers
+
+from flask import current_app
 from flask_login import current_user
 from flask_marshmallow import base_fields
-from flask_restplus_patched import PostFormParameters, PatchJSONParameters
+from flask_restplus_patched import Parameters, PostFormParameters, PatchJSONParameters
 from flask_restplus._http import HTTPStatus
-from marshmallow import validates_schema, ValidationError
+from marshmallow import validate, validates, validates_schema, ValidationError
+import sqlalchemy
 
+from app.extensions import db
 from app.extensions.api import abort
+from app.extensions.api.parameters import (
+    KeysetPaginationParameters,
+    UpdatedSincePaginationParameters,
+)
 
 from . import schemas, permissions
 from .models import User
 
 
+class ListUsersParameters(UpdatedSincePaginationParameters):
+    """
+    Users list parameters with optional static roles filters.
+    """
+
+    is_internal = base_fields.Boolean(
+        description="Only internal (true) or not internal (false) users"
+    )
+    is_admin = base_fields.Boolean(description="Only admins (true) or not admins (false)")
+    is_regular_user = base_fields.Boolean(
+        description="Only regular users (true) or not regular users (false)"
+    )
+    is_active = base_fields.Boolean(description="Only active (true) or inactive (false) users")
+
+    ROLE_FIELDS = {
+        User.is_internal.key: User.StaticRoles.INTERNAL,
+        User.is_admin.key: User.StaticRoles.ADMIN,
+        User.is_regular_user.key: User.StaticRoles.REGULAR_USER,
+        User.is_active.key: User.StaticRoles.ACTIVE,
+    }
+
+    @classmethod
+    def get_filters(cls, args):
+        """
+        Get SQL predicates (``static_roles & mask != 0`` and its negation)
+        for the requested roles filters.
+        """
+        filters = []
+        for field in cls.ROLE_FIELDS:
+            if field not in args:
+                continue
+            has_role = getattr(User, field)
+            filters.append(has_role if args[field] else ~has_role)
+        return filters
+
+
+class SearchUsersParameters(KeysetPaginationParameters):
+    """
+    Users search parameters.
+    """
+
+    q = base_fields.String(
+        description="Example: john (prefixes of username and email, and words of names)",
+        required=True,
+        validate=validate.Length(min=1, max=200)
+    )
+
+    @validates('cursor')
+    def validate_search_cursor(self, data):
+        # pylint: disable=missing-docstring
+        sort_key = self.decode_cursor(data)
+        if (
+                len(sort_key) != 2
+                or not isinstance(sort_key[0], numbers.Real)
+                or not isinstance(sort_key[1], numbers.Integral)
+                or isinstance(sort_key[1], bool)
+            ):
+            raise ValidationError("Invalid cursor.")
+
+
 class AddUserParameters(PostFormParameters, schemas.BaseUserSchema):
     """
     New user creation (sign up) parameters.
@@ -61,6 +131,37 @@ class AddUserParameters(PostFormParameters, schemas.BaseUserSchema):
             abort(code=HTTPStatus.FORBIDDEN, message="CAPTCHA key is incorrect.")
 
 
+class ImportUserParameters(Parameters, schemas.BaseUserSchema):
+    """
+    A single user data for bulk import.
+    """
+
+    username = base_fields.String(description="Example: root", required=True)
+    email = base_fields.Email(description="Example: root@gmail.com", required=True)
+    password = base_fields.String(description="No rules yet", required=True)
+    is_active = base_fields.Boolean(missing=True)
+    is_regular_user = base_fields.Boolean(missing=True)
+    is_admin = base_fields.Boolean(missing=False)
+
+    class Meta(schemas.BaseUserSchema.Meta):
+        fields = schemas.BaseUserSchema.Meta.fields + (
+            'email',
+            'password',
+            User.is_active.key,
+            User.is_regular_user.key,
+            User.is_admin.key,
+        )
+
+    @validates_schema(pass_many=True)
+    def validate_users_count(self, data, many):
+        # pylint: disable=no-self-use
+        if not many:
+            return
+        max_users = current_app.config['USERS_BULK_MAX_USERS']
+        if len(data) > max_users:
+            raise ValidationError("It is only allowed to create up to %d users." % max_users)
+
+
 class PatchUserDetailsParameters(PatchJSONParameters):
     # pylint: disable=abstract-method
     """
@@ -75,9 +176,9 @@ class PatchUserDetailsParameters(PatchJSONParameters):
             User.last_name.key,
             User.password.key,
             User.email.key,
-            User.is_active.fget.__name__,
-            User.is_regular_user.fget.__name__,
-            User.is_admin.fget.__name__,
+            User.is_active.key,
+            User.is_regular_user.key,
+            User.is_admin.key,
         )
     )
 
@@ -112,7 +213,7 @@ class PatchUserDetailsParameters(PatchJSONParameters):
                 "performed before replacements."
             )
 
-        if field in {User.is_active.fget.__name__, User.is_regular_user.fget.__name__}:
+        if field in {User.is_active.key, User.is_regular_user.key}:
             with permissions.SupervisorRolePermission(
                     obj=obj,
                     password_required=True,
@@ -120,7 +221,7 @@ class PatchUserDetailsParameters(PatchJSONParameters):
                 ):
                 # Access granted
                 pass
-        elif field == User.is_admin.fget.__name__:
+        elif field == User.is_admin.key:
             with permissions.AdminRolePermission(
                     password_required=True,
                     password=state['current_password']
@@ -128,3 +229,134 @@ class PatchUserDetailsParameters(PatchJSONParameters):
                 # Access granted
                 pass
         return super(PatchUserDetailsParameters, cls).replace(obj, field, value, state)
+
+
+class PatchUsersRolesParameters(PatchJSONParameters):
+    # pylint: disable=abstract-method
+    """
+    Users roles updating operations following PATCH JSON RFC.
+    """
+
+    OPERATION_CHOICES = (
+        PatchJSONParameters.OP_TEST,
+        PatchJSONParameters.OP_REPLACE,
+    )
+
+    ROLE_FIELDS = {
+        User.is_active.key: User.StaticRoles.ACTIVE,
+        User.is_regular_user.key: User.StaticRoles.REGULAR_USER,
+        User.is_admin.key: User.StaticRoles.ADMIN,
+    }
+
+    PATH_CHOICES = ('/current_password', ) + tuple('/%s' % field for field in ROLE_FIELDS)
+
+    @classmethod
+    def perform_bulk_patch(cls, operations, user_ids):
+        """
+        Apply the operations to all the given users with a single UPDATE
+        statement.
+
+        ``current_password`` is verified and the permissions are checked
+        only once for the whole batch, and ``test`` operations of the role
+        fields are turned into SQL bitmask predicates, so the users which
+        don't pass the tests are left intact.
+
+        Returns:
+            results (list) - a list of ``(user_id, http_status, message)``
+            in the order of ``user_ids``.
+        """
+        current_password = None
+        predicates = []
+        set_mask = unset_mask = 0
+        for operation in operations:
+            field = operation['field_name']
+            value = operation['value']
+            if field == 'current_password':
+                if operation['op'] != cls.OP_TEST:
+                    raise ValidationError("`current_password` can only be tested.")
+                current_password = value
+                continue
+            if not isinstance(value, bool):
+                raise ValidationError("'%s' value must be boolean." % field)
+            role_mask = cls.ROLE_FIELDS[field].mask
+            if operation['op'] == cls.OP_TEST:
+                has_role = getattr(User, field)
+                predicates.append(has_role if value else ~has_role)
+            elif value:
+                set_mask |= role_mask
+                unset_mask &= ~role_mask
+            else:
+                unset_mask |= role_mask
+                set_mask &= ~role_mask
+
+        if set_mask or unset_mask:
+            if current_password is None:
+                raise ValidationError(
+                    "Updating sensitive user settings requires `current_password` test operation "
+                    "performed before replacements."
+                )
+            if current_user.password != current_password:
+                abort(code=HTTPStatus.FORBIDDEN, message="Wrong password")
+            # The password has just been verified, so the permissions don't
+            # need to check it for every user again.
+            if (set_mask | unset_mask) & User.StaticRoles.ADMIN.mask:
+                with permissions.AdminRolePermission():
+                    pass
+            if (set_mask | unset_mask) & ~User.StaticRoles.ADMIN.mask:
+                with permissions.SupervisorRolePermission():
+                    pass
+
+        matched_expression = sqlalchemy.and_(*predicates) if predicates else sqlalchemy.true()
+        matched_query = db.session.query(
+            User.id,
+            sqlalchemy.case([(matched_expression, True)], else_=False)
+        ).filter(User.id.in_(user_ids))
+        if set_mask or unset_mask:
+            # The rows are locked until the end of the transaction, so the
+            # `test` operations cannot be invalidated by concurrent updates
+            # before the roles are replaced.
+            matched_query = matched_query.with_for_update()
+        matched_by_user_id = dict(matched_query)
+        matched_user_ids = [
+            user_id for user_id, is_matched in matched_by_user_id.items() if is_matched
+        ]
+
+        if matched_user_ids and (set_mask or unset_mask):
+            # NOTE: The `test` predicates are repeated, so the users which have
+            # been changed anyway (e.g. the database doesn't support row
+            # locks) are not updated and the whole transaction is rolled back.
+            updated_count = User.query.filter(
+                User.id.in_(matched_user_ids),
+                matched_expression
+            ).update(
+                {
+                    User.static_roles: User.static_roles.op('|')(set_mask).op('&')(~unset_mask),
+                    User.updated: datetime.utcnow(),
+                },
+                synchronize_session=False
+            )
+            if updated_count != len(matched_user_ids):
+                raise ValueError("Users have been changed concurrently, please try again.")
+
+        results = []
+        for user_id in user_ids:
+            if user_id not in matched_by_user_id:
+                results.append((user_id, HTTPStatus.NOT_FOUND, "User not found."))
+            elif not matched_by_user_id[user_id]:
+                results.append((user_id, HTTPStatus.CONFLICT, "Test operation has failed."))
+            else:
+                results.append((user_id, HTTPStatus.OK, None))
+        return results
+
+
+class PatchUsersParameters(Parameters):
+    """
+    Bulk users updating parameters.
+    """
+
+    user_ids = base_fields.List(
+        base_fields.Integer,
+        required=True,
+        validate=validate.Length(min=1, max=1000)
+    )
+    operations = base_fields.Nested(PatchUsersRolesParameters, many=True, required=True)
@@ -7,13 +7,14 @@ RESTful API User resources
 
 import logging
 
+from flask import current_app
 from flask_login import current_user
 from flask_restplus_patched import Resource
 from flask_restplus._http import HTTPStatus
 
 from app.extensions.api import Namespace
 
-from . import permissions, schemas, parameters
+from . import bulk, permissions, schemas, parameters, search
 from .models import db, User
 
 
@@ -30,15 +31,19 @@ class Users(Resource):
     @api.login_required(oauth_scopes=['users:read'])
     @api.permission_required(permissions.AdminRolePermission())
     @api.response(schemas.BaseUserSchema(many=True))
-    @api.paginate()
+    @api.paginate(parameters.ListUsersParameters())
     def get(self, args):
         """
         List of users.
 
         Returns a list of users starting from ``offset`` limited by ``limit``
-        parameter.
+        parameter, or the users changed since ``updated_since`` (or
+        ``cursor``) for incremental sync, optionally filtered by the roles
+        (e.g. ``is_admin=true`` or ``is_active=false``).
         """
-        return User.query.offset(args['offset']).limit(args['limit'])
+        return User.query.filter(
+            *parameters.ListUsersParameters.get_filters(args)
+        ).order_by(User.id)
 
     @api.parameters(parameters.AddUserParameters())
     @api.response(schemas.DetailedUserSchema())
@@ -57,6 +62,110 @@ class Users(Resource):
             db.session.add(new_user)
         return new_user
 
+    @api.login_required(oauth_scopes=['users:write'])
+    @api.permission_required(permissions.AdminRolePermission())
+    @api.permission_required(permissions.WriteAccessPermission())
+    @api.parameters(parameters.PatchUsersParameters(), locations=('json', ))
+    @api.response(schemas.UserBulkResultSchema(many=True))
+    @api.response(code=HTTPStatus.CONFLICT)
+    def patch(self, args):
+        """
+        Patch roles of a list of users.
+
+        The operations are applied to all the given users at once, while the
+        users which cannot be updated are reported individually in the result
+        list.
+        """
+        with api.commit_or_abort(
+                db.session,
+                default_error_message="Failed to update users details."
+            ):
+            results = parameters.PatchUsersRolesParameters.perform_bulk_patch(
+                args['operations'],
+                user_ids=args['user_ids']
+            )
+        return [
+            {'id': user_id, 'status': status.value, 'message': message}
+            for user_id, status, message in results
+        ]
+
+
+@api.route('/bulk')
+class UsersBulk(Resource):
+    """
+    Bulk manipulations with users.
+    """
+
+    @api.login_required(oauth_scopes=['users:write'])
+    @api.permission_required(permissions.AdminRolePermission())
+    @api.parameters(parameters.ImportUserParameters(many=True))
+    @api.response(schemas.UserBulkResultSchema(many=True))
+    def post(self, args):
+        """
+        Create a list of new users.
+
+        Passwords are hashed in parallel and all the users are inserted in a
+        single transaction, while the users which cannot be created (e.g.
+        username or email is already taken) are reported individually in the
+        result list. Use ``invoke app.users.import`` for large imports.
+        """
+        results = bulk.create_users(
+            args,
+            pool=bulk.get_password_hashing_thread_pool(
+                current_app.config['USERS_BULK_HASHING_THREADS']
+            )
+        )
+        return [
+            {
+                'username': user_data['username'],
+                'id': user_id,
+                'status': (
+                    HTTPStatus.OK.value if error_message is None else HTTPStatus.CONFLICT.value
+                ),
+                'message': error_message,
+            }
+            for user_data, (user_id, error_message) in zip(args, results)
+        ]
+
+
+@api.route('/search')
+class UsersSearch(Resource):
+    """
+    Users search.
+    """
+
+    @api.login_required(oauth_scopes=['users:read'])
+    @api.permission_required(permissions.AdminRolePermission())
+    @api.parameters(parameters.SearchUsersParameters())
+    @api.response(schemas.BaseUserSchema(many=True))
+    def get(self, args):
+        """
+        Search users.
+
+        Users are matched by prefixes of the words of their username and
+        email, and by words of their names, and ranked by relevance. Pass
+        ``X-Next-Cursor`` response header value as ``cursor`` parameter to
+        get the next page (the header is missing on the last page).
+
+        Only the first ``X-Search-Max-Candidates`` matches in the index
+        order (not the most relevant ones) are ranked and paged;
+        ``X-Search-Truncated: true`` header reports that there are more
+        matches, which may be more relevant, so the search should be refined.
+        """
+        users_ranks = search.search_users(
+            args['q'],
+            limit=args['limit'] + 1,
+            after=args.get('cursor')
+        )
+        users_ranks, headers = parameters.SearchUsersParameters.get_page(
+            users_ranks,
+            args['limit'],
+            get_sort_key=lambda user_rank: (user_rank[1], user_rank[0].id)
+        )
+        headers['X-Search-Max-Candidates'] = search.MAX_SEARCH_CANDIDATES
+        headers['X-Search-Truncated'] = 'true' if search.is_search_truncated(args['q']) else 'false'
+        return [user for user, _ in users_ranks], HTTPStatus.OK, headers
+
 
 @api.route('/signup-form')
 class UserSignupForm(Resource):
@@ -117,7 +226,6 @@ class UserByID(Resource):
                 default_error_message="Failed to update user details."
             ):
             parameters.PatchUserDetailsParameters.perform_patch(args, user)
-            db.session.merge(user)
         return user
 
 
@@ -41,12 +41,28 @@ class DetailedUserSchema(BaseUserSchema):
             User.email.key,
             User.created.key,
             User.updated.key,
-            User.is_active.fget.__name__,
-            User.is_regular_user.fget.__name__,
-            User.is_admin.fget.__name__,
+            User.is_active.key,
+            User.is_regular_user.key,
+            User.is_admin.key,
         )
+        field_columns = {
+            User.is_active.key: (User.static_roles.key, ),
+            User.is_regular_user.key: (User.static_roles.key, ),
+            User.is_admin.key: (User.static_roles.key, ),
+        }
 
 
 class UserSignupFormSchema(Schema):
 
     recaptcha_server_key = base_fields.String(required=True)
+
+
+class UserBulkResultSchema(Schema):
+    """
+    A result of a single item of a bulk users operation.
+    """
+
+    username = base_fields.String()
+    id = base_fields.Integer()  # pylint: disable=invalid-name
+    status = base_fields.Integer(required=True)
+    message = base_fields.String()
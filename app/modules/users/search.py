@@ -0,0 +1,274 @@
+# encoding: utf-8
+"""
+Users search
+------------
+
+Users are found by prefixes of the words of their ``username`` and
+``email``, and by whole words of their names, and the results are ranked by
+relevance (matches in ``username`` weigh the most).
+
+The search is backed by an index on every supported database:
+
+* SQLite: an FTS5 external content table, which is kept in sync with the
+  ``user`` table by triggers (so bulk and raw SQL writes are covered too);
+* PostgreSQL: a GIN index over a weighted ``tsvector`` expression.
+
+Other databases fall back to (unindexed) ``LIKE`` predicates.
+
+Only the first ``MAX_SEARCH_CANDIDATES`` matches (in the index order, not by
+relevance) are ranked and paged, so the results of very common searches are
+truncated (see :func:`is_search_truncated`); such searches have to be
+refined to reach the other matches.
+"""
+import re
+
+import sqlalchemy
+from sqlalchemy import DDL, event, func, literal_column
+
+from app.extensions import db
+
+from .models import User
+
+
+SEARCH_TABLE_NAME = 'user_search'
+
+PREFIX_COLUMNS = (User.username, User.email)
+WORDS_COLUMNS = (User.first_name, User.middle_name, User.last_name)
+
+MAX_SEARCH_WORDS = 10
+
+# Ranking has to score every match, so only the first matches (in the index
+# order) are ranked, which keeps short and common prefixes (e.g. "jo") as fast
+# as specific searches. The truncation is reported to the clients.
+MAX_SEARCH_CANDIDATES = 1000
+
+_SEARCH_WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+# SQLite
+# ------
+
+SQLITE_BM25_WEIGHTS = (10.0, 5.0, 1.0, 1.0, 1.0)
+
+
+def _get_sqlite_columns_list(prefix=None):
+    return ', '.join(
+        '%s%s' % ('%s.' % prefix if prefix else '', column.key)
+        for column in PREFIX_COLUMNS + WORDS_COLUMNS
+    )
+
+
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE {search_table} USING fts5({columns}, "
+    "content='user', content_rowid='id', prefix='2 3 4')",
+
+    "CREATE TRIGGER {search_table}_after_insert AFTER INSERT ON user BEGIN "
+    "INSERT INTO {search_table}(rowid, {columns}) VALUES (new.id, {new_columns}); "
+    "END",
+
+    "CREATE TRIGGER {search_table}_after_delete AFTER DELETE ON user BEGIN "
+    "INSERT INTO {search_table}({search_table}, rowid, {columns}) "
+    "VALUES ('delete', old.id, {old_columns}); "
+    "END",
+
+    "CREATE TRIGGER {search_table}_after_update AFTER UPDATE OF {columns} ON user BEGIN "
+    "INSERT INTO {search_table}({search_table}, rowid, {columns}) "
+    "VALUES ('delete', old.id, {old_columns}); "
+    "INSERT INTO {search_table}(rowid, {columns}) VALUES (new.id, {new_columns}); "
+    "END",
+)
+SQLITE_SEARCH_DDL = tuple(
+    statement.format(
+        search_table=SEARCH_TABLE_NAME,
+        columns=_get_sqlite_columns_list(),
+        new_columns=_get_sqlite_columns_list('new'),
+        old_columns=_get_sqlite_columns_list('old'),
+    )
+    for statement in SQLITE_SEARCH_DDL
+)
+
+
+def get_sqlite_search_query(words):
+    """
+    Build FTS5 query: every word has to be a prefix of a word in
+    ``username`` or ``email``, or a word of the names.
+    """
+    prefix_columns = ' '.join(column.key for column in PREFIX_COLUMNS)
+    words_columns = ' '.join(column.key for column in WORDS_COLUMNS)
+    return ' AND '.join(
+        '({%s} : "%s"* OR {%s} : "%s")' % (prefix_columns, word, words_columns, word)
+        for word in words
+    )
+
+
+def _get_sqlite_matches(words, limit):
+    search_table = literal_column(SEARCH_TABLE_NAME)
+    return sqlalchemy.select([
+        literal_column('rowid').label('user_id'),
+        func.bm25(search_table, *SQLITE_BM25_WEIGHTS).label('rank'),
+    ]).select_from(
+        sqlalchemy.table(SEARCH_TABLE_NAME)
+    ).where(
+        search_table.op('MATCH')(get_sqlite_search_query(words))
+    ).limit(limit).alias('matches')
+
+
+# PostgreSQL
+# ----------
+
+POSTGRESQL_SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', username || ' ' || email), 'A') || "
+    "setweight(to_tsvector('simple', first_name || ' ' || middle_name || ' ' || last_name), 'B')"
+)
+
+POSTGRESQL_SEARCH_INDEX_NAME = 'ix_user_search'
+
+POSTGRESQL_SEARCH_DDL = (
+    'CREATE INDEX %s ON "user" USING gin ((%s))' % (
+        POSTGRESQL_SEARCH_INDEX_NAME,
+        POSTGRESQL_SEARCH_VECTOR,
+    ),
+)
+
+
+def get_postgresql_search_query(words):
+    """
+    Build ``tsquery``: every word has to be a prefix of a word in
+    ``username`` or ``email`` (weight A), or a word of the names (weight B).
+    """
+    return ' & '.join("('%s':*A | '%s':B)" % (word, word) for word in words)
+
+
+def _get_postgresql_matches(words, limit):
+    search_vector = literal_column(POSTGRESQL_SEARCH_VECTOR)
+    search_query = func.to_tsquery('simple', get_postgresql_search_query(words))
+    return sqlalchemy.select([
+        User.id.label('user_id'),
+        (-func.ts_rank(search_vector, search_query)).label('rank'),
+    ]).where(
+        search_vector.op('@@')(search_query)
+    ).limit(limit).alias('matches')
+
+
+# Other databases
+# ---------------
+
+LIKE_ESCAPE_CHAR = '\\'
+
+
+def escape_like(word):
+    """
+    Escape ``LIKE`` wildcards (``%`` and ``_``, which is a word character) in
+    ``word``, so it is matched literally (with ``LIKE_ESCAPE_CHAR`` escape).
+    """
+    for char in (LIKE_ESCAPE_CHAR, '%', '_'):
+        word = word.replace(char, LIKE_ESCAPE_CHAR + char)
+    return word
+
+
+def _get_generic_matches(words, limit):
+    return sqlalchemy.select([
+        User.id.label('user_id'),
+        sqlalchemy.literal(0.0).label('rank'),
+    ]).where(
+        sqlalchemy.and_(*[
+            sqlalchemy.or_(
+                *[
+                    column.ilike('%s%%' % escape_like(word), escape=LIKE_ESCAPE_CHAR)
+                    for column in PREFIX_COLUMNS
+                ]
+                + [func.lower(column) == word.lower() for column in WORDS_COLUMNS]
+            )
+            for word in words
+        ])
+    ).limit(limit).alias('matches')
+
+
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(User.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(
+    User.__table__,
+    'before_drop',
+    DDL('DROP TABLE IF EXISTS %s' % SEARCH_TABLE_NAME).execute_if(dialect='sqlite')
+)
+for _statement in POSTGRESQL_SEARCH_DDL:
+    event.listen(
+        User.__table__,
+        'after_create',
+        DDL(_statement).execute_if(dialect='postgresql')
+    )
+
+
+def is_search_schema_object(name, type_):
+    """
+    Check if a database object belongs to the search index. These objects
+    are created by raw DDL, so they are not declared in the models metadata
+    (and have to be skipped by migrations autogenerate).
+    """
+    if type_ == 'table':
+        # The FTS5 table and its shadow tables (e.g. `user_search_data`)
+        return name == SEARCH_TABLE_NAME or name.startswith('%s_' % SEARCH_TABLE_NAME)
+    if type_ == 'index':
+        return name == POSTGRESQL_SEARCH_INDEX_NAME
+    return False
+
+
+def get_search_words(text):
+    """
+    Split the search text into (at most ``MAX_SEARCH_WORDS``) words.
+    """
+    return _SEARCH_WORD_RE.findall(text)[:MAX_SEARCH_WORDS]
+
+
+def _get_matches(words, limit):
+    dialect_name = db.session.get_bind(mapper=User.__mapper__).dialect.name
+    if dialect_name == 'sqlite':
+        return _get_sqlite_matches(words, limit)
+    if dialect_name == 'postgresql':
+        return _get_postgresql_matches(words, limit)
+    return _get_generic_matches(words, limit)
+
+
+def is_search_truncated(text):
+    """
+    Check if the search matches more than ``MAX_SEARCH_CANDIDATES`` users,
+    so only a part of the matches is ranked and paged.
+    """
+    words = get_search_words(text)
+    if not words:
+        return False
+    matches = _get_matches(words, limit=MAX_SEARCH_CANDIDATES + 1)
+    candidates_count = db.session.query(func.count()).select_from(matches).scalar()
+    return candidates_count > MAX_SEARCH_CANDIDATES
+
+
+def search_users(text, limit, after=None):
+    """
+    Search users ranked by relevance.
+
+    Args:
+        text (str) - search text
+        limit (int) - a maximum number of users to return
+        after (tuple) - ``(rank, user_id)`` of the last user of the previous
+            page (keyset pagination)
+
+    Returns:
+        users_ranks (list) - a list of ``(user, rank)`` sorted by rank (lower
+        is more relevant) and user id (among the first
+        ``MAX_SEARCH_CANDIDATES`` matches only).
+    """
+    words = get_search_words(text)
+    if not words:
+        return []
+
+    matches = _get_matches(words, limit=MAX_SEARCH_CANDIDATES)
+    query = db.session.query(User, matches.c.rank).join(matches, matches.c.user_id == User.id)
+    if after is not None:
+        after_rank, after_user_id = after
+        query = query.filter(
+            sqlalchemy.or_(
+                matches.c.rank > after_rank,
+                sqlalchemy.and_(matches.c.rank == after_rank, User.id > after_user_id)
+            )
+        )
+    return query.order_by(matches.c.rank, User.id).limit(limit).all()
@@ -0,0 +1,83 @@
+# encoding: utf-8
+"""
+Pre-fork application preloading
+===============================
+
+Pre-forking servers (uWSGI without ``lazy-apps``, gunicorn with
+``--preload``) can create the application once in the master process, so the
+workers share the imported modules, mappers, schemas and swagger specs
+copy-on-write instead of building their own copies.
+
+The shared pages stay shared only until a worker writes to them, and the
+cyclic garbage collector writes to the header of every tracked object it
+visits, so the heap of the master is frozen (``gc.freeze``, Python 3.7+)
+right before forking.
+"""
+import gc
+import logging
+
+
+log = logging.getLogger(__name__)  # pylint: disable=invalid-name
+
+
+def _iter_subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        for subclass_subclass in _iter_subclasses(subclass):
+            yield subclass_subclass
+
+
+def warm_up(app):
+    """
+    Build everything the workers would otherwise build lazily on their
+    first requests.
+    """
+    from sqlalchemy.orm import configure_mappers
+
+    from flask_restplus_patched import PatchJSONParameters
+
+    from app import modules
+    from app.extensions import api
+
+    modules.ensure_loaded(app)
+    configure_mappers()
+
+    for parameters_class in _iter_subclasses(PatchJSONParameters):
+        if parameters_class.PATH_CHOICES:
+            parameters_class._get_patch_plan()  # pylint: disable=protected-access
+
+    with app.test_request_context():
+        api.api_v1.get_encoded_specs()
+
+
+def dispose_db_connections(app):
+    """
+    Drop the pooled database connections, so a forked worker opens its own
+    connections instead of sharing the sockets of its parent.
+    """
+    from app.extensions import db
+
+    for bind in [None] + list(app.config.get('SQLALCHEMY_BINDS') or ()):
+        db.get_engine(app, bind=bind).dispose()
+
+
+def freeze_heap():
+    """
+    Move all the objects allocated so far to the permanent generation, so
+    the garbage collector of the forked workers leaves their pages intact.
+    """
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+    else:
+        log.warning("gc.freeze() requires Python 3.7+, the heap is not frozen.")
+
+
+def preload_app(app):
+    """
+    Prepare the application created in the master process for forking.
+    """
+    warm_up(app)
+    dispose_db_connections(app)
+    freeze_heap()
+    return app
@@ -0,0 +1,37 @@
+# encoding: utf-8
+"""
+WSGI entry point for pre-forking servers
+========================================
+
+The application is created and preloaded (see :mod:`app.preload`) on import
+in the master process.
+
+uWSGI (``lazy-apps`` must stay disabled)::
+
+    $ uwsgi --master --processes 4 --need-app --module app.wsgi:application ...
+
+gunicorn::
+
+    $ gunicorn --workers 4 --preload --config python:app.wsgi app.wsgi:application
+"""
+from app import create_app
+from app.preload import dispose_db_connections, preload_app
+
+
+application = preload_app(create_app())  # pylint: disable=invalid-name
+
+
+def post_fork(server, worker):
+    """
+    gunicorn server hook.
+    """
+    # pylint: disable=unused-argument
+    dispose_db_connections(application)
+
+
+try:
+    from uwsgidecorators import postfork
+except ImportError:
+    pass
+else:
+    postfork(lambda: dispose_db_connections(application))
@@ -23,6 +23,24 @@ class BaseConfig(object):
 
     # SQLITE
     SQLALCHEMY_DATABASE_URI = 'sqlite:///%s' % (os.path.join(PROJECT_ROOT, "example.db"))
+    # SQLite pragmas profile: 'default', 'wal' or 'wal-fast' (see
+    # `app.extensions.flask_sqlalchemy.SQLITE_PROFILES`)
+    SQLALCHEMY_SQLITE_PROFILE = 'default'
+    # Connection pool settings: pool_size, max_overflow, pool_timeout,
+    # pool_recycle, pool_pre_ping (not applied to SQLite NullPool/StaticPool)
+    SQLALCHEMY_POOL_OPTIONS = {}
+    # Serve the connection pools statistics at METRICS_URL
+    SQLALCHEMY_POOL_METRICS = False
+    SQLALCHEMY_POOL_METRICS_SAMPLES = 1000
+    # Names of SQLALCHEMY_BINDS which are read replicas of the primary
+    # database, and the time (in seconds) a client's requests stick to the
+    # primary database after a write
+    SQLALCHEMY_BINDS = {}
+    SQLALCHEMY_REPLICA_BINDS = ()
+    SQLALCHEMY_REPLICA_STICKINESS = 5
+    # Run all the queries of a request (outside of explicit transactions) in
+    # a single transaction on a single connection
+    SQLALCHEMY_REQUEST_TRANSACTIONS = False
 
     DEBUG = False
     ERROR_404_HELP = False
@@ -54,13 +72,56 @@ class BaseConfig(object):
         'api',
     )
 
+    # Defer modules (models, schemas, resources) loading of the applications
+    # served by WSGI servers only (`app:create_wsgi_app()`) until the first
+    # request, so the workers start faster
+    MODULES_LAZY_LOADING = False
+
     STATIC_ROOT = os.path.join(PROJECT_ROOT, 'static')
 
+    # Batch requests (`POST /api/v1/batch`) limits; sub-requests are
+    # dispatched sequentially unless more than one worker thread is allowed.
+    BATCH_API_MAX_REQUESTS = 30
+    BATCH_API_WORKERS = 1
+
+    # Users bulk creation (`POST /api/v1/users/bulk`) limits: a maximum
+    # number of users per request, and a number of threads (shared by all
+    # the requests of a process) hashing passwords (`0` hashes passwords in
+    # the request thread). Large imports are done with `invoke app.users.import`.
+    USERS_BULK_MAX_USERS = 100
+    USERS_BULK_HASHING_THREADS = 4
+
+    # The teams change feed long polling re-checks the changes log at least
+    # this often (in seconds) to notice the changes committed by the other
+    # processes (the changes of the current process wake it up immediately)
+    TEAMS_CHANGES_POLL_INTERVAL = 5
+
     SWAGGER_UI_JSONEDITOR = True
     SWAGGER_UI_OAUTH_CLIENT_ID = 'documentation'
     SWAGGER_UI_OAUTH_REALM = "Authentication for Flask-RESTplus Example server documentation"
     SWAGGER_UI_OAUTH_APP_NAME = "Flask-RESTplus Example server documentation"
 
+    # Build and encode Swagger specs on the app creation instead of the first
+    # `swagger.json` request, or load them from a file exported with
+    # `invoke app.swagger.export --output=<path>`
+    SWAGGER_SPECS_PRECOMPUTE = False
+    SWAGGER_SPECS_PATH = None
+
+    # Collect per-request SQL statistics (`Server-Timing` header, logs and
+    # N+1 queries warnings)
+    SQL_INSTRUMENTATION = False
+    SQL_N_PLUS_ONE_THRESHOLD = 10
+
+    # Collect per-endpoint histograms of the request phases durations (auth,
+    # permission, resolve, parse, handler, dump)
+    REQUEST_PHASE_TIMING = False
+    REQUEST_PHASE_TIMING_SAMPLES = 1000
+
+    # Serve the collected metrics as JSON to the local clients only (it is
+    # opt-in, since behind a local reverse proxy all the clients are local)
+    METRICS_URL = None
+    METRICS_ALLOWED_REMOTE_ADDRS = ('127.0.0.1', '::1')
+
     # TODO: consider if these are relevant for this project
     SQLALCHEMY_TRACK_MODIFICATIONS = True
     CSRF_ENABLED = True
@@ -69,14 +130,44 @@ class BaseConfig(object):
 class ProductionConfig(BaseConfig):
     SECRET_KEY = os.getenv('EXAMPLE_API_SERVER_SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.getenv('EXAMPLE_API_SERVER_SQLALCHEMY_DATABASE_URI')
+    SQLALCHEMY_SQLITE_PROFILE = os.getenv('EXAMPLE_API_SERVER_SQLALCHEMY_SQLITE_PROFILE', 'wal')
+    SQLALCHEMY_POOL_OPTIONS = {
+        'pool_size': int(os.getenv('EXAMPLE_API_SERVER_SQLALCHEMY_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('EXAMPLE_API_SERVER_SQLALCHEMY_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.getenv('EXAMPLE_API_SERVER_SQLALCHEMY_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('EXAMPLE_API_SERVER_SQLALCHEMY_POOL_RECYCLE', 3600)),
+        'pool_pre_ping': os.getenv('EXAMPLE_API_SERVER_SQLALCHEMY_POOL_PRE_PING', 'true') == 'true',
+    }
+    SQLALCHEMY_POOL_METRICS = True
+    # Comma-separated list of read replicas URIs
+    SQLALCHEMY_BINDS = {
+        'replica_%d' % index: replica_uri
+        for index, replica_uri in enumerate(
+            os.getenv('EXAMPLE_API_SERVER_SQLALCHEMY_REPLICA_URIS', '').split(',')
+        )
+        if replica_uri
+    }
+    SQLALCHEMY_REPLICA_BINDS = tuple(sorted(SQLALCHEMY_BINDS))
+
+    SWAGGER_SPECS_PATH = os.getenv('EXAMPLE_API_SERVER_SWAGGER_SPECS_PATH')
 
 
 class DevelopmentConfig(BaseConfig):
     DEBUG = True
 
+    SQL_INSTRUMENTATION = True
+    REQUEST_PHASE_TIMING = True
+    SQLALCHEMY_POOL_METRICS = True
+    METRICS_URL = '/metrics'
+
 
 class TestingConfig(BaseConfig):
     TESTING = True
 
     # Use in-memory SQLite database for testing
     SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+    SQL_INSTRUMENTATION = True
+    REQUEST_PHASE_TIMING = True
+    SQLALCHEMY_POOL_METRICS = True
+    METRICS_URL = '/metrics'
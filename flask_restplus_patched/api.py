@@ -1,19 +1,88 @@
+import json
+
+import flask
 from flask import jsonify
 from flask_restplus import Api as OriginalApi
+from flask_restplus.api import SwaggerView as OriginalSwaggerView
 from flask_restplus._http import HTTPStatus
 from werkzeug import cached_property
 
+from .dispatch import compile_dispatcher
 from .namespace import Namespace
-from .swagger import Swagger
+from .swagger import EncodedSpecs, Swagger
+
+
+class SwaggerView(OriginalSwaggerView):
+    """
+    Serves the pre-encoded Swagger specifications (gzipped if a client
+    accepts it) with strong ETags, so the repeated requests are answered with
+    HTTP 304 Not Modified.
+    """
+
+    def get(self):
+        encoded_specs = self.api.get_encoded_specs()
+        if 'gzip' in flask.request.accept_encodings:
+            response = flask.Response(encoded_specs.gzipped_json, mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+            response.set_etag(encoded_specs.gzipped_json_etag)
+        else:
+            response = flask.Response(encoded_specs.json, mimetype='application/json')
+            response.set_etag(encoded_specs.json_etag)
+        response.vary.add('Accept-Encoding')
+        return response.make_conditional(flask.request)
 
 
 class Api(OriginalApi):
 
+    # Replace the stacks of the resource methods decorators with flat
+    # dispatchers on namespace registration (see `dispatch` module)
+    COMPILE_DISPATCHERS = True
+
     @cached_property
     def __schema__(self):
         # The only purpose of this method is to pass custom Swagger class
         return Swagger(self).as_dict()
 
+    def get_encoded_specs(self):
+        """
+        Get the Swagger specifications encoded for serving (they are built on
+        the first use unless they are precomputed or loaded).
+        """
+        encoded_specs = self.__dict__.get('_encoded_specs')
+        if encoded_specs is None:
+            encoded_specs = self._encoded_specs = EncodedSpecs(self.__schema__)
+        return encoded_specs
+
+    def load_specs(self, specs_file):
+        """
+        Use the Swagger specifications from a JSON file (e.g. exported on a
+        build stage) instead of building them.
+        """
+        self.__dict__['__schema__'] = json.load(specs_file)
+        self._encoded_specs = None
+
+    def invalidate_specs(self):
+        """
+        Drop the built (or loaded) Swagger specifications, so they get rebuilt
+        on the next use.
+        """
+        self.__dict__.pop('__schema__', None)
+        self._schema = None
+        self._encoded_specs = None
+
+    def _register_specs(self, app_or_blueprint):
+        # The only purpose of this method is to pass custom SwaggerView class
+        if self._add_specs:
+            endpoint = str('specs')
+            self._register_view(
+                app_or_blueprint,
+                SwaggerView,
+                '/swagger.json',
+                endpoint=endpoint,
+                resource_class_args=(self, )
+            )
+            self.endpoints.add(endpoint)
+
     def init_app(self, app, **kwargs):
         # This solves the issue of late resources registration:
         # https://github.com/frol/flask-restplus-server-example/issues/110
@@ -23,6 +92,26 @@ class Api(OriginalApi):
         super(Api, self).init_app(app, **kwargs)
         app.errorhandler(HTTPStatus.UNPROCESSABLE_ENTITY.value)(handle_validation_error)
 
+    def add_namespace(self, ns, path=None):
+        super(Api, self).add_namespace(ns, path=path)
+        self.invalidate_specs()
+
+    def register_resource(self, namespace, resource, *urls, **kwargs):
+        # NOTE: The dispatchers are compiled per resource (rather than in
+        # `add_namespace`), so the resources which are added to an already
+        # registered namespace (e.g. by another module) are covered as well.
+        if self.COMPILE_DISPATCHERS:
+            for method in resource.methods:
+                method_name = method.lower()
+                method_func = getattr(resource, method_name)
+                if hasattr(method_func, '__dispatch_steps__'):
+                    # The resource is registered in several APIs
+                    continue
+                dispatcher = compile_dispatcher(method_func)
+                if dispatcher is not None:
+                    setattr(resource, method_name, dispatcher)
+        return super(Api, self).register_resource(namespace, resource, *urls, **kwargs)
+
     def namespace(self, *args, **kwargs):
         # The only purpose of this method is to pass a custom Namespace class
         _namespace = Namespace(*args, **kwargs)
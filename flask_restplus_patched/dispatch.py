@@ -0,0 +1,271 @@
+# encoding: utf-8
+"""
+Compiled resource methods dispatchers
+-------------------------------------
+
+Every decorator of the resource methods (authentication, permissions,
+objects resolution, arguments parsing, response serialization) wraps the
+method into yet another closure, so a single request goes through a stack of
+Python frames repacking ``*args`` and ``**kwargs`` on every level.
+
+Namespace decorators record the semantics of their wrappers as
+:class:`DispatchStep` instances, so once the resources are complete (on
+``Api.add_namespace``) the stack of wrappers can be replaced with a single
+flat dispatcher, which runs all the ``before`` hooks, calls the original
+method, and runs all the ``after`` hooks.
+
+A wrapper which has not recorded its step (e.g. a custom decorator) simply
+stops the flattening, and gets called as the "handler" with all the nested
+decorators left intact.
+"""
+from functools import update_wrapper
+import weakref
+
+import flask
+from flask_restplus._http import HTTPStatus
+
+from . import timing
+
+
+# NOTE: The steps are not stored as the wrappers attributes since
+# ``functools.wraps`` copies the attributes of the wrapped functions.
+_dispatch_steps = weakref.WeakKeyDictionary()  # pylint: disable=invalid-name
+
+
+class DispatchResponse(Exception):
+    """
+    Raised from :meth:`DispatchStep.before` to respond immediately with a
+    given response (the way a wrapper returns without calling the wrapped
+    function).
+    """
+
+    def __init__(self, response):
+        super(DispatchResponse, self).__init__()
+        self.response = response
+
+
+class DispatchStep(object):
+    """
+    The semantics of a single decorator wrapper.
+
+    Arguments:
+        func (callable) - the function wrapped by the decorator.
+    """
+
+    phase = None
+    has_before = False
+    has_after = False
+
+    def __init__(self, func):
+        self.func = func
+
+    def before(self, args, kwargs):
+        """
+        Process the arguments before calling the wrapped function, and return
+        the positional arguments (``kwargs`` are updated in-place).
+        """
+        return args
+
+    def after(self, response, args):
+        """
+        Process the value returned from the wrapped function.
+        """
+        # pylint: disable=unused-argument
+        return response
+
+
+class ResolveObjectStep(DispatchStep):
+    """
+    Resolves an object from the arguments (see ``Namespace.resolve_object``).
+    """
+
+    phase = 'resolve'
+    has_before = True
+
+    def __init__(self, func, object_arg_name, resolver):
+        super(ResolveObjectStep, self).__init__(func)
+        self.object_arg_name = object_arg_name
+        self.resolver = resolver
+
+    def before(self, args, kwargs):
+        kwargs[self.object_arg_name] = self.resolver(kwargs)
+        return args
+
+
+class ParseArgsStep(DispatchStep):
+    """
+    Parses the request arguments exactly like webargs ``use_args`` does, and
+    appends them to the positional arguments.
+    """
+
+    phase = 'parse'
+    has_before = True
+
+    def __init__(self, func, parser, argmap, locations):
+        super(ParseArgsStep, self).__init__(func)
+        self.parser = parser
+        self.argmap = argmap
+        self.locations = locations or parser.locations
+
+    def before(self, args, kwargs):
+        parsed_args = self.parser.parse(
+            self.argmap,
+            req=self.parser.get_request_from_view_args(self.func, args, kwargs),
+            locations=self.locations
+        )
+        return args + (parsed_args, )
+
+
+class DumpResponseStep(DispatchStep):
+    """
+    Serializes the response (see ``Namespace.response``).
+    """
+
+    phase = 'dump'
+    has_before = True
+    has_after = True
+
+    def __init__(self, func, namespace, model, code):
+        super(DumpResponseStep, self).__init__(func)
+        self.namespace = namespace
+        self.model = model
+        self.code = code
+
+    def before(self, args, kwargs):
+        self.namespace.validate_sparse_fieldset(self.model)
+        return args
+
+    def after(self, response, args):
+        # pylint: disable=protected-access
+        return self.namespace._dump_response(response, self.model, self.code)
+
+
+class PreflightOptionsStep(DispatchStep):
+    """
+    Responds to CORS preflight requests (see
+    ``Namespace.preflight_options_handler``).
+    """
+
+    has_before = True
+
+    def before(self, args, kwargs):
+        if 'Access-Control-Request-Method' in flask.request.headers:
+            response = flask.Response(status=HTTPStatus.OK)
+            response.headers['Access-Control-Allow-Methods'] = ", ".join(args[0].methods)
+            raise DispatchResponse(response)
+        return args
+
+
+def record_dispatch_step(wrapper, step):
+    """
+    Record the semantics of ``wrapper`` function.
+    """
+    _dispatch_steps[wrapper] = step
+    return wrapper
+
+
+def get_dispatch_step(func):
+    """
+    Get a recorded step of ``func`` wrapper, or ``None``.
+    """
+    try:
+        return _dispatch_steps.get(func)
+    except TypeError:
+        # Not weak-referenceable objects cannot have recorded steps
+        return None
+
+
+def _timed_hook(hook, phase):
+    def timed_hook(*args):
+        # pylint: disable=missing-docstring
+        with timing.span(phase):
+            return hook(*args)
+    return timed_hook
+
+
+def compile_dispatcher(method_func):
+    """
+    Build a flat dispatcher of a decorated resource method, or return
+    ``None`` if there are no recorded steps to flatten.
+    """
+    steps = []
+    handler = method_func
+    step = get_dispatch_step(handler)
+    while step is not None:
+        steps.append(step)
+        handler = step.func
+        step = get_dispatch_step(handler)
+    if not steps:
+        return None
+
+    before_steps_indices = tuple(index for index, step in enumerate(steps) if step.has_before)
+
+    def get_hooks(timed):
+        """
+        Prebind the hooks (so the dispatcher doesn't do any attribute
+        lookups), optionally wrapped into their phases timing spans.
+        """
+        def get_hook(step, hook):
+            if timed and step.phase is not None:
+                return _timed_hook(hook, step.phase)
+            return hook
+
+        before_hooks = tuple(
+            get_hook(steps[index], steps[index].before) for index in before_steps_indices
+        )
+        # Every ``after`` hook receives the positional arguments the way its
+        # wrapper has received them, i.e. processed by the outer ``before``
+        # hooks.
+        after_hooks = tuple(
+            (
+                index,
+                sum(1 for before_index in before_steps_indices if before_index < index),
+                get_hook(step, step.after),
+            )
+            for index, step in reversed(list(enumerate(steps)))
+            if step.has_after
+        )
+        return before_hooks, after_hooks
+
+    # NOTE: The phases timing is enabled per application (see
+    # ``timing.start_phase_timer``), so the timed hooks are chosen per call.
+    untimed_hooks = get_hooks(timed=False)
+    timed_hooks = get_hooks(timed=True)
+
+    def dispatcher(*args, **kwargs):
+        # pylint: disable=missing-docstring
+        before_hooks, after_hooks = (
+            untimed_hooks if timing.get_phase_timer() is None else timed_hooks
+        )
+        layers_args = [args]
+        try:
+            for before in before_hooks:
+                args = before(args, kwargs)
+                layers_args.append(args)
+        except DispatchResponse as dispatch_response:
+            # The early response is still processed by the outer wrappers.
+            responding_step_index = before_steps_indices[len(layers_args) - 1]
+            response = dispatch_response.response
+            for index, args_index, after in after_hooks:
+                if index < responding_step_index:
+                    response = after(response, layers_args[args_index])
+            return response
+
+        response = handler(*args, **kwargs)
+        for _, args_index, after in after_hooks:
+            response = after(response, layers_args[args_index])
+        return response
+
+    if not before_steps_indices:
+        def dispatcher(*args, **kwargs):
+            # pylint: disable=missing-docstring,function-redefined
+            _, after_hooks = untimed_hooks if timing.get_phase_timer() is None else timed_hooks
+            response = handler(*args, **kwargs)
+            for _, _, after in after_hooks:
+                response = after(response, args)
+            return response
+
+    update_wrapper(dispatcher, method_func)
+    dispatcher.__dispatch_steps__ = tuple(steps)
+    dispatcher.__dispatch_handler__ = handler
+    return dispatcher
@@ -1,3 +1,6 @@
+from collections import OrderedDict
+import threading
+
 from apispec.ext.marshmallow.swagger import fields2jsonschema, field2property
 import flask_marshmallow
 from werkzeug import cached_property
@@ -5,6 +8,13 @@ from werkzeug import cached_property
 from flask_restplus.model import Model as OriginalModel
 
 
+# A maximum number of the cached sparse copies of a schema (the fieldsets are
+# chosen by the clients, so the least recently used ones are evicted)
+MAX_SPARSE_SCHEMAS = 32
+
+_sparse_schemas_lock = threading.Lock()  # pylint: disable=invalid-name
+
+
 class SchemaMixin(object):
 
     def __deepcopy__(self, memo):
@@ -12,14 +22,89 @@ class SchemaMixin(object):
         # marshmallow.Schema doesn't support deepcopyng.
         return self
 
+    def sparse(self, only):
+        """
+        Get a copy of the schema which dumps only the ``only`` fields.
+
+        The copies are cached per fieldset (regardless of the fields order and
+        duplicates) in a bounded LRU cache, so marshmallow fields binding is
+        not repeated on every request.
+        """
+        only = tuple(sorted(set(only)))
+        with _sparse_schemas_lock:
+            sparse_schemas = self.__dict__.setdefault('_sparse_schemas', OrderedDict())
+            sparse_schema = sparse_schemas.pop(only, None)
+            if sparse_schema is None:
+                sparse_schema = self.__class__(
+                    only=only,
+                    many=self.many,
+                    context=self.context,
+                )
+                if len(sparse_schemas) >= MAX_SPARSE_SCHEMAS:
+                    sparse_schemas.popitem(last=False)
+            sparse_schemas[only] = sparse_schema
+        return sparse_schema
+
 
 class Schema(SchemaMixin, flask_marshmallow.Schema):
     pass
 
 
 if flask_marshmallow.has_sqla:
+    import sqlalchemy
+    from sqlalchemy.orm import load_only
+
+    def get_load_only_options(model, field_names, field_columns=None):
+        """
+        Get SQLAlchemy loader options which load only the columns required to
+        access ``field_names`` attributes of ``model`` instances.
+
+        Primary keys and local foreign keys of the accessed relationships are
+        always loaded. An empty tuple is returned when any of the fields cannot
+        be mapped to columns (e.g. it is a plain Python property), so the
+        query is left as is.
+
+        Arguments:
+            model (type) - SQLAlchemy model class.
+            field_names (iterable) - names of the attributes to be accessed.
+            field_columns (dict) - extra mapping of non-column attribute names
+                to a tuple of column names they depend on.
+        """
+        mapper = sqlalchemy.inspect(model)
+        column_keys = {prop.columns[0]: prop.key for prop in mapper.column_attrs}
+        column_names = set(column_keys[column] for column in mapper.primary_key)
+        for field_name in field_names:
+            if field_columns and field_name in field_columns:
+                column_names.update(field_columns[field_name])
+            elif field_name in mapper.column_attrs:
+                column_names.add(field_name)
+            elif field_name in mapper.relationships:
+                column_names.update(
+                    column_keys[column]
+                    for column in mapper.relationships[field_name].local_columns
+                    if column in column_keys
+                )
+            else:
+                return ()
+        return (load_only(*column_names), )
+
+
     class ModelSchema(SchemaMixin, flask_marshmallow.sqla.ModelSchema):
-        pass
+
+        def get_query_options(self):
+            """
+            Get SQLAlchemy loader options which load only the columns needed
+            to dump the schema fields, so the rest (e.g. ``password`` hashes)
+            are neither fetched nor unpacked.
+
+            Non-column fields can declare the columns they depend on in
+            ``Meta.field_columns`` dict.
+            """
+            return get_load_only_options(
+                self.opts.model,
+                self.fields.keys(),
+                field_columns=getattr(self.Meta, 'field_columns', None)
+            )
 
 
 class DefaultHTTPErrorSchema(Schema):
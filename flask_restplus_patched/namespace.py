@@ -3,18 +3,47 @@ from functools import wraps
 import flask
 import flask_marshmallow
 from flask_restplus import Namespace as OriginalNamespace
-from flask_restplus.utils import merge, unpack
+from flask_restplus.errors import abort
+from flask_restplus.utils import unpack
 from flask_restplus._http import HTTPStatus
 from webargs.flaskparser import parser as webargs_parser
 from werkzeug import cached_property, exceptions as http_exceptions
 
-from .model import Model, DefaultHTTPErrorSchema
+from . import dispatch, timing
+from .model import Model, DefaultHTTPErrorSchema, SchemaMixin
+
+try:
+    from sqlalchemy.orm import Query
+except ImportError:
+    Query = None
+
+
+def merge_apidoc(first, second):
+    """
+    Recursively merge two API documentation dictionaries.
+
+    In contrast to ``flask_restplus.utils.merge``, the values are not
+    deep-copied (only the dictionaries on the merged paths are copied), since
+    the documented schemas are expensive to copy and they are never mutated.
+    """
+    if not isinstance(second, dict):
+        return second
+    result = dict(first)
+    for key, value in second.items():
+        if isinstance(result.get(key), dict):
+            result[key] = merge_apidoc(result[key], value)
+        else:
+            result[key] = value
+    return result
 
 
 class Namespace(OriginalNamespace):
 
     WEBARGS_PARSER = webargs_parser
 
+    # Query argument name holding a comma-separated list of response fields
+    SPARSE_FIELDSET_ARG_NAME = 'fields'
+
     def _handle_api_doc(self, cls, doc):
         if doc is False:
             cls.__apidoc__ = False
@@ -29,7 +58,89 @@ class Namespace(OriginalNamespace):
         ##        handle_deprecations(doc[key])
         ##        if 'expect' in doc[key] and not isinstance(doc[key]['expect'], (list, tuple)):
         ##            doc[key]['expect'] = [doc[key]['expect']]
-        cls.__apidoc__ = merge(getattr(cls, '__apidoc__', {}), doc)
+        cls.__apidoc__ = merge_apidoc(getattr(cls, '__apidoc__', {}), doc)
+
+    def get_sparse_fieldset(self):
+        """
+        Get a tuple of field names requested by a client in ``?fields=``
+        query argument, or ``None`` if the whole objects are requested.
+        """
+        if not flask.has_request_context():
+            return None
+        fieldset = flask.request.args.get(self.SPARSE_FIELDSET_ARG_NAME)
+        if not fieldset:
+            return None
+        field_names = []
+        for field_name in fieldset.split(','):
+            field_name = field_name.strip()
+            if field_name and field_name not in field_names:
+                field_names.append(field_name)
+        return tuple(field_names) or None
+
+    def validate_sparse_fieldset(self, schema):
+        """
+        Reject the fields requested by a client which the response schema
+        doesn't have.
+
+        It is called before the resource method, so the requests with a
+        mistyped fieldset don't get their writes done only to fail on the
+        response serialization.
+        """
+        if not isinstance(schema, SchemaMixin):
+            return
+        field_names = self.get_sparse_fieldset()
+        if field_names is None:
+            return
+        unknown_field_names = set(field_names) - set(schema.fields)
+        if unknown_field_names:
+            abort(
+                code=HTTPStatus.BAD_REQUEST,
+                status=HTTPStatus.BAD_REQUEST,
+                message="Unknown field(s) requested: %s" % ', '.join(sorted(unknown_field_names))
+            )
+
+    def _get_sparse_schema(self, schema):
+        """
+        Restrict the response schema to the fields requested by a client.
+        """
+        field_names = self.get_sparse_fieldset()
+        if field_names is None:
+            return schema
+        self.validate_sparse_fieldset(schema)
+        return schema.sparse(field_names)
+
+    def _dump_response(self, response, model, code):
+        """
+        Serialize a value returned from a resource method with a given model
+        if the returned HTTP status matches the documented ``code``.
+        """
+        extra_headers = None
+
+        if response is None:
+            if model is not None:
+                raise ValueError("Response cannot not be None with HTTP status %d" % code)
+            return flask.Response(status=code)
+        elif isinstance(response, flask.Response) or model is None:
+            return response
+        elif isinstance(response, tuple):
+            response, _code, extra_headers = unpack(response)
+        else:
+            _code = code
+
+        if HTTPStatus(_code) is code:
+            dump_schema = model
+            if isinstance(model, SchemaMixin):
+                dump_schema = self._get_sparse_schema(model)
+                if (
+                        Query is not None
+                        and
+                        isinstance(response, Query)
+                        and
+                        hasattr(dump_schema, 'get_query_options')
+                ):
+                    response = response.options(*dump_schema.get_query_options())
+            response = dump_schema.dump(response).data
+        return response, _code, extra_headers
 
     def resolve_object(self, object_arg_name, resolver):
         """
@@ -54,9 +165,13 @@ class Namespace(OriginalNamespace):
 
             @wraps(func_or_class)
             def wrapper(*args, **kwargs):
-                kwargs[object_arg_name] = resolver(kwargs)
+                with timing.span('resolve'):
+                    kwargs[object_arg_name] = resolver(kwargs)
                 return func_or_class(*args, **kwargs)
-            return wrapper
+            return dispatch.record_dispatch_step(
+                wrapper,
+                dispatch.ResolveObjectStep(func_or_class, object_arg_name, resolver)
+            )
         return decorator
 
     def model(self, name=None, model=None, mask=None, **kwargs):
@@ -83,12 +198,17 @@ class Namespace(OriginalNamespace):
             if _locations is not None:
                 parameters.context['in'] = _locations
 
+            parsing_func = timing.timed(
+                'parse',
+                self.WEBARGS_PARSER.use_args(parameters, locations=_locations)
+            )(func)
+            dispatch.record_dispatch_step(
+                parsing_func,
+                dispatch.ParseArgsStep(func, self.WEBARGS_PARSER, parameters, _locations)
+            )
+
             return self.doc(params=parameters)(
-                self.response(code=HTTPStatus.UNPROCESSABLE_ENTITY)(
-                    self.WEBARGS_PARSER.use_args(parameters, locations=_locations)(
-                        func
-                    )
-                )
+                self.response(code=HTTPStatus.UNPROCESSABLE_ENTITY)(parsing_func)
             )
 
         return decorator
@@ -108,6 +228,11 @@ class Namespace(OriginalNamespace):
             code (int) - HTTP status code which is documented.
             description (str)
 
+        Successful responses of Schema-based models can be restricted to a
+        subset of fields with ``?fields=id,title`` query argument. When the
+        decorated function returns a non-evaluated SQLAlchemy Query, it gets
+        only the necessary columns loaded.
+
         Example:
         >>> @namespace.response(BaseTeamSchema(many=True))
         ... @namespace.response(code=HTTPStatus.FORBIDDEN)
@@ -136,26 +261,19 @@ class Namespace(OriginalNamespace):
             """
             def dump_wrapper(*args, **kwargs):
                 # pylint: disable=missing-docstring
+                self.validate_sparse_fieldset(model)
                 response = func(*args, **kwargs)
-                extra_headers = None
-
-                if response is None:
-                    if model is not None:
-                        raise ValueError("Response cannot not be None with HTTP status %d" % code)
-                    return flask.Response(status=code)
-                elif isinstance(response, flask.Response) or model is None:
-                    return response
-                elif isinstance(response, tuple):
-                    response, _code, extra_headers = unpack(response)
-                else:
-                    _code = code
-
-                if HTTPStatus(_code) is code:
-                    response = model.dump(response).data
-                return response, _code, extra_headers
+                with timing.span('dump'):
+                    return self._dump_response(response, model, code)
 
             return dump_wrapper
 
+        def record_dump_step(dump_wrapper, func):
+            return dispatch.record_dispatch_step(
+                dump_wrapper,
+                dispatch.DumpResponseStep(func, self, model, code)
+            )
+
         def decorator(func_or_class):
             if code.value in http_exceptions.default_exceptions:
                 # If the code is handled by raising an exception, it will
@@ -165,11 +283,14 @@ class Namespace(OriginalNamespace):
             elif isinstance(func_or_class, type):
                 # Handle Resource classes decoration
                 # pylint: disable=protected-access
-                func_or_class._apply_decorator_to_methods(response_serializer_decorator)
+                func_or_class._apply_decorator_to_methods(
+                    lambda func: record_dump_step(response_serializer_decorator(func), func)
+                )
                 decorated_func_or_class = func_or_class
             else:
-                decorated_func_or_class = wraps(func_or_class)(
-                    response_serializer_decorator(func_or_class)
+                decorated_func_or_class = record_dump_step(
+                    wraps(func_or_class)(response_serializer_decorator(func_or_class)),
+                    func_or_class
                 )
 
             if model is None:
@@ -201,7 +322,7 @@ class Namespace(OriginalNamespace):
                 return response
             return func(self, *args, **kwargs)
 
-        return wrapper
+        return dispatch.record_dispatch_step(wrapper, dispatch.PreflightOptionsStep(func))
 
     def route(self, *args, **kwargs):
         base_wrapper = super(Namespace, self).route(*args, **kwargs)
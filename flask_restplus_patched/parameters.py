@@ -113,29 +113,77 @@ class PatchJSONParameters(Parameters):
         else:
             data['field_name'] = data['path'][1:]
 
+    @classmethod
+    def _get_patch_plan(cls):
+        """
+        Get a dispatch table of the allowed ``(op, path)`` pairs to the
+        ``(operation_method, field_name)`` pairs.
+
+        The table is compiled once per Parameters class, so patching doesn't
+        need to validate and parse the operations over and over again.
+        """
+        patch_plan = cls.__dict__.get('_patch_plan')
+        if patch_plan is None:
+            patch_plan = {
+                (operation, path): (getattr(cls, operation), path[1:])
+                for operation in cls.OPERATION_CHOICES
+                for path in cls.PATH_CHOICES
+            }
+            cls._patch_plan = patch_plan
+        return patch_plan
+
     @classmethod
     def perform_patch(cls, operations, obj, state=None):
         """
         Performs all necessary operations by calling class methods with
         corresponding names.
+
+        The operations are resolved against the compiled patch plan before
+        any of them is performed, so a patch with an unsupported operation
+        doesn't leave any changes on ``obj``. The resolved steps are then
+        performed in the document order (RFC 6902), so a ``test`` operation
+        checks the value left by the preceding operations. The changes are
+        applied in memory, and it is up to the caller to flush them (e.g. by
+        committing the session the object is attached to) or to roll them
+        back when the patch fails.
         """
         if state is None:
             state = {}
+        patch_plan = cls._get_patch_plan()
+
+        patch_steps = []
         for operation in operations:
-            if not cls._process_patch_operation(operation, obj=obj, state=state):
-                log.info(
-                    "%s patching has been stopped because of unknown operation %s",
-                    obj.__class__.__name__,
-                    operation
-                )
-                raise ValidationError(
-                    "Failed to update %s details. Operation %s could not succeed." % (
-                        obj.__class__.__name__,
-                        operation
-                    )
-                )
+            step = patch_plan.get((operation['op'], operation['path']))
+            if step is None:
+                cls._reject_patch_operation(operation, obj)
+            patch_steps.append((step, operation))
+
+        for step, operation in patch_steps:
+            if not cls._perform_patch_step(step, operation, obj=obj, state=state):
+                cls._reject_patch_operation(operation, obj)
         return True
 
+    @classmethod
+    def _reject_patch_operation(cls, operation, obj):
+        log.info(
+            "%s patching has been stopped because of unknown operation %s",
+            obj.__class__.__name__,
+            operation
+        )
+        raise ValidationError(
+            "Failed to update %s details. Operation %s could not succeed." % (
+                obj.__class__.__name__,
+                operation
+            )
+        )
+
+    @classmethod
+    def _perform_patch_step(cls, step, operation, obj, state):
+        operation_method, field_name = step
+        if operation['op'] in cls.NO_VALUE_OPERATIONS:
+            return operation_method(obj, field_name, state=state)
+        return operation_method(obj, field_name, operation['value'], state=state)
+
     @classmethod
     def _process_patch_operation(cls, operation, obj, state):
         """
@@ -147,27 +195,10 @@ class PatchJSONParameters(Parameters):
         Returns:
             processing_status (bool): True if operation was handled, otherwise False.
         """
-        field_operaion = operation['op']
-
-        if field_operaion == cls.OP_REPLACE:
-            return cls.replace(obj, operation['field_name'], operation['value'], state=state)
-
-        elif field_operaion == cls.OP_TEST:
-            return cls.test(obj, operation['field_name'], operation['value'], state=state)
-
-        elif field_operaion == cls.OP_ADD:
-            return cls.add(obj, operation['field_name'], operation['value'], state=state)
-
-        elif field_operaion == cls.OP_MOVE:
-            return cls.move(obj, operation['field_name'], operation['value'], state=state)
-
-        elif field_operaion == cls.OP_COPY:
-            return cls.copy(obj, operation['field_name'], operation['value'], state=state)
-
-        elif field_operaion == cls.OP_REMOVE:
-            return cls.remove(obj, operation['field_name'], state=state)
-
-        return False
+        step = cls._get_patch_plan().get((operation['op'], operation['path']))
+        if step is None:
+            return False
+        return cls._perform_patch_step(step, operation, obj=obj, state=state)
 
     @classmethod
     def replace(cls, obj, field, value, state):
@@ -5,6 +5,8 @@ from flask_restplus import Resource as OriginalResource
 from flask_restplus._http import HTTPStatus
 from werkzeug.exceptions import HTTPException
 
+from . import timing
+
 
 class Resource(OriginalResource):
     """
@@ -28,6 +30,11 @@ class Resource(OriginalResource):
             decorated_method_func = decorator(getattr(cls, method_name))
             setattr(cls, method_name, decorated_method_func)
 
+    def dispatch_request(self, *args, **kwargs):
+        # The time not claimed by the decorators phases is the handler's time.
+        with timing.span(timing.HANDLER_PHASE):
+            return super(Resource, self).dispatch_request(*args, **kwargs)
+
     def options(self, *args, **kwargs):
         """
         Check which methods are allowed.
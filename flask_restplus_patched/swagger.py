@@ -1,3 +1,7 @@
+from hashlib import sha1
+import json
+import zlib
+
 from apispec.ext.marshmallow.swagger import schema2parameters
 from flask_restplus.swagger import Swagger as OriginalSwagger
 
@@ -19,3 +23,20 @@ class Swagger(OriginalSwagger):
         else:
             default_location = 'query'
         return schema2parameters(schema, default_in=default_location, required=True)
+
+
+class EncodedSpecs(object):
+    """
+    Swagger specifications pre-encoded into JSON bytes (plain and gzipped)
+    with strong ETags of both representations.
+    """
+
+    def __init__(self, schema):
+        self.json = json.dumps(schema, separators=(',', ':')).encode('utf-8')
+        self.json_etag = sha1(self.json).hexdigest()
+
+        # `wbits=31` produces gzip format (it works on Python 2, in contrast
+        # to `gzip.compress`)
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+        self.gzipped_json = compressor.compress(self.json) + compressor.flush()
+        self.gzipped_json_etag = '%s-gzip' % self.json_etag
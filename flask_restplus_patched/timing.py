@@ -0,0 +1,134 @@
+# encoding: utf-8
+"""
+Request phases timing
+---------------------
+
+Lightweight timing spans for the phases of a request handling pipeline
+(authentication, permission checks, objects resolution, arguments parsing,
+the handler itself and response serialization).
+
+Every moment of a request is attributed to exactly one phase (the innermost
+active span), so the phase durations add up to the total handling time.
+
+Timing is enabled per application: the requests of an application are timed
+only if it starts a phase timer with :func:`start_phase_timer` (e.g. in a
+``before_request`` hook), otherwise spans are shared no-op objects.
+"""
+from functools import wraps
+from timeit import default_timer
+
+import flask
+
+
+HANDLER_PHASE = 'handler'
+
+class PhaseTimer(object):
+    """
+    Accumulates (exclusive) durations of request phases.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self._stack = []
+        self._last_switch_time = None
+
+    def _switch(self):
+        now = default_timer()
+        if self._stack:
+            phase = self._stack[-1]
+            self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last_switch_time
+        self._last_switch_time = now
+
+    def push(self, phase):
+        # pylint: disable=missing-docstring
+        self._switch()
+        self._stack.append(phase)
+
+    def pop(self):
+        # pylint: disable=missing-docstring
+        self._switch()
+        self._stack.pop()
+
+
+def start_phase_timer():
+    """
+    Start collecting phase timings for the current request.
+    """
+    flask.g.phase_timer = PhaseTimer()
+
+
+def get_phase_timer():
+    """
+    Get the phase timer of the current request, or ``None`` if the request
+    is not timed.
+    """
+    if not flask.has_app_context():
+        return None
+    return flask.g.get('phase_timer')
+
+
+class _Span(object):
+    # pylint: disable=too-few-public-methods
+
+    __slots__ = ('phase', 'timer')
+
+    def __init__(self, phase, timer):
+        self.phase = phase
+        self.timer = timer
+
+    def __enter__(self):
+        self.timer.push(self.phase)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.timer.pop()
+
+
+class _NoopSpan(object):
+    # pylint: disable=too-few-public-methods
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(phase):
+    """
+    A context manager attributing the time spent inside it to ``phase``.
+
+    Example:
+    >>> with span('dump'):
+    ...     data = schema.dump(obj).data
+    """
+    timer = get_phase_timer()
+    if timer is None:
+        return _NOOP_SPAN
+    return _Span(phase, timer)
+
+
+def timed(phase, decorator):
+    """
+    Apply a (third-party) ``decorator`` attributing the time spent in its own
+    code to ``phase``, while the time spent in the decorated function still
+    goes to the inner phases.
+    """
+    def timed_decorator(func):
+        # pylint: disable=missing-docstring
+        @wraps(func)
+        def resumed_func(*args, **kwargs):
+            with span(HANDLER_PHASE):
+                return func(*args, **kwargs)
+
+        decorated_func = decorator(resumed_func)
+
+        @wraps(decorated_func)
+        def wrapper(*args, **kwargs):
+            with span(phase):
+                return decorated_func(*args, **kwargs)
+        return wrapper
+
+    return timed_decorator
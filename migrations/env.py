@@ -1,6 +1,7 @@
 from __future__ import with_statement
 from alembic import context
-from sqlalchemy import engine_from_config, pool
+from sqlalchemy import engine_from_config, event, pool
+from sqlalchemy.schema import DropTable
 from logging.config import fileConfig
 import logging
 
@@ -53,6 +54,48 @@ def run_migrations_offline():
         context.run_migrations()
 
 
+def restore_sqlite_foreign_keys(connection):
+    """
+    Every migration runs in its own transaction (SQLite DDL is not
+    transactional in Alembic), which starts with the foreign keys enforced
+    even if the previous migration has disabled them.
+    """
+    connection.connection.execute('PRAGMA foreign_keys=ON')
+
+
+def check_sqlite_table_drop(connection, clauseelement, multiparams, params):
+    """
+    Batch operations recreate SQLite tables, and dropping the original table
+    deletes (or fails on) the rows which reference it if the foreign keys are
+    enforced, so such migrations have to start with
+    ``PRAGMA foreign_keys=OFF`` (it is a no-op inside a transaction, i.e.
+    after the data statements of a migration).
+    """
+    if not isinstance(clauseelement, DropTable):
+        return
+    dbapi_connection = connection.connection
+    if not dbapi_connection.execute('PRAGMA foreign_keys').fetchone()[0]:
+        return
+    table_name = clauseelement.element.name
+    tables_names = dbapi_connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'"
+    ).fetchall()
+    for referencing_table_name, in tables_names:
+        if referencing_table_name == table_name:
+            continue
+        foreign_keys = dbapi_connection.execute(
+            'PRAGMA foreign_key_list("%s")' % referencing_table_name
+        ).fetchall()
+        if any(foreign_key[2] == table_name for foreign_key in foreign_keys):
+            raise RuntimeError(
+                "Table \"%s\" referenced by \"%s\" cannot be dropped (or recreated by batch "
+                "operations) while the foreign keys are enforced" % (
+                    table_name,
+                    referencing_table_name
+                )
+            )
+
+
 def run_migrations_online():
     """Run migrations in 'online' mode.
 
@@ -71,14 +114,33 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # this callback is used to skip the database objects which are not
+    # declared in the models metadata, so autogenerate doesn't drop them
+    def include_object(object_, name, type_, reflected, compare_to):
+        if not reflected or compare_to is not None:
+            return True
+        if type_ == 'table' and name.startswith('sqlite_'):
+            # SQLite internal tables (e.g. `sqlite_sequence` of AUTOINCREMENT)
+            return False
+        from app.modules.users.search import is_search_schema_object
+        return not is_search_schema_object(name, type_)
+
     engine = engine_from_config(config.get_section(config.config_ini_section),
                                 prefix='sqlalchemy.',
                                 poolclass=pool.NullPool)
+    # SQLite connections get the pragmas of the application (e.g. the foreign
+    # keys enforcement, so ON DELETE CASCADE applies to data migrations too)
+    from app.extensions.flask_sqlalchemy import listen_sqlite_pragmas
+    listen_sqlite_pragmas(engine, current_app.config['SQLALCHEMY_SQLITE_PROFILE'])
 
     connection = engine.connect()
+    if connection.dialect.name == 'sqlite':
+        event.listen(connection, 'begin', restore_sqlite_foreign_keys)
+        event.listen(connection, 'before_execute', check_sqlite_table_drop)
     context.configure(connection=connection,
                       target_metadata=target_metadata,
                       process_revision_directives=process_revision_directives,
+                      include_object=include_object,
                       **current_app.extensions['migrate'].configure_args)
 
     try:
@@ -0,0 +1,40 @@
+"""Add partial indexes for the users static roles filters
+
+Revision ID: 0c47c1e3bc6a
+Revises: 5c52ff116e31
+Create Date: 2026-10-19 19:02:37.118254
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '0c47c1e3bc6a'
+down_revision = '5c52ff116e31'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# NOTE: The predicates have to stay the same as `User.is_*` hybrid properties
+# expressions, so the query planners can use the indexes.
+PARTIAL_INDEXES = (
+    ('ix_user_is_admin', '(static_roles & 16384) != 0'),
+    ('ix_user_is_internal', '(static_roles & 32768) != 0'),
+    ('ix_user_is_not_active', '(static_roles & 4096) = 0'),
+)
+
+
+def upgrade():
+    for index_name, predicate in PARTIAL_INDEXES:
+        op.create_index(
+            index_name,
+            'user',
+            ['id'],
+            unique=False,
+            postgresql_where=sa.text(predicate),
+            sqlite_where=sa.text(predicate)
+        )
+
+
+def downgrade():
+    for index_name, _ in reversed(PARTIAL_INDEXES):
+        op.drop_index(index_name, table_name='user')
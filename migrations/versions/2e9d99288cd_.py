@@ -14,7 +14,15 @@ from alembic import op
 import sqlalchemy as sa
 
 
+def _disable_sqlite_foreign_keys():
+    # The batch operations recreate the `user` table, which is referenced by
+    # other tables (see `migrations/env.py`)
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('PRAGMA foreign_keys=OFF')
+
+
 def upgrade():
+    _disable_sqlite_foreign_keys()
     ### commands auto generated by Alembic - please adjust! ###
     with op.batch_alter_table('user') as batch_op:
         batch_op.alter_column('created',
@@ -27,6 +35,7 @@ def upgrade():
 
 
 def downgrade():
+    _disable_sqlite_foreign_keys()
     ### commands auto generated by Alembic - please adjust! ###
     with op.batch_alter_table('user') as batch_op:
         batch_op.alter_column('updated',
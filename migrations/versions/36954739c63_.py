@@ -17,7 +17,15 @@ import sqlalchemy as sa
 import sqlalchemy_utils
 
 
+def _disable_sqlite_foreign_keys():
+    # The batch operations recreate the `user` table, which is referenced by
+    # other tables (see `migrations/env.py`)
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('PRAGMA foreign_keys=OFF')
+
+
 def upgrade():
+    _disable_sqlite_foreign_keys()
     ### commands auto generated by Alembic - please adjust! ###
     op.add_column('user', sa.Column('created', sa.DateTime(), nullable=True))
     op.add_column('user', sa.Column('updated', sa.DateTime(), nullable=True))
@@ -41,6 +49,7 @@ def upgrade():
 
 
 def downgrade():
+    _disable_sqlite_foreign_keys()
     ### commands auto generated by Alembic - please adjust! ###
     with op.batch_alter_table('user') as batch_op:
         batch_op.alter_column('password',
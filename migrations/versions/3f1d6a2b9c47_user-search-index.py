@@ -0,0 +1,89 @@
+"""Add users search index
+
+Revision ID: 3f1d6a2b9c47
+Revises: 0c47c1e3bc6a
+Create Date: 2026-10-19 19:41:08.305127
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '3f1d6a2b9c47'
+down_revision = '0c47c1e3bc6a'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# NOTE: The statements are frozen copies of `app.modules.users.search` DDL.
+SQLITE_SEARCH_COLUMNS = 'username, email, first_name, middle_name, last_name'
+SQLITE_SEARCH_NEW_COLUMNS = ', '.join(
+    'new.%s' % column for column in SQLITE_SEARCH_COLUMNS.split(', ')
+)
+SQLITE_SEARCH_OLD_COLUMNS = ', '.join(
+    'old.%s' % column for column in SQLITE_SEARCH_COLUMNS.split(', ')
+)
+
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE user_search USING fts5({columns}, "
+    "content='user', content_rowid='id', prefix='2 3 4')",
+
+    "CREATE TRIGGER user_search_after_insert AFTER INSERT ON user BEGIN "
+    "INSERT INTO user_search(rowid, {columns}) VALUES (new.id, {new_columns}); "
+    "END",
+
+    "CREATE TRIGGER user_search_after_delete AFTER DELETE ON user BEGIN "
+    "INSERT INTO user_search(user_search, rowid, {columns}) "
+    "VALUES ('delete', old.id, {old_columns}); "
+    "END",
+
+    "CREATE TRIGGER user_search_after_update AFTER UPDATE OF {columns} ON user BEGIN "
+    "INSERT INTO user_search(user_search, rowid, {columns}) "
+    "VALUES ('delete', old.id, {old_columns}); "
+    "INSERT INTO user_search(rowid, {columns}) VALUES (new.id, {new_columns}); "
+    "END",
+
+    "INSERT INTO user_search(user_search) VALUES ('rebuild')",
+)
+
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER user_search_after_update",
+    "DROP TRIGGER user_search_after_delete",
+    "DROP TRIGGER user_search_after_insert",
+    "DROP TABLE user_search",
+)
+
+POSTGRESQL_UPGRADE = (
+    'CREATE INDEX ix_user_search ON "user" USING gin (('
+    "setweight(to_tsvector('simple', username || ' ' || email), 'A') || "
+    "setweight(to_tsvector('simple', first_name || ' ' || middle_name || ' ' || last_name), 'B')"
+    '))',
+)
+
+POSTGRESQL_DOWNGRADE = (
+    'DROP INDEX ix_user_search',
+)
+
+
+def _execute(statements):
+    for statement in statements:
+        op.execute(sa.text(statement.format(
+            columns=SQLITE_SEARCH_COLUMNS,
+            new_columns=SQLITE_SEARCH_NEW_COLUMNS,
+            old_columns=SQLITE_SEARCH_OLD_COLUMNS,
+        )))
+
+
+def upgrade():
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'sqlite':
+        _execute(SQLITE_UPGRADE)
+    elif dialect_name == 'postgresql':
+        _execute(POSTGRESQL_UPGRADE)
+
+
+def downgrade():
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'sqlite':
+        _execute(SQLITE_DOWNGRADE)
+    elif dialect_name == 'postgresql':
+        _execute(POSTGRESQL_DOWNGRADE)
@@ -0,0 +1,41 @@
+"""Delete TeamMember rows with ON DELETE CASCADE
+
+Revision ID: 5c52ff116e31
+Revises: 82184d7d1e88
+Create Date: 2026-10-19 18:40:12.512342
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '5c52ff116e31'
+down_revision = '82184d7d1e88'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _recreate_foreign_keys(ondelete):
+    # The foreign keys were created unnamed, so their names depend on the
+    # database backend (e.g. `team_members_team_id_fkey` in PostgreSQL and
+    # `fk_team_members_team_id_team` in SQLite).
+    foreign_keys = sa.inspect(op.get_bind()).get_foreign_keys('team_member')
+    with op.batch_alter_table('team_member') as batch_op:
+        for foreign_key in foreign_keys:
+            column_name, = foreign_key['constrained_columns']
+            referred_table = foreign_key['referred_table']
+            batch_op.drop_constraint(foreign_key['name'], type_='foreignkey')
+            batch_op.create_foreign_key(
+                'fk_team_member_%s_%s' % (column_name, referred_table),
+                referred_table,
+                [column_name],
+                foreign_key['referred_columns'],
+                ondelete=ondelete
+            )
+
+
+def upgrade():
+    _recreate_foreign_keys(ondelete='CASCADE')
+
+
+def downgrade():
+    _recreate_foreign_keys(ondelete=None)
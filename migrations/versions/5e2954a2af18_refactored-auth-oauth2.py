@@ -41,7 +41,15 @@ OAuth2Token = sa.Table(
 )
 
 
+def _disable_sqlite_foreign_keys():
+    # The batch operations recreate the `oauth2_client` table, which is
+    # referenced by other tables (see `migrations/env.py`)
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('PRAGMA foreign_keys=OFF')
+
+
 def upgrade():
+    _disable_sqlite_foreign_keys()
     connection = op.get_bind()
 
     clienttypes = sa.dialects.postgresql.ENUM('public', 'confidential', name='clienttypes')
@@ -124,6 +132,7 @@ def upgrade():
 
 
 def downgrade():
+    _disable_sqlite_foreign_keys()
     connection = op.get_bind()
 
     with op.batch_alter_table('oauth2_token') as batch_op:
@@ -0,0 +1,79 @@
+"""Add incremental sync indexes, TeamMember timestamps and team tombstones
+
+Revision ID: 6b3e9d0c4f72
+Revises: d27b5e8f3a16
+Create Date: 2026-10-19 21:03:27.514862
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '6b3e9d0c4f72'
+down_revision = 'd27b5e8f3a16'
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    # The existing memberships get the migration time as their timestamps
+    with op.batch_alter_table('team_member') as batch_op:
+        batch_op.add_column(sa.Column('created', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('updated', sa.DateTime(), nullable=True))
+    team_member = sa.table(
+        'team_member',
+        sa.column('created', sa.DateTime()),
+        sa.column('updated', sa.DateTime())
+    )
+    now = datetime.utcnow()
+    op.execute(team_member.update().values(created=now, updated=now))
+    with op.batch_alter_table('team_member') as batch_op:
+        batch_op.alter_column('created', existing_type=sa.DateTime(), nullable=False)
+        batch_op.alter_column('updated', existing_type=sa.DateTime(), nullable=False)
+
+    op.create_table(
+        'team_tombstone',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('team_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('deleted', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_team_tombstone'))
+    )
+
+    op.create_index('ix_user_updated_id', 'user', ['updated', 'id'], unique=False)
+    op.create_index('ix_team_updated_id', 'team', ['updated', 'id'], unique=False)
+    op.create_index(
+        'ix_team_member_team_id_updated_user_id',
+        'team_member',
+        ['team_id', 'updated', 'user_id'],
+        unique=False
+    )
+    op.create_index(
+        'ix_team_tombstone_deleted_id',
+        'team_tombstone',
+        ['deleted', 'id'],
+        unique=False,
+        postgresql_where=sa.text('user_id IS NULL'),
+        sqlite_where=sa.text('user_id IS NULL')
+    )
+    op.create_index(
+        'ix_team_tombstone_team_id_deleted_id',
+        'team_tombstone',
+        ['team_id', 'deleted', 'id'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_team_tombstone_team_id_deleted_id', table_name='team_tombstone')
+    op.drop_index('ix_team_tombstone_deleted_id', table_name='team_tombstone')
+    op.drop_index('ix_team_member_team_id_updated_user_id', table_name='team_member')
+    op.drop_index('ix_team_updated_id', table_name='team')
+    op.drop_index('ix_user_updated_id', table_name='user')
+
+    op.drop_table('team_tombstone')
+
+    with op.batch_alter_table('team_member') as batch_op:
+        batch_op.drop_column('updated')
+        batch_op.drop_column('created')
@@ -0,0 +1,38 @@
+"""Add denormalized Team.member_count
+
+Revision ID: 9a4e2c71d5b8
+Revises: 3f1d6a2b9c47
+Create Date: 2026-10-19 20:12:51.640193
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '9a4e2c71d5b8'
+down_revision = '3f1d6a2b9c47'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def _disable_sqlite_foreign_keys():
+    # The batch operations recreate the `team` table, which is referenced by
+    # other tables (see `migrations/env.py`)
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('PRAGMA foreign_keys=OFF')
+
+
+def upgrade():
+    op.add_column(
+        'team',
+        sa.Column('member_count', sa.Integer(), server_default='0', nullable=False)
+    )
+    op.execute(
+        "UPDATE team SET member_count = "
+        "(SELECT COUNT(*) FROM team_member WHERE team_member.team_id = team.id)"
+    )
+
+
+def downgrade():
+    _disable_sqlite_foreign_keys()
+    with op.batch_alter_table('team') as batch_op:
+        batch_op.drop_column('member_count')
@@ -24,7 +24,16 @@ UserHelper = sa.Table(
     sa.Column('_password', sa.String),
 )
 
+
+def _disable_sqlite_foreign_keys():
+    # The batch operations recreate the `user` table, which is referenced by
+    # other tables (see `migrations/env.py`)
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('PRAGMA foreign_keys=OFF')
+
+
 def upgrade():
+    _disable_sqlite_foreign_keys()
     connection = op.get_bind()
     if connection.engine.name != 'sqlite':
         return
@@ -46,6 +55,7 @@ def upgrade():
 
 
 def downgrade():
+    _disable_sqlite_foreign_keys()
     connection = op.get_bind()
     if connection.engine.name != 'sqlite':
         return
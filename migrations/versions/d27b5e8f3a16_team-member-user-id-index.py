@@ -0,0 +1,27 @@
+"""Add team_member (user_id, team_id) index for the user teams lists
+
+Revision ID: d27b5e8f3a16
+Revises: 9a4e2c71d5b8
+Create Date: 2026-10-19 20:47:15.029184
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'd27b5e8f3a16'
+down_revision = '9a4e2c71d5b8'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+    op.create_index(
+        'ix_team_member_user_id_team_id',
+        'team_member',
+        ['user_id', 'team_id'],
+        unique=False
+    )
+
+
+def downgrade():
+    op.drop_index('ix_team_member_user_id_team_id', table_name='team_member')
@@ -0,0 +1,39 @@
+"""Add teams memberships change feed log
+
+Revision ID: e5c1a7f39b24
+Revises: 6b3e9d0c4f72
+Create Date: 2026-10-19 21:48:05.372916
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'e5c1a7f39b24'
+down_revision = '6b3e9d0c4f72'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+TEAM_CHANGE_ACTIONS = ('member_added', 'member_updated', 'member_removed', 'team_deleted')
+
+
+def upgrade():
+    op.create_table(
+        'team_change',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('team_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column(
+            'action',
+            sa.Enum(*TEAM_CHANGE_ACTIONS, name='teamchangeactions'),
+            nullable=False
+        ),
+        sa.Column('created', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_team_change')),
+        sqlite_autoincrement=True
+    )
+
+
+def downgrade():
+    op.drop_table('team_change')
+    sa.Enum(name='teamchangeactions').drop(op.get_bind(), checkfirst=True)
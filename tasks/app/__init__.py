@@ -5,7 +5,10 @@ Application related tasks for Invoke.
 
 from invoke import Collection
 
-from . import dependencies, env, db, run, users, swagger, boilerplates
+from . import (
+    dependencies, env, db, run, users, teams, swagger, boilerplates, benchmark,
+    profile_startup, memory_report
+)
 
 from config import BaseConfig
 
@@ -15,8 +18,12 @@ namespace = Collection(
     db,
     run,
     users,
+    teams,
     swagger,
     boilerplates,
+    benchmark,
+    profile_startup,
+    memory_report,
 )
 
 namespace.configure({
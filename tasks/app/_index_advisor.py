@@ -0,0 +1,320 @@
+# encoding: utf-8
+"""
+Index advisor utilities for Invoke tasks.
+
+The captured (normalized) SQL statements are explained (``EXPLAIN QUERY
+PLAN``) against an empty SQLite database created from the models metadata,
+so the advice depends on the schema and the queries only (neither on the
+database backend nor on the data). Full table scans and temporary B-trees
+(sorts) are flagged, and an index is proposed for every flagged table
+which has predicates (equality columns first, then a range column or the
+ORDER BY columns).
+"""
+from collections import Counter, OrderedDict
+import io
+import os
+import re
+import subprocess
+import sys
+
+
+_STATEMENT_TYPES = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+
+_QUERY_LOG_LINE_RE = re.compile(r'^(?:(?P<count>\d+)\t)?(?P<statement>.+)$')
+_TABLE_REFERENCE_RE = re.compile(r'\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+AS\s+(\w+))?', re.IGNORECASE)
+_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?')
+_TEMP_BTREE_RE = re.compile(r'^USE TEMP B-TREE FOR (.+)$')
+_COLUMN_OPERATOR_RE = re.compile(
+    r'\b(\w+)\.(\w+)\s*'
+    r'(!=|<>|<=|>=|=|<|>|\bNOT IN\b|\bIN\b|\bIS NOT\b|\bIS\b|\bLIKE\b|\bBETWEEN\b)',
+    re.IGNORECASE
+)
+_OPERATOR_COLUMN_RE = re.compile(r'(?<![<>!])(<=|>=|=|<|>)\s*(\w+)\.(\w+)')
+_ORDER_BY_RE = re.compile(r'\bORDER BY\s+(.+?)(?:\s+LIMIT\b|\s+OFFSET\b|\)|$)', re.IGNORECASE)
+_ORDER_BY_COLUMN_RE = re.compile(r'^(\w+)\.(\w+)(?:\s+(?:ASC|DESC))?$', re.IGNORECASE)
+
+_EQUALITY_OPERATORS = ('=', 'IN', 'IS')
+_RANGE_OPERATORS = ('<', '>', '<=', '>=', 'LIKE', 'BETWEEN')
+
+
+def capture_tests_queries(tests_args, query_log_path):
+    """
+    Run the test suite in a subprocess (this module is loaded there as a
+    pytest plugin) and write the executed statements to the query log.
+    """
+    env = dict(os.environ, INDEX_ADVISOR_QUERY_LOG=query_log_path)
+    env.pop('FLASK_CONFIG', None)
+    subprocess.call(
+        [sys.executable, '-m', 'pytest', '-p', __name__] + list(tests_args),
+        env=env
+    )
+    return read_query_log(query_log_path)
+
+
+def pytest_configure(config):
+    """
+    Start counting the normalized SQL statements (pytest plugin hook).
+    """
+    from sqlalchemy import engine, event
+
+    from app.extensions.instrumentation import normalize_sql
+
+    statements = config.index_advisor_statements = Counter()
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        # pylint: disable=unused-argument
+        statements[normalize_sql(statement)] += 1
+
+    event.listen(engine.Engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def pytest_unconfigure(config):
+    """
+    Write the counted statements to the query log (pytest plugin hook).
+    """
+    with io.open(os.environ['INDEX_ADVISOR_QUERY_LOG'], 'w', encoding='utf-8') as query_log:
+        for statement, count in config.index_advisor_statements.most_common():
+            query_log.write(u'%d\t%s\n' % (count, statement))
+
+
+def read_query_log(path):
+    """
+    Read the statements counts from a query log, which has a statement (as
+    normalized by ``app.extensions.instrumentation.normalize_sql``) per line,
+    optionally prefixed with a count and a tab character.
+    """
+    statements = Counter()
+    with io.open(path, encoding='utf-8') as query_log:
+        for line in query_log:
+            line = line.strip()
+            if not line or line.startswith('--'):
+                continue
+            match = _QUERY_LOG_LINE_RE.match(line)
+            statements[match.group('statement')] += int(match.group('count') or 1)
+    return statements
+
+
+class IndexProposal(object):
+    """
+    A proposed index and the statements which would benefit from it.
+    """
+
+    def __init__(self, table_name, columns):
+        self.table_name = table_name
+        self.columns = columns
+        self.statements = Counter()
+
+    @property
+    def name(self):
+        # pylint: disable=missing-docstring
+        return 'ix_%s_%s' % (self.table_name, '_'.join(self.columns))
+
+
+class StatementAdvice(object):
+    """
+    ``EXPLAIN QUERY PLAN`` findings of a single statement.
+    """
+
+    def __init__(self, statement, count):
+        self.statement = statement
+        self.count = count
+        self.plan = None
+        self.issues = []
+        self.proposals = []
+
+
+class IndexAdvisor(object):
+    """
+    Explains the statements and collects the index proposals.
+    """
+
+    def __init__(self, metadata):
+        from sqlalchemy import create_engine
+
+        self.metadata = metadata
+        self.engine = create_engine('sqlite://')
+        metadata.create_all(self.engine)
+        self.proposals = OrderedDict()
+
+    def _get_existing_indexes_columns(self, table):
+        from sqlalchemy import PrimaryKeyConstraint, UniqueConstraint
+
+        indexes_columns = []
+        for constraint in table.constraints:
+            if isinstance(constraint, (PrimaryKeyConstraint, UniqueConstraint)):
+                indexes_columns.append([column.name for column in constraint.columns])
+        for index in table.indexes:
+            indexes_columns.append([column.name for column in index.columns])
+        return indexes_columns
+
+    def _is_indexed(self, table, equality_columns, other_columns):
+        for index_columns in self._get_existing_indexes_columns(table):
+            if (
+                    set(index_columns[:len(equality_columns)]) == set(equality_columns)
+                    and index_columns[len(equality_columns):][:len(other_columns)] == other_columns
+            ):
+                return True
+        return False
+
+    def explain(self, statement):
+        """
+        Get ``EXPLAIN QUERY PLAN`` details of a normalized statement, which
+        parameters are bound to NULLs, or ``None`` if the statement cannot be
+        explained (e.g. it uses tables which are not in the models metadata).
+        """
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute('EXPLAIN QUERY PLAN %s' % statement, [None] * statement.count('?'))
+            except self.engine.dialect.dbapi.Error:
+                return None
+            return [row[3] for row in cursor.fetchall()]
+        finally:
+            connection.close()
+
+    def _propose(self, table_name, equality_columns, other_columns, advice):
+        table = self.metadata.tables[table_name]
+        if not equality_columns and not other_columns:
+            return
+        if self._is_indexed(table, equality_columns, other_columns):
+            return
+        columns = tuple(equality_columns + other_columns)
+        proposal = self.proposals.get((table_name, columns))
+        if proposal is None:
+            proposal = self.proposals[(table_name, columns)] = IndexProposal(table_name, columns)
+        if proposal not in advice.proposals:
+            proposal.statements[advice.statement] += advice.count
+            advice.proposals.append(proposal)
+
+    def advise(self, statement, count=1):
+        """
+        Explain the statement and propose indexes for its full table scans
+        and temporary B-trees.
+        """
+        # pylint: disable=too-many-locals
+        statement = statement.replace('"', '').replace('`', '')
+        advice = StatementAdvice(statement, count)
+        if not statement.upper().startswith(_STATEMENT_TYPES):
+            advice.plan = []
+            return advice
+
+        tables = {}
+        for table_name, alias in _TABLE_REFERENCE_RE.findall(statement):
+            if table_name in self.metadata.tables:
+                tables[alias or table_name] = table_name
+                tables.setdefault(table_name, table_name)
+
+        columns_operators = [
+            (qualifier, column_name, operator.upper())
+            for qualifier, column_name, operator in _COLUMN_OPERATOR_RE.findall(statement)
+        ] + [
+            (qualifier, column_name, operator)
+            for operator, qualifier, column_name in _OPERATOR_COLUMN_RE.findall(statement)
+        ]
+
+        def get_predicate_columns(qualifier):
+            equality_columns, range_columns = [], []
+            for column_qualifier, column_name, operator in columns_operators:
+                if column_qualifier != qualifier:
+                    continue
+                if operator in _EQUALITY_OPERATORS and column_name not in equality_columns:
+                    equality_columns.append(column_name)
+                elif operator in _RANGE_OPERATORS and column_name not in range_columns:
+                    range_columns.append(column_name)
+            return equality_columns, [
+                column_name for column_name in range_columns if column_name not in equality_columns
+            ]
+
+        # Only the ORDER BY of the outermost query, which sorts the columns of
+        # a single table, can be served by an index.
+        order_by_qualifier, order_by_columns = None, []
+        order_by_match = _ORDER_BY_RE.findall(statement)
+        if order_by_match:
+            order_by_items = [
+                _ORDER_BY_COLUMN_RE.match(order_by_item.strip())
+                for order_by_item in order_by_match[-1].split(',')
+            ]
+            if all(order_by_items) and len(set(item.group(1) for item in order_by_items)) == 1:
+                order_by_qualifier = order_by_items[0].group(1)
+                order_by_columns = [item.group(2) for item in order_by_items]
+
+        def propose(qualifier, sorted_by_index):
+            equality_columns, range_columns = get_predicate_columns(qualifier)
+            if qualifier == order_by_qualifier and (sorted_by_index or not range_columns):
+                other_columns = order_by_columns
+            else:
+                other_columns = range_columns[:1]
+            self._propose(
+                tables[qualifier],
+                equality_columns,
+                [column for column in other_columns if column not in equality_columns],
+                advice=advice
+            )
+
+        advice.plan = self.explain(statement)
+        for detail in advice.plan or ():
+            scan_match = _SCAN_RE.match(detail)
+            if scan_match and scan_match.group(1) in tables:
+                advice.issues.append(detail)
+                propose(scan_match.group(2) or scan_match.group(1), sorted_by_index=False)
+                continue
+
+            temp_btree_match = _TEMP_BTREE_RE.match(detail)
+            if temp_btree_match:
+                advice.issues.append(detail)
+                if temp_btree_match.group(1) == 'ORDER BY' and order_by_qualifier in tables:
+                    propose(order_by_qualifier, sorted_by_index=True)
+        return advice
+
+
+MIGRATION_TEMPLATE = '''"""{message}
+
+Revision ID: {revision}
+Revises: {down_revision}
+Create Date: {create_date}
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = '{revision}'
+down_revision = '{down_revision}'
+
+from alembic import op
+import sqlalchemy as sa
+
+
+def upgrade():
+{upgrade}
+
+
+def downgrade():
+{downgrade}
+'''
+
+
+def render_migration(proposals, revision, down_revision, create_date, message):
+    """
+    Render a draft Alembic migration creating the proposed indexes.
+    """
+    upgrade, downgrade = [], []
+    for proposal in proposals:
+        upgrade.append('    # %d executions of %d statements' % (
+            sum(proposal.statements.values()), len(proposal.statements)
+        ))
+        upgrade.append('    op.create_index(%r, %r, %r, unique=False)' % (
+            str(proposal.name),
+            str(proposal.table_name),
+            [str(column) for column in proposal.columns]
+        ))
+        downgrade.insert(0, '    op.drop_index(%r, table_name=%r)' % (
+            str(proposal.name), str(proposal.table_name)
+        ))
+    return MIGRATION_TEMPLATE.format(
+        message=message,
+        revision=revision,
+        down_revision=down_revision,
+        create_date=create_date,
+        upgrade='\n'.join(upgrade) or '    pass',
+        downgrade='\n'.join(downgrade) or '    pass',
+    )
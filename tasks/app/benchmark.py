@@ -0,0 +1,493 @@
+# encoding: utf-8
+"""
+Performance microbenchmarks
+"""
+from __future__ import print_function
+
+import logging
+import os
+import shutil
+import tempfile
+import time
+import timeit
+
+try:
+    from invoke import ctask as task
+except ImportError:  # Invoke 0.13 renamed ctask to task
+    from invoke import task
+
+
+def _measure(name, func, number, repeat=5):
+    seconds = min(timeit.repeat(func, number=number, repeat=repeat))
+    print("%-40s %10.2f us/call" % (name, seconds / number * 1e6))
+
+
+def _create_trivial_api(compile_dispatchers):
+    """
+    Create a standalone Flask app with a single trivial endpoint decorated
+    with a typical stack of the resources decorators.
+    """
+    from flask import Flask
+    from flask_marshmallow import base_fields
+
+    from flask_restplus_patched import Resource, Schema
+    from app.extensions.api import Api, Namespace
+    from app.extensions.api.parameters import PaginationParameters
+    from app.modules.users.permissions import Permission, rules
+
+    class AllowAllPermission(Permission):
+        """
+        Access is always granted.
+        """
+
+        def rule(self):
+            return rules.AllowAllRule()
+
+    class TrivialSchema(Schema):
+        # pylint: disable=missing-docstring
+        value = base_fields.Integer()
+        limit = base_fields.Integer()
+
+    api = Namespace('trivial')
+
+    @api.route('/<int:value_id>')
+    class Trivial(Resource):
+        # pylint: disable=unused-variable,missing-docstring
+
+        @api.resolve_object('value', resolver=lambda kwargs: kwargs.pop('value_id'))
+        @api.permission_required(AllowAllPermission())
+        @api.permission_required(
+            AllowAllPermission,
+            kwargs_on_request=lambda kwargs: {}
+        )
+        @api.parameters(PaginationParameters())
+        @api.response(TrivialSchema())
+        def get(self, args, value):
+            return {'value': value, 'limit': args['limit']}
+
+    flask_app = Flask(__name__)
+    api_root = Api(flask_app)
+    api_root.COMPILE_DISPATCHERS = compile_dispatchers
+    api_root.add_namespace(api)
+    return flask_app, Trivial
+
+
+@task(default=True)
+def dispatch(context, number=20000):
+    """
+    Measure per-request overhead of the resources decorators stack on a
+    trivial endpoint (stacked wrappers vs. the compiled flat dispatcher).
+    """
+    # pylint: disable=unused-argument
+    logging.getLogger().setLevel(logging.ERROR)
+
+    for compile_dispatchers in (False, True):
+        flask_app, resource_class = _create_trivial_api(compile_dispatchers)
+        name = 'flat dispatcher' if compile_dispatchers else 'stacked wrappers'
+        resource = resource_class()
+
+        with flask_app.test_request_context('/trivial/1?limit=10'):
+            _measure("%s: method call" % name, lambda: resource.get(value_id=1), number)
+
+        client = flask_app.test_client()
+        _measure(
+            "%s: full request" % name,
+            lambda: client.get('/trivial/1?limit=10'),
+            number // 10
+        )
+
+
+def _create_sqlite_engine(database_path, sqlite_profile):
+    """
+    Create an engine exactly the way the application does.
+    """
+    from flask import Flask
+
+    from app.extensions.flask_sqlalchemy import SQLAlchemy
+
+    flask_app = Flask(__name__)
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///%s' % database_path
+    flask_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    flask_app.config['SQLALCHEMY_SQLITE_PROFILE'] = sqlite_profile
+    return SQLAlchemy(flask_app).get_engine(flask_app)
+
+
+def _sqlite_worker(database_path, sqlite_profile, worker_id, transactions, start_event, results):
+    """
+    Run read-then-write transactions (or read-only ones if ``transactions``
+    is None until the start event is cleared) and report the outcome.
+    """
+    from sqlalchemy.exc import OperationalError
+
+    engine = _create_sqlite_engine(database_path, sqlite_profile)
+    start_event.wait()
+    committed = locked = 0
+    start_time = time.time()
+    if transactions is None:
+        while start_event.is_set():
+            with engine.connect() as connection:
+                connection.execute("SELECT COUNT(*), MAX(value) FROM item").fetchall()
+                committed += 1
+    else:
+        for number in range(transactions):
+            try:
+                with engine.begin() as connection:
+                    connection.execute(
+                        "SELECT COUNT(*) FROM item WHERE worker_id = ?", (worker_id, )
+                    ).scalar()
+                    connection.execute(
+                        "INSERT INTO item (worker_id, value) VALUES (?, ?)",
+                        (worker_id, 'x' * 200 + str(number))
+                    )
+                committed += 1
+            except OperationalError as exception:
+                if 'locked' not in str(exception):
+                    raise
+                locked += 1
+    results.put((transactions is None, committed, locked, time.time() - start_time))
+
+
+@task
+def sqlite_writers(context, writers=4, readers=2, transactions=300):
+    """
+    Compare SQLite pragmas profiles (SQLALCHEMY_SQLITE_PROFILE) under
+    concurrent writer and reader processes.
+    """
+    # pylint: disable=unused-argument,too-many-locals
+    import multiprocessing
+
+    from app.extensions.flask_sqlalchemy import SQLITE_PROFILES
+
+    print("%-10s %14s %14s %12s" % ("Profile", "commits/s", "locked errors", "reads/s"))
+    for sqlite_profile in ('default', 'wal', 'wal-fast'):
+        assert sqlite_profile in SQLITE_PROFILES
+        database_dir = tempfile.mkdtemp()
+        try:
+            database_path = os.path.join(database_dir, 'benchmark.db')
+            engine = _create_sqlite_engine(database_path, sqlite_profile)
+            engine.execute(
+                "CREATE TABLE item (id INTEGER PRIMARY KEY, worker_id INTEGER, value TEXT)"
+            )
+            engine.dispose()
+
+            start_event = multiprocessing.Event()
+            results = multiprocessing.Queue()
+            processes = [
+                multiprocessing.Process(
+                    target=_sqlite_worker,
+                    args=(
+                        database_path,
+                        sqlite_profile,
+                        worker_id,
+                        None if worker_id >= writers else transactions,
+                        start_event,
+                        results
+                    )
+                )
+                for worker_id in range(writers + readers)
+            ]
+            for process in processes:
+                process.start()
+            start_time = time.time()
+            start_event.set()
+
+            writers_results = [results.get() for _ in range(writers)]
+            elapsed_time = time.time() - start_time
+            # Readers stop once all writers are done
+            start_event.clear()
+            readers_results = [results.get() for _ in range(readers)]
+            for process in processes:
+                process.join()
+        finally:
+            shutil.rmtree(database_dir)
+
+        assert all(not is_reader for is_reader, _, _, _ in writers_results)
+        print("%-10s %14.1f %14d %12.1f" % (
+            sqlite_profile,
+            sum(committed for _, committed, _, _ in writers_results) / elapsed_time,
+            sum(locked for _, _, locked, _ in writers_results),
+            sum(committed for _, committed, _, _ in readers_results) / elapsed_time,
+        ))
+
+
+class _DatabaseRoundTripsCounter(object):
+    """
+    Counts connection pool checkouts and database round-trips (statements,
+    commits, rollbacks, including the resets of the connections returned to
+    the pool).
+    """
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.checkouts = 0
+        self.round_trips = 0
+        event.listen(engine, 'checkout', self._on_checkout)
+        for event_name in ('before_cursor_execute', 'commit', 'rollback', 'reset'):
+            event.listen(engine, event_name, self._on_round_trip)
+
+    def _on_checkout(self, *args):
+        # pylint: disable=unused-argument
+        self.checkouts += 1
+
+    def _on_round_trip(self, *args, **kwargs):
+        # pylint: disable=unused-argument
+        self.round_trips += 1
+
+
+def _create_benchmark_data(db):
+    """
+    Create a user with an access token and a team with a few members.
+    """
+    from datetime import datetime, timedelta
+
+    from app.modules.auth.models import OAuth2Client, OAuth2Token
+    from app.modules.teams.models import Team, TeamMember
+    from app.modules.users.models import User
+
+    users = [
+        User(
+            username='benchmark_user_%d' % index,
+            email='benchmark_user_%d@example.com' % index,
+            password='password',
+            is_active=True,
+            is_regular_user=True,
+        )
+        for index in range(5)
+    ]
+    team = Team(title="Benchmark team")
+    oauth2_client = OAuth2Client(
+        client_id='benchmark',
+        client_secret='SECRET',
+        user=users[0],
+        default_scopes=[],
+    )
+    oauth2_token = OAuth2Token(
+        client=oauth2_client,
+        user=users[0],
+        token_type='Bearer',
+        access_token='benchmark_access_token',
+        scopes=['users:read', 'teams:read', 'teams:write'],
+        expires=datetime.utcnow() + timedelta(days=1),
+    )
+    with db.session.begin():
+        db.session.add_all(users)
+        db.session.add(team)
+        db.session.add_all(
+            TeamMember(team=team, user=user, is_leader=(index == 0))
+            for index, user in enumerate(users)
+        )
+        db.session.add(oauth2_token)
+    return team.id, 'Bearer %s' % oauth2_token.access_token
+
+
+@task
+def request_transactions(context, number=200):
+    """
+    Compare the connection pool checkouts and database round-trips per
+    request in the default (autocommit) and the request-transaction modes.
+    """
+    # pylint: disable=unused-argument
+    logging.getLogger().setLevel(logging.ERROR)
+
+    from app import create_app
+    from app.extensions import db
+
+    flask_app = create_app('testing')
+    with flask_app.app_context():
+        db.create_all()
+        team_id, authorization = _create_benchmark_data(db)
+        counter = _DatabaseRoundTripsCounter(db.engine)
+        client = flask_app.test_client()
+        headers = {'Authorization': authorization}
+
+        requests = (
+            ("GET /users/me", lambda: client.get('/api/v1/users/me', headers=headers)),
+            ("GET /teams/", lambda: client.get('/api/v1/teams/', headers=headers)),
+            (
+                "GET /teams/<id>/members/",
+                lambda: client.get('/api/v1/teams/%d/members/' % team_id, headers=headers)
+            ),
+            (
+                "POST /teams/",
+                lambda: client.post('/api/v1/teams/', data={'title': "Benchmark"}, headers=headers)
+            ),
+        )
+
+        print("%-26s %-12s %10s %12s %12s" % (
+            "Request", "Mode", "checkouts", "round-trips", "us/request"
+        ))
+        for name, send_request in requests:
+            for request_transactions_mode in (False, True):
+                flask_app.config['SQLALCHEMY_REQUEST_TRANSACTIONS'] = request_transactions_mode
+                assert send_request().status_code == 200
+                counter.checkouts = counter.round_trips = 0
+                seconds = timeit.timeit(send_request, number=number)
+                print("%-26s %-12s %10.1f %12.1f %12.1f" % (
+                    name,
+                    'request' if request_transactions_mode else 'autocommit',
+                    float(counter.checkouts) / number,
+                    float(counter.round_trips) / number,
+                    seconds / number * 1e6,
+                ))
+
+
+@task
+def hot_queries(context, number=2000):
+    """
+    Compare the per-call time of the hot ORM lookups built as regular
+    queries on every call and as compiled-once hot queries.
+    """
+    # pylint: disable=unused-argument
+    logging.getLogger().setLevel(logging.ERROR)
+
+    from app import create_app
+    from app.extensions import db
+    from app.modules.auth.models import OAuth2Client, OAuth2Token
+    from app.modules.teams.models import Team, TeamMember
+    from app.modules.users.models import User
+
+    flask_app = create_app('testing')
+    with flask_app.app_context():
+        db.create_all()
+        team_id, _ = _create_benchmark_data(db)
+        team = Team.query.get(team_id)
+        leader = User.query.filter_by(username='benchmark_user_0').one()
+        team_id, leader_id = team.id, leader.id
+
+        def check_owner_query():
+            team = Team.query.get(team_id)
+            return db.session.query(
+                TeamMember.query.filter_by(team=team, is_leader=True, user_id=leader_id).exists()
+            ).scalar()
+
+        def check_owner_hot_query():
+            return Team.query.get(team_id).check_owner(leader)
+
+        lookups = (
+            (
+                "OAuth2Token.find",
+                lambda: OAuth2Token.query.filter_by(
+                    access_token='benchmark_access_token'
+                ).first(),
+                lambda: OAuth2Token.find(access_token='benchmark_access_token'),
+            ),
+            (
+                "OAuth2Client.find",
+                lambda: OAuth2Client.query.get('benchmark'),
+                lambda: OAuth2Client.find('benchmark'),
+            ),
+            (
+                "User.query.get",
+                lambda: User.query.get(leader_id),
+                lambda: db.hot_get(User, leader_id),
+            ),
+            ("Team.check_owner (+ Team get)", check_owner_query, check_owner_hot_query),
+            (
+                "TeamMember.find",
+                lambda: TeamMember.query.filter_by(team_id=team_id, user_id=leader_id).first(),
+                lambda: TeamMember.find(team_id, leader_id),
+            ),
+        )
+
+        print("%-32s %14s %14s %8s" % ("Lookup", "Query us/call", "Hot us/call", "Speedup"))
+        for name, query_lookup, hot_lookup in lookups:
+            timings = []
+            for lookup in (query_lookup, hot_lookup):
+                def lookup_in_empty_session(lookup=lookup):
+                    # pylint: disable=missing-docstring
+                    db.session.expunge_all()
+                    assert lookup()
+                lookup_in_empty_session()
+                timings.append(
+                    min(timeit.repeat(lookup_in_empty_session, number=number, repeat=5)) / number
+                )
+            print("%-32s %14.1f %14.1f %7.2fx" % (
+                name, timings[0] * 1e6, timings[1] * 1e6, timings[0] / timings[1]
+            ))
+
+
+@task
+def user_search(context, users=1000000, number=200):
+    """
+    Measure the latency of the users search (the first page of results) on
+    a SQLite database with a lot of users.
+    """
+    # pylint: disable=unused-argument,too-many-locals
+    from datetime import datetime
+    import random
+
+    import sqlalchemy
+
+    logging.getLogger().setLevel(logging.ERROR)
+
+    from app import create_app
+    from app.extensions import db
+    from app.modules.users.models import User
+    from app.modules.users.search import search_users
+
+    first_names = (
+        'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda',
+        'William', 'Elizabeth', 'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica',
+    )
+    last_names = (
+        'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis',
+        'Rodriguez', 'Martinez', 'Hernandez', 'Lopez', 'Gonzalez', 'Wilson', 'Anderson',
+    )
+    domains = ('example.com', 'example.org', 'mail.example.net')
+    random.seed(0)
+
+    database_dir = tempfile.mkdtemp()
+    try:
+        flask_app = create_app('testing')
+        flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///%s' % (
+            os.path.join(database_dir, 'benchmark.db')
+        )
+        flask_app.config['SQL_INSTRUMENTATION'] = False
+        with flask_app.app_context():
+            db.create_all()
+            # Bypass the models column types (e.g. passwords hashing)
+            user_table = sqlalchemy.table('user', *[
+                sqlalchemy.column(column.name) for column in User.__table__.columns
+            ])
+            now = datetime.utcnow()
+            start_time = time.time()
+            batch_size = 10000
+            for batch_start in range(0, users, batch_size):
+                rows = []
+                for index in range(batch_start, min(batch_start + batch_size, users)):
+                    first_name = random.choice(first_names)
+                    last_name = random.choice(last_names)
+                    username = '%s.%s%d' % (first_name.lower(), last_name.lower(), index)
+                    rows.append({
+                        'username': username,
+                        'email': '%s@%s' % (username, random.choice(domains)),
+                        'password': b'',
+                        'first_name': first_name,
+                        'middle_name': '',
+                        'last_name': last_name,
+                        'static_roles': 0,
+                        'created': now,
+                        'updated': now,
+                    })
+                with db.engine.begin() as connection:
+                    connection.execute(user_table.insert(), rows)
+            print("Created %d users in %.1f s" % (users, time.time() - start_time))
+
+            searches = (
+                db.session.query(User.username).filter_by(id=users // 2).scalar(),
+                "smith12",
+                "jess",
+                "mary garcia",
+                "robert jones example",
+                "ma",
+            )
+            print("%-26s %10s %12s" % ("Search", "results", "ms/search"))
+            for text in searches:
+                results = search_users(text, limit=21)
+                seconds = min(timeit.repeat(
+                    lambda text=text: search_users(text, limit=21), number=number, repeat=3
+                ))
+                print("%-26s %10d %12.2f" % (text, len(results), seconds / number * 1e3))
+    finally:
+        shutil.rmtree(database_dir)
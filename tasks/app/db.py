@@ -5,6 +5,8 @@ Application database related tasks for Invoke.
 
 Forked from flask-migrate
 """
+from __future__ import print_function
+
 import argparse
 import logging
 import os
@@ -38,6 +40,14 @@ def _get_config(directory, x_arg=None, opts=None):
     """
     A helper that prepares AlembicConfig instance.
     """
+    from flask import current_app
+
+    from app import modules
+
+    # Models are registered in the metadata (which autogenerate compares the
+    # database with) only when the modules are loaded.
+    modules.ensure_loaded(current_app)
+
     config = Config(os.path.join(directory, 'alembic.ini'))
     config.set_main_option('script_location', directory)
     if config.cmd_opts is None:
@@ -267,14 +277,104 @@ def stamp(context, directory='migrations', revision='head', sql=False, tag=None)
     command.stamp(config, revision, sql=sql, tag=tag)
 
 
+@app_context_task(
+    help={
+        'query_log': "a file with normalized SQL statements (one per line, optionally prefixed "
+                     "with a count and a tab), by default the test suite queries are captured",
+        'tests': "pytest arguments used to capture the queries",
+        'write_migration': "write the draft migration to the migration script directory "
+                           "instead of printing it",
+        'directory': "migration script directory",
+    }
+)
+def advise_indexes(context, query_log=None, tests='tests -q -p no:cacheprovider -p no:warnings',
+                   write_migration=False, directory='migrations'):
+    """
+    Propose indexes for the full table scans and temporary B-trees of the
+    queries the application issues, and draft an Alembic migration for them.
+    """
+    import datetime
+    import tempfile
+
+    from alembic.script import ScriptDirectory
+    from alembic.util import rev_id
+    from flask import current_app
+
+    from app import modules
+    from app.extensions import db
+
+    from . import _index_advisor
+
+    if query_log:
+        statements = _index_advisor.read_query_log(query_log)
+    else:
+        with tempfile.NamedTemporaryFile(suffix='.log') as query_log_file:
+            statements = _index_advisor.capture_tests_queries(
+                tests.split(),
+                query_log_path=query_log_file.name
+            )
+
+    modules.ensure_loaded(current_app)
+    advisor = _index_advisor.IndexAdvisor(db.metadata)
+    unexplained_statements_count = 0
+    for statement, count in statements.most_common():
+        advice = advisor.advise(statement, count)
+        if advice.plan is None:
+            unexplained_statements_count += 1
+        if not advice.issues:
+            continue
+        print("%6dx %s" % (advice.count, advice.statement))
+        for issue in advice.issues:
+            print("        %s" % issue)
+        for proposal in advice.proposals:
+            print("        => %s (%s)" % (proposal.name, ', '.join(proposal.columns)))
+        print()
+
+    if unexplained_statements_count:
+        log.info(
+            "%d statements could not be explained (e.g. they use tables which are not in the "
+            "models metadata).",
+            unexplained_statements_count
+        )
+    proposals = list(advisor.proposals.values())
+    if not proposals:
+        log.info("No indexes to propose for %d statements.", len(statements))
+        return
+
+    script_directory = ScriptDirectory.from_config(_get_config(directory))
+    revision_id = rev_id()
+    migration = _index_advisor.render_migration(
+        proposals,
+        revision=revision_id,
+        down_revision=script_directory.get_current_head(),
+        create_date=datetime.datetime.now(),
+        message="Add indexes proposed by the index advisor"
+    )
+    if not write_migration:
+        print(migration)
+        return
+    migration_path = os.path.join(
+        script_directory.versions, '%s_advised-indexes.py' % revision_id
+    )
+    with open(migration_path, 'w') as migration_file:
+        migration_file.write(migration)
+    log.info("The draft migration is written to %s", migration_path)
+
+
 @app_context_task
 def init_development_data(context, upgrade_db=True, skip_on_failure=False):
     """
     Fill a database with development data like default users.
     """
+    from flask import current_app
+
+    from app import modules
+
     if upgrade_db:
         context.invoke_execute(context, 'app.db.upgrade')
 
+    modules.ensure_loaded(current_app)
+
     log.info("Initializing development data...")
 
     from migrations import initial_development_data
@@ -0,0 +1,140 @@
+# encoding: utf-8
+"""
+Workers memory usage report
+
+Forks a few workers the way pre-forking servers do and reports their USS
+(unique set size, i.e. the memory which would be freed if the worker exited)
+with and without the application preloading in the master process.
+
+The workers are forked in a fresh Python process (Linux only, since USS is
+read from ``/proc/<pid>/smaps``).
+"""
+from __future__ import print_function
+
+import json
+import os
+import subprocess
+import sys
+
+try:
+    from invoke import ctask as task
+except ImportError:  # Invoke 0.13 renamed ctask to task
+    from invoke import task
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODES = (
+    ('no-preload', "app created in every worker"),
+    ('preload', "app preloaded in the master"),
+    ('preload-freeze', "app preloaded in the master + gc.freeze()"),
+)
+
+
+def _get_uss(pid):
+    """
+    Get USS of the process in bytes.
+    """
+    uss = 0
+    with open('/proc/%d/smaps' % pid) as smaps_file:
+        for line in smaps_file:
+            if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                uss += int(line.split()[1]) * 1024
+    return uss
+
+
+def _serve_requests(flask_app, requests_count):
+    """
+    Simulate a worker handling requests, which allocate and free objects and
+    trigger garbage collections.
+    """
+    import gc
+
+    client = flask_app.test_client()
+    for _ in range(requests_count):
+        client.get('/api/v1/swagger.json')
+        client.get('/api/v1/non-existing-url')
+    gc.collect()
+
+
+def _measure_workers(flask_config_name, mode, workers, requests_count):
+    """
+    Fork the workers and measure their USS once they have served requests.
+    """
+    from app import create_app
+    from app import preload
+
+    if mode != 'no-preload':
+        flask_app = create_app(flask_config_name)
+        preload.warm_up(flask_app)
+        preload.dispose_db_connections(flask_app)
+        if mode == 'preload-freeze':
+            preload.freeze_heap()
+
+    ready_read_fd, ready_write_fd = os.pipe()
+    exit_read_fd, exit_write_fd = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_read_fd)
+            os.close(exit_write_fd)
+            if mode == 'no-preload':
+                flask_app = create_app(flask_config_name)
+                preload.warm_up(flask_app)
+            else:
+                preload.dispose_db_connections(flask_app)
+            _serve_requests(flask_app, requests_count)
+            os.write(ready_write_fd, b'.')
+            # Wait until the parent closes the pipe
+            os.read(exit_read_fd, 1)
+            os._exit(0)  # pylint: disable=protected-access
+        pids.append(pid)
+
+    os.close(ready_write_fd)
+    os.close(exit_read_fd)
+    for _ in pids:
+        os.read(ready_read_fd, 1)
+    uss = [_get_uss(pid) for pid in pids]
+    os.close(exit_write_fd)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    return uss
+
+
+@task(default=True)
+def memory_report(context, flask_config='development', workers=4, requests=20):
+    """
+    Report per-worker memory usage (USS) with and without the application
+    preloading in the master process.
+    """
+    # pylint: disable=unused-argument
+    baseline = None
+    print("%-45s %12s %12s" % ("Mode", "USS/worker", "USS total"))
+    for mode, description in MODES:
+        output = subprocess.check_output(
+            [
+                sys.executable, '-W', 'ignore', os.path.abspath(__file__),
+                flask_config, mode, str(workers), str(requests)
+            ],
+            cwd=PROJECT_ROOT
+        )
+        uss = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+        average_uss = float(sum(uss)) / len(uss) / 2**20
+        if baseline is None:
+            baseline = average_uss
+        print("%-45s %9.1f MB %9.1f MB  (%+.1f MB/worker)" % (
+            description, average_uss, sum(uss) / 2.0**20, average_uss - baseline
+        ))
+
+
+if __name__ == '__main__':
+    # This file is executed as a script by `memory_report` task, so the
+    # project root has to replace `tasks/app` directory in the import paths.
+    sys.path[0] = PROJECT_ROOT
+    print(json.dumps(_measure_workers(
+        sys.argv[1],
+        mode=sys.argv[2],
+        workers=int(sys.argv[3]),
+        requests_count=int(sys.argv[4])
+    )))
@@ -0,0 +1,142 @@
+# encoding: utf-8
+"""
+Application startup profiling tasks
+
+The measurements are taken in a fresh Python process, so the import times
+are not affected by the modules already imported by Invoke tasks.
+"""
+from __future__ import print_function
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+try:
+    from invoke import ctask as task
+except ImportError:  # Invoke 0.13 renamed ctask to task
+    from invoke import task
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _timed(timings, key, func):
+    def timed_func(*args, **kwargs):
+        # pylint: disable=missing-docstring
+        start_time = time.time()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            timings[key] = timings.get(key, 0.0) + time.time() - start_time
+    return timed_func
+
+
+def _profile_create_app(flask_config_name, lazy):
+    """
+    Create the application measuring the import and ``init_app`` time of
+    every extension and module.
+    """
+    # pylint: disable=too-many-locals
+    try:
+        import builtins
+    except ImportError:  # Python 2
+        import __builtin__ as builtins
+    from importlib import import_module
+
+    import_timings = {}
+    init_timings = {}
+
+    # Attribute the time of the imports made directly by the extensions and
+    # modules packages to the imported names.
+    profiled_importers = {'app.extensions'}
+    original_import = builtins.__import__
+
+    def profiling_import(name, globals=None, locals=None, fromlist=(), level=0):
+        # pylint: disable=redefined-builtin
+        importer = (globals or {}).get('__name__')
+        if importer not in profiled_importers:
+            return original_import(name, globals, locals, fromlist, level)
+        start_time = time.time()
+        try:
+            return original_import(name, globals, locals, fromlist, level)
+        finally:
+            key = '%s: %s%s' % (importer, '.' * level, name or ', '.join(fromlist))
+            import_timings[key] = import_timings.get(key, 0.0) + time.time() - start_time
+
+    builtins.__import__ = profiling_import
+    try:
+        start_time = time.time()
+        import app as app_package
+        from app import extensions, modules
+        import_timings['app'] = time.time() - start_time
+
+        config_class_path = app_package.CONFIG_NAME_MAPPER[flask_config_name]
+        config_module_name, config_class_name = config_class_path.rsplit('.', 1)
+        config_class = getattr(import_module(config_module_name), config_class_name)
+        config_class.MODULES_LAZY_LOADING = lazy
+
+        for name, extension in list(vars(extensions).items()):
+            if hasattr(extension, 'init_app') and not isinstance(extension, type):
+                extension.init_app = _timed(init_timings, 'extension: %s' % name, extension.init_app)
+
+        for module_name in config_class.ENABLED_MODULES:
+            module = import_module('app.modules.%s' % module_name)
+            profiled_importers.add(module.__name__)
+            module.init_app = _timed(init_timings, 'module: %s' % module_name, module.init_app)
+
+        start_time = time.time()
+        flask_app = app_package.create_app(flask_config_name=flask_config_name, wsgi_only=True)
+        create_app_time = time.time() - start_time
+
+        start_time = time.time()
+        modules.ensure_loaded(flask_app)
+        deferred_loading_time = time.time() - start_time
+    finally:
+        builtins.__import__ = original_import
+
+    return {
+        'create_app': create_app_time,
+        'deferred_loading': deferred_loading_time,
+        'imports': import_timings,
+        'init_app': init_timings,
+    }
+
+
+def _print_timings(title, timings, top):
+    print("%s:" % title)
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1])[:top]:
+        print("  %-60s %8.1f ms" % (name, seconds * 1000))
+
+
+@task(default=True)
+def profile_startup(context, flask_config='production', lazy=False, top=15):
+    """
+    Report import and init_app time of every extension and module on the
+    application creation (with --lazy, module loading is deferred).
+    """
+    # pylint: disable=unused-argument
+    output = subprocess.check_output(
+        [
+            sys.executable, '-W', 'ignore',
+            os.path.abspath(__file__), flask_config, 'lazy' if lazy else 'eager'
+        ],
+        cwd=PROJECT_ROOT
+    )
+    profile = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+    _print_timings("Imports (made by app.extensions and modules)", profile['imports'], top)
+    _print_timings("init_app", profile['init_app'], top)
+    print("create_app():                  %8.1f ms" % (profile['create_app'] * 1000))
+    print("deferred modules loading:      %8.1f ms" % (profile['deferred_loading'] * 1000))
+    print("import app + create_app():     %8.1f ms" % (
+        (profile['imports']['app'] + profile['create_app']) * 1000
+    ))
+
+
+if __name__ == '__main__':
+    # This file is executed as a script by `profile_startup` task, so the
+    # project root has to replace `tasks/app` directory in the import paths.
+    sys.path[0] = PROJECT_ROOT
+    print(json.dumps(_profile_create_app(sys.argv[1], lazy=(sys.argv[2] == 'lazy'))))
@@ -29,10 +29,17 @@ def run(
         uwsgi=False,
         uwsgi_mode='http',
         uwsgi_extra_options='',
+        uwsgi_processes=1,
+        preload=False,
     ):
     """
     Run Example RESTful API Server.
+
+    With --uwsgi --preload, the application is created and warmed up once in
+    the uWSGI master process, and the workers are forked from it (see
+    `app/wsgi.py`).
     """
+    assert uwsgi or not preload, "--preload is only supported with --uwsgi"
     if flask_config is not None:
         os.environ['FLASK_CONFIG'] = flask_config
 
@@ -63,10 +70,13 @@ def run(
         uwsgi_args = [
             "uwsgi",
             "--need-app",
-            "--manage-script-name",
-            "--mount", "/=app:create_app()",
             "--%s-socket" % uwsgi_mode, "%s:%d" % (host, port),
+            "--processes", str(uwsgi_processes),
         ]
+        if preload:
+            uwsgi_args += ["--master", "--module", "app.wsgi:application"]
+        else:
+            uwsgi_args += ["--manage-script-name", "--mount", "/=app:create_wsgi_app()"]
         if use_reloader:
             uwsgi_args += ["--python-auto-reload", "2"]
         if uwsgi_extra_options:
@@ -13,9 +13,10 @@ except ImportError:  # Invoke 0.13 renamed ctask to task
 
 
 @task(default=True)
-def export(context, output_format='json', quiet=False):
+def export(context, output_format='json', quiet=False, output=None):
     """
-    Export swagger.json content
+    Export swagger.json content (optionally, into the `output` file, which
+    can be used as `SWAGGER_SPECS_PATH` artifact)
     """
     # set logging level to ERROR to avoid [INFO] messages in result
     logging.getLogger().setLevel(logging.ERROR)
@@ -23,7 +24,10 @@ def export(context, output_format='json', quiet=False):
     from app import create_app
     app = create_app(flask_config_name='testing')
     swagger_content = app.test_client().get('/api/v1/swagger.%s' % output_format).data
-    if not quiet:
+    if output:
+        with open(output, 'wb') as output_file:
+            output_file.write(swagger_content)
+    elif not quiet:
         print(swagger_content.decode('utf-8'))
     return swagger_content
 
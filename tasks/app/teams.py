@@ -0,0 +1,128 @@
+# encoding: utf-8
+"""
+Application Teams management related tasks for Invoke.
+"""
+
+import logging
+
+from ._utils import app_context_task
+
+
+log = logging.getLogger(__name__) # pylint: disable=invalid-name
+
+
+@app_context_task(
+    help={
+        'batch_size': "a number of teams checked (and repaired) in one transaction",
+    }
+)
+def reconcile_member_counts(context, batch_size=1000):
+    """
+    Repair the teams which denormalized members count has drifted from the
+    actual number of the memberships (e.g. after raw SQL changes).
+    """
+    # pylint: disable=unused-argument
+    from app.extensions import db
+    from app.modules.teams.models import Team, get_actual_member_count
+
+    batch_size = int(batch_size)
+    last_team_id = None
+    checked_count = repaired_count = 0
+    while True:
+        with db.session.begin():
+            teams_ids = db.session.query(Team.id)
+            if last_team_id is not None:
+                teams_ids = teams_ids.filter(Team.id > last_team_id)
+            teams_ids = [
+                team_id for team_id, in teams_ids.order_by(Team.id).limit(batch_size)
+            ]
+            if not teams_ids:
+                break
+            repaired_count += db.session.execute(
+                Team.__table__.update().where(
+                    Team.id.between(teams_ids[0], teams_ids[-1])
+                    & (Team.member_count != get_actual_member_count())
+                ).values(
+                    member_count=get_actual_member_count()
+                )
+            ).rowcount
+        checked_count += len(teams_ids)
+        last_team_id = teams_ids[-1]
+        log.info("Checked %d teams, repaired %d so far.", checked_count, repaired_count)
+
+    log.info(
+        "Teams members counts reconciliation is done: %d of %d teams were repaired.",
+        repaired_count,
+        checked_count
+    )
+
+
+def _purge_rows(created_column, created_before, batch_size):
+    """
+    Delete the rows of a table created before the given time in batches.
+    """
+    from app.extensions import db
+
+    table = created_column.table
+    purged_count = 0
+    while True:
+        with db.session.begin():
+            rows_ids = db.session.query(table.c.id).filter(
+                created_column < created_before
+            ).limit(batch_size).subquery()
+            deleted_count = db.session.execute(
+                table.delete().where(table.c.id.in_(db.select([rows_ids.c.id])))
+            ).rowcount
+        purged_count += deleted_count
+        if deleted_count < batch_size:
+            return purged_count
+        log.info("Purged %d %s rows so far.", purged_count, table.name)
+
+
+@app_context_task(
+    help={
+        'days': "tombstones older than this number of days are purged",
+        'batch_size': "a number of tombstones deleted in one transaction",
+    }
+)
+def purge_tombstones(context, days=30, batch_size=1000):
+    """
+    Purge old teams and team members tombstones. NOTE: Clients which have
+    not synced for longer than the retention period have to do a full sync.
+    """
+    # pylint: disable=unused-argument
+    from datetime import datetime, timedelta
+
+    from app.modules.teams.models import TeamTombstone
+
+    purged_count = _purge_rows(
+        TeamTombstone.deleted,
+        datetime.utcnow() - timedelta(days=int(days)),
+        int(batch_size)
+    )
+    log.info("Tombstones purge is done: %d tombstones were purged.", purged_count)
+
+
+@app_context_task(
+    help={
+        'days': "changes older than this number of days are purged",
+        'batch_size': "a number of changes deleted in one transaction",
+    }
+)
+def purge_changes(context, days=7, batch_size=1000):
+    """
+    Purge old entries of the teams change feed. NOTE: Clients which have not
+    followed the feed for longer than the retention period miss the purged
+    changes (the sequence numbers are never reused), so they have to resync.
+    """
+    # pylint: disable=unused-argument
+    from datetime import datetime, timedelta
+
+    from app.modules.teams.models import TeamChange
+
+    purged_count = _purge_rows(
+        TeamChange.created,
+        datetime.utcnow() - timedelta(days=int(days)),
+        int(batch_size)
+    )
+    log.info("Change feed purge is done: %d changes were purged.", purged_count)
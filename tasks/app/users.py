@@ -4,10 +4,19 @@ Application Users management related tasks for Invoke.
 """
 
 from getpass import getpass
+import csv
+import io
+import itertools
+import json
+import logging
+import os
 
 from ._utils import app_context_task
 
 
+log = logging.getLogger(__name__) # pylint: disable=invalid-name
+
+
 @app_context_task
 def create_user(
         context,
@@ -73,3 +82,106 @@ def create_oauth2_client(
     from app.extensions import db
     with db.session.begin():
         db.session.add(oauth2_client)
+
+
+def _read_users_file(filepath, file_format):
+    """
+    Lazily read users data from a CSV (with a header) or a JSON Lines file.
+
+    Yields:
+        (line_number, user_data, error_message) tuples.
+    """
+    with io.open(filepath, encoding='utf-8') as users_file:
+        if file_format == 'csv':
+            reader = csv.DictReader(users_file)
+            for row in reader:
+                yield reader.line_num, {key: value for key, value in row.items() if value}, None
+        else:
+            for line_number, line in enumerate(users_file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line), None
+                except ValueError as exception:
+                    yield line_number, None, "Invalid JSON: %s" % exception
+
+
+@app_context_task(
+    name='import',
+    help={
+        'filepath': "CSV (with a header) or JSON Lines file with users data",
+        'file_format': "csv or jsonl (by default, it is guessed by the file extension)",
+        'batch_size': "a number of users inserted in one transaction",
+        'processes': "a number of password hashing processes (all CPU cores by default)",
+        'errors_filepath': "a JSON Lines file to write per-row errors to",
+    }
+)
+def import_users(
+        context,
+        filepath,
+        file_format=None,
+        batch_size=1000,
+        processes=None,
+        errors_filepath=None
+    ):
+    """
+    Import users from a CSV or a JSON Lines file.
+    """
+    from marshmallow import ValidationError
+    from app.modules.users import bulk
+    from app.modules.users.parameters import ImportUserParameters
+
+    if file_format is None:
+        file_format = 'csv' if filepath.lower().endswith('.csv') else 'jsonl'
+    if errors_filepath is None:
+        errors_filepath = '%s.errors.jsonl' % os.path.splitext(filepath)[0]
+    if processes is not None:
+        processes = int(processes)
+    batch_size = int(batch_size)
+
+    schema = ImportUserParameters()
+    rows = _read_users_file(filepath, file_format)
+    imported_count = failed_count = 0
+
+    with bulk.password_hashing_pool(processes) as pool, \
+            io.open(errors_filepath, 'w', encoding='utf-8') as errors_file:
+
+        def report_error(line_number, user_data, error):
+            # pylint: disable=missing-docstring
+            errors_file.write(u'%s\n' % json.dumps({
+                'line': line_number,
+                'username': (user_data or {}).get('username'),
+                'error': error,
+            }))
+
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+
+            valid_rows = []
+            for line_number, user_data, error in batch:
+                if error is None:
+                    try:
+                        valid_rows.append((line_number, schema.load(user_data).data))
+                        continue
+                    except ValidationError as exception:
+                        error = exception.messages
+                report_error(line_number, user_data, error)
+                failed_count += 1
+
+            results = bulk.create_users([user_data for _, user_data in valid_rows], pool=pool)
+            for (line_number, user_data), (_, error) in zip(valid_rows, results):
+                if error is None:
+                    imported_count += 1
+                else:
+                    report_error(line_number, user_data, error)
+                    failed_count += 1
+
+            log.info("Imported %d users, %d failed so far.", imported_count, failed_count)
+
+    if failed_count:
+        log.warning("%d users were not imported. See details in '%s'", failed_count, errors_filepath)
+    else:
+        os.remove(errors_filepath)
+    log.info("Users import is done: %d users were imported.", imported_count)
@@ -0,0 +1,121 @@
+# encoding: utf-8
+# pylint: disable=missing-docstring
+from functools import wraps
+
+from flask_restplus_patched import dispatch
+
+
+class AppendArgStep(dispatch.DispatchStep):
+    has_before = True
+
+    def __init__(self, func, value):
+        super(AppendArgStep, self).__init__(func)
+        self.value = value
+
+    def before(self, args, kwargs):
+        if self.value is None:
+            raise dispatch.DispatchResponse(['early'])
+        return args + (self.value, )
+
+
+class RecordArgsStep(dispatch.DispatchStep):
+    has_after = True
+
+    def after(self, response, args):
+        return response + [args]
+
+
+def append_arg(value):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if value is None:
+                return ['early']
+            return func(*(args + (value, )), **kwargs)
+        return dispatch.record_dispatch_step(wrapper, AppendArgStep(func, value))
+    return decorator
+
+
+def record_args(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs) + [args]
+    return dispatch.record_dispatch_step(wrapper, RecordArgsStep(func))
+
+
+def handler(*args):
+    return [args]
+
+
+def test_compiled_dispatcher_matches_stacked_wrappers():
+    stacked_func = record_args(append_arg(1)(record_args(append_arg(2)(handler))))
+    compiled_func = dispatch.compile_dispatcher(stacked_func)
+
+    assert compiled_func('self') == stacked_func('self') == [
+        ('self', 1, 2),
+        ('self', 1),
+        ('self', ),
+    ]
+    assert compiled_func.__dispatch_handler__ is handler
+
+
+def test_compiled_dispatcher_early_response_is_processed_by_outer_wrappers_only():
+    stacked_func = record_args(append_arg(None)(record_args(handler)))
+    compiled_func = dispatch.compile_dispatcher(stacked_func)
+
+    assert compiled_func('self') == stacked_func('self') == ['early', ('self', )]
+
+
+def test_compiled_dispatcher_stops_at_unknown_wrappers():
+    def unknown_decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return func(*args, **kwargs) + ['unknown']
+        return wrapper
+
+    unknown_wrapper = unknown_decorator(append_arg(2)(handler))
+    stacked_func = append_arg(1)(unknown_wrapper)
+    compiled_func = dispatch.compile_dispatcher(stacked_func)
+
+    assert compiled_func.__dispatch_handler__ is unknown_wrapper
+    assert compiled_func('self') == stacked_func('self') == [('self', 1, 2), 'unknown']
+    assert dispatch.compile_dispatcher(handler) is None
+
+
+def test_compiled_dispatcher_times_phases_of_timed_requests_only():
+    import flask
+    from flask_restplus_patched import timing
+
+    step = AppendArgStep(handler, 1)
+    step.phase = 'parse'
+    compiled_func = dispatch.compile_dispatcher(
+        dispatch.record_dispatch_step(wraps(handler)(lambda *args: None), step)
+    )
+
+    with flask.Flask(__name__).app_context():
+        assert compiled_func('self') == [('self', 1)]
+        assert timing.get_phase_timer() is None
+
+        timing.start_phase_timer()
+        assert compiled_func('self') == [('self', 1)]
+        assert set(timing.get_phase_timer().phases) == {'parse'}
+
+
+def test_resource_methods_are_compiled(flask_app):
+    # pylint: disable=unused-argument
+    from app.extensions.api import dispatch as app_dispatch
+    from app.modules.teams.resources import TeamByID
+
+    steps_types = [type(step) for step in TeamByID.patch.__dispatch_steps__]
+    assert steps_types[:2] == [app_dispatch.OAuth2Step, dispatch.ResolveObjectStep]
+    assert steps_types[-2:] == [dispatch.ParseArgsStep, dispatch.DumpResponseStep]
+    assert TeamByID.patch.__name__ == 'patch'
+    assert TeamByID.patch.__apidoc__['security']
+
+def test_resources_added_to_registered_namespace_are_compiled(flask_app):
+    # pylint: disable=unused-argument
+    from app.modules.teams.resources import UserMeTeams, UserTeams
+
+    for resource in (UserMeTeams, UserTeams):
+        assert resource.get.__dispatch_steps__
+        assert resource.get.__name__ == 'get'
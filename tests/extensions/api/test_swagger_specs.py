@@ -0,0 +1,61 @@
+# encoding: utf-8
+# pylint: disable=missing-docstring
+import gzip
+import io
+import json
+
+from flask import Flask
+
+from app.extensions import api
+
+
+def test_swagger_specs_are_served_with_etag(flask_app_client):
+    response = flask_app_client.get('/api/v1/swagger.json')
+    assert response.status_code == 200
+    assert response.content_type == 'application/json'
+    assert response.headers['ETag']
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+    response = flask_app_client.get(
+        '/api/v1/swagger.json',
+        headers={'If-None-Match': response.headers['ETag']}
+    )
+    assert response.status_code == 304
+    assert not response.data
+
+
+def test_swagger_specs_are_served_gzipped(flask_app_client):
+    plain_response = flask_app_client.get('/api/v1/swagger.json')
+    response = flask_app_client.get('/api/v1/swagger.json', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'] != plain_response.headers['ETag']
+    with gzip.GzipFile(fileobj=io.BytesIO(response.data)) as gzipped_file:
+        assert gzipped_file.read() == plain_response.data
+
+
+def test_swagger_specs_are_invalidated_on_new_namespace():
+    flask_app = Flask(__name__)
+    api_root = api.Api(flask_app)
+    client = flask_app.test_client()
+    etag = client.get('/swagger.json').headers['ETag']
+
+    api_root.add_namespace(api.Namespace('swagger-specs-test', description="Test"))
+    response = client.get('/swagger.json')
+    assert response.headers['ETag'] != etag
+    assert 'swagger-specs-test' in {
+        tag['name'] for tag in json.loads(response.data.decode('utf-8'))['tags']
+    }
+
+
+def test_swagger_specs_loading(flask_app_client):
+    specs = flask_app_client.get('/api/v1/swagger.json').json
+    specs['info']['title'] = "Exported specs"
+    try:
+        api.api_v1.load_specs(io.StringIO(json.dumps(specs)))
+        response = flask_app_client.get('/api/v1/swagger.json')
+        assert response.json['info']['title'] == "Exported specs"
+    finally:
+        api.api_v1.invalidate_specs()
+    response = flask_app_client.get('/api/v1/swagger.json')
+    assert response.json['info']['title'] != "Exported specs"
@@ -9,6 +9,7 @@ from app import extensions
         'marshmallow',
         'api',
         'oauth2',
+        'instrumentation',
     ])
 def test_extension_availability(extension_name):
     assert hasattr(extensions, extension_name)
@@ -0,0 +1,248 @@
+# encoding: utf-8
+# pylint: disable=missing-docstring
+from flask import Flask
+import pytest
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
+
+from app.extensions.flask_sqlalchemy import SQLAlchemy
+
+
+def create_engine(database_uri, sqlite_profile, **config):
+    flask_app = Flask(__name__)
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    flask_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    flask_app.config['SQLALCHEMY_SQLITE_PROFILE'] = sqlite_profile
+    flask_app.config.update(config)
+    return SQLAlchemy(flask_app).get_engine(flask_app)
+
+
+def get_pragma(engine, name):
+    return engine.execute("PRAGMA %s" % name).scalar()
+
+
+def test_sqlite_default_profile(tmpdir):
+    engine = create_engine('sqlite:///%s' % tmpdir.join('default.db'), 'default')
+    assert isinstance(engine.pool, NullPool)
+    assert get_pragma(engine, 'foreign_keys') == 1
+    assert get_pragma(engine, 'journal_mode') == 'delete'
+
+
+@pytest.mark.parametrize('sqlite_profile,synchronous', [('wal', 2), ('wal-fast', 1)])
+def test_sqlite_wal_profiles(tmpdir, sqlite_profile, synchronous):
+    engine = create_engine('sqlite:///%s' % tmpdir.join('wal.db'), sqlite_profile)
+    assert isinstance(engine.pool, QueuePool)
+    assert get_pragma(engine, 'foreign_keys') == 1
+    assert get_pragma(engine, 'journal_mode') == 'wal'
+    assert get_pragma(engine, 'synchronous') == synchronous
+    assert get_pragma(engine, 'busy_timeout') == 5000
+    assert get_pragma(engine, 'temp_store') == 2
+
+    # The pooled connection keeps its pragmas, so they are applied once
+    engine.execute("PRAGMA busy_timeout=1")
+    assert get_pragma(engine, 'busy_timeout') == 1
+
+
+def test_sqlite_unknown_profile():
+    with pytest.raises(AssertionError):
+        create_engine('sqlite://', 'unknown')
+
+
+def test_pool_options(tmpdir):
+    pool_options = {'pool_size': 3, 'max_overflow': 2, 'pool_recycle': 10}
+    engine = create_engine(
+        'sqlite:///%s' % tmpdir.join('pool.db'),
+        'wal',
+        SQLALCHEMY_POOL_OPTIONS=pool_options
+    )
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == 3
+    assert engine.pool._max_overflow == 2  # pylint: disable=protected-access
+    assert engine.pool._recycle == 10  # pylint: disable=protected-access
+
+    # In-memory database connection is never recycled
+    engine = create_engine('sqlite://', 'default', SQLALCHEMY_POOL_OPTIONS=pool_options)
+    assert isinstance(engine.pool, StaticPool)
+    assert engine.pool._recycle == -1  # pylint: disable=protected-access
+
+
+@pytest.yield_fixture()
+def replicated_app(tmpdir):
+    # pylint: disable=invalid-name
+    from flask.views import MethodView
+    from app.extensions.api import Namespace
+
+    flask_app = Flask(__name__)
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///%s' % tmpdir.join('primary.db')
+    flask_app.config['SQLALCHEMY_BINDS'] = {
+        'replica': 'sqlite:///%s' % tmpdir.join('replica.db'),
+    }
+    flask_app.config['SQLALCHEMY_REPLICA_BINDS'] = ('replica', )
+    flask_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db = SQLAlchemy(flask_app)
+
+    class Item(db.Model):
+        id = db.Column(db.Integer, primary_key=True)  # pylint: disable=invalid-name
+        name = db.Column(db.String)
+
+    api = Namespace('test')
+
+    class Items(MethodView):
+        # pylint: disable=missing-docstring
+
+        def post(self):
+            pass
+
+    class ItemsSearch(MethodView):
+        # pylint: disable=missing-docstring
+
+        @api.read_only
+        def post(self):
+            pass
+
+    flask_app.add_url_rule('/items', view_func=Items.as_view('items'))
+    flask_app.add_url_rule('/items/search', view_func=ItemsSearch.as_view('items_search'))
+
+    for bind in (None, 'replica'):
+        engine = db.get_engine(flask_app, bind=bind)
+        Item.__table__.create(engine)
+        engine.execute(Item.__table__.insert(), name=bind or 'primary')
+
+    flask_app.db = db
+    flask_app.Item = Item
+    yield flask_app
+
+    for bind in (None, 'replica'):
+        db.get_engine(flask_app, bind=bind).dispose()
+
+
+def query_item_names(flask_app, *args, **kwargs):
+    # pylint: disable=missing-docstring
+    with flask_app.test_request_context(*args, **kwargs):
+        flask_app.preprocess_request()
+        try:
+            return [item.name for item in flask_app.db.session.query(flask_app.Item)]
+        finally:
+            flask_app.db.session.remove()
+
+
+@pytest.mark.parametrize('path,method,database', [
+    ('/items', 'GET', 'replica'),
+    ('/items', 'POST', 'primary'),
+    ('/items/search', 'POST', 'replica'),
+])
+def test_replica_routing(replicated_app, path, method, database):
+    # pylint: disable=redefined-outer-name
+    assert query_item_names(replicated_app, path, method=method) == [database]
+
+
+def test_replica_routing_explicit_transaction_uses_primary(replicated_app):
+    # pylint: disable=redefined-outer-name
+    db = replicated_app.db
+    with replicated_app.test_request_context('/items', method='GET'):
+        replicated_app.preprocess_request()
+        with db.session.begin():
+            names = [item.name for item in db.session.query(replicated_app.Item)]
+        db.session.remove()
+    assert names == ['primary']
+
+
+@pytest.mark.parametrize('use_core', [False, True])
+def test_replica_routing_read_your_writes(replicated_app, use_core):
+    # pylint: disable=redefined-outer-name
+    from app.extensions.flask_sqlalchemy import PRIMARY_STICKINESS_COOKIE
+
+    db = replicated_app.db
+    Item = replicated_app.Item  # pylint: disable=invalid-name
+    with replicated_app.test_request_context('/items', method='POST'):
+        replicated_app.preprocess_request()
+        with db.session.begin():
+            if use_core:
+                db.session.execute(Item.__table__.insert(), [{'name': 'new'}])
+            else:
+                db.session.add(Item(name='new'))
+        db.session.remove()
+        response = replicated_app.process_response(replicated_app.response_class())
+    cookie = response.headers['Set-Cookie']
+    assert cookie.startswith('%s=' % PRIMARY_STICKINESS_COOKIE)
+
+    primary_until = cookie.split(';')[0].split('=')[1]
+    assert query_item_names(
+        replicated_app,
+        '/items',
+        headers={'Cookie': '%s=%s' % (PRIMARY_STICKINESS_COOKIE, primary_until)}
+    ) == ['primary', 'new']
+    # Once the stickiness window is over, the replica is used again
+    assert query_item_names(
+        replicated_app,
+        '/items',
+        headers={'Cookie': '%s=1' % PRIMARY_STICKINESS_COOKIE}
+    ) == ['replica']
+
+
+def test_request_transaction_upgrade(replicated_app):
+    # pylint: disable=redefined-outer-name
+    db = replicated_app.db
+    Item = replicated_app.Item  # pylint: disable=invalid-name
+    with replicated_app.app_context():
+        session = db.session()
+        session.start_request_transactions()
+        try:
+            assert session.query(Item).count() == 1
+            request_transaction = session.transaction
+            assert request_transaction is not None
+
+            with session.begin() as transaction:
+                assert transaction is request_transaction
+                session.add(Item(name='new'))
+            assert session.transaction is None
+
+            assert session.query(Item).count() == 2
+            assert session.transaction not in (None, request_transaction)
+        finally:
+            session.end_request_transactions()
+        assert session.transaction is None
+
+
+def get_pool_checkouts_count(response):
+    # pylint: disable=missing-docstring
+    for metric in response.headers['Server-Timing'].split(', '):
+        if metric.startswith('db-pool;'):
+            return int(metric.split('desc="')[1].split(' ')[0])
+    return 0
+
+
+def test_request_transactions(monkeypatch, db, flask_app, flask_app_client, regular_user):
+    # pylint: disable=too-many-arguments,redefined-outer-name
+    from app.modules.teams.models import Team
+
+    with flask_app_client.login(regular_user, auth_scopes=('users:read', 'teams:write')):
+        response = flask_app_client.get('/api/v1/users/me')
+        assert response.status_code == 200
+        assert get_pool_checkouts_count(response) > 1
+
+        monkeypatch.setitem(flask_app.config, 'SQLALCHEMY_REQUEST_TRANSACTIONS', True)
+
+        response = flask_app_client.get('/api/v1/users/me')
+        assert response.status_code == 200
+        assert get_pool_checkouts_count(response) == 1
+
+        response = flask_app_client.post('/api/v1/teams/', data={'title': "Transactional"})
+        assert response.status_code == 200
+        response = flask_app_client.post('/api/v1/teams/', data={'title': ""})
+        assert response.status_code == 409
+
+    team = Team.query.filter_by(title="Transactional").one()
+    with db.session.begin():
+        db.session.delete(team)
+
+
+def test_hot_queries(db, regular_user):
+    from app.modules.users.models import User
+
+    assert 'User.find_by_username' in db.hot_queries
+    assert User.find_with_password(regular_user.username, 'regular_user_password') == regular_user
+    assert User.find_with_password('nonexistent', 'password') is None
+
+    assert db.hot_get(User, regular_user.id) is regular_user
+    assert db.hot_get(User, -1) is None
+    assert 'User.get' in db.hot_queries
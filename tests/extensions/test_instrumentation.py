@@ -0,0 +1,164 @@
+# encoding: utf-8
+# pylint: disable=missing-docstring
+import logging
+
+import pytest
+import sqlalchemy
+from sqlalchemy.pool import QueuePool
+
+from app.extensions.instrumentation import Histogram, PoolStatistics, normalize_sql
+from flask_restplus_patched import timing
+
+
+@pytest.mark.parametrize('statement,expected_normalized_statement', (
+    (
+        "SELECT user.id FROM user WHERE user.id = ?",
+        "SELECT user.id FROM user WHERE user.id = ?",
+    ),
+    (
+        "SELECT user.id FROM user\n  WHERE user.id IN (?, ?, ?) AND user.username = 'root'",
+        "SELECT user.id FROM user WHERE user.id IN (?) AND user.username = ?",
+    ),
+    (
+        "SELECT oauth2_token.id FROM oauth2_token WHERE oauth2_token.id = %(id_1)s LIMIT 10",
+        "SELECT oauth2_token.id FROM oauth2_token WHERE oauth2_token.id = ? LIMIT ?",
+    ),
+))
+def test_normalize_sql(statement, expected_normalized_statement):
+    assert normalize_sql(statement) == expected_normalized_statement
+
+
+def test_server_timing_header(flask_app_client, regular_user):
+    with flask_app_client.login(regular_user, auth_scopes=('users:read', )):
+        response = flask_app_client.get('/api/v1/users/me')
+
+    assert response.status_code == 200
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert ', db-pool;dur=' in response.headers['Server-Timing']
+
+
+def test_failed_statements_timing_is_not_leaked(db):
+    with db.engine.connect() as connection:
+        with pytest.raises(sqlalchemy.exc.OperationalError):
+            connection.execute('SELECT * FROM missing_table')
+        assert connection.execute('SELECT 1').scalar() == 1
+        assert 'query_start_time' not in connection.info
+
+
+def test_n_plus_one_queries_warning(
+        monkeypatch,
+        caplog,
+        flask_app,
+        flask_app_client,
+        regular_user
+):
+    # pylint: disable=too-many-arguments
+    monkeypatch.setitem(flask_app.config, 'SQL_N_PLUS_ONE_THRESHOLD', 0)
+    with caplog.at_level(logging.WARNING, logger='app.extensions.instrumentation'):
+        with flask_app_client.login(regular_user, auth_scopes=('users:read', )):
+            flask_app_client.get('/api/v1/users/me')
+
+    assert any(
+        record.origin == 'app.modules.users.resources.UserMe.get'
+        for record in caplog.records
+    )
+
+
+def test_histogram_percentiles():
+    histogram = Histogram(max_samples=100)
+    for value in range(1, 201):
+        histogram.observe(value)
+
+    assert histogram.count == 200
+    assert histogram.get_percentiles() == {'p50': 150, 'p95': 195, 'p99': 199}
+
+
+def test_phase_timer_attributes_time_to_innermost_phase(monkeypatch):
+    clock = iter(range(10))
+    monkeypatch.setattr(timing, 'default_timer', lambda: next(clock))
+    phase_timer = timing.PhaseTimer()
+
+    phase_timer.push('handler')     # 0
+    phase_timer.push('auth')        # 1
+    phase_timer.push('handler')     # 2
+    phase_timer.push('dump')        # 3
+    phase_timer.pop()               # 4
+    phase_timer.pop()               # 5
+    phase_timer.pop()               # 6
+    phase_timer.pop()               # 7
+
+    assert phase_timer.phases == {'handler': 4, 'auth': 2, 'dump': 1}
+
+
+def test_request_phases_metrics(flask_app_client, regular_user):
+    with flask_app_client.login(regular_user, auth_scopes=('users:read', )):
+        response = flask_app_client.get('/api/v1/users/me')
+    assert response.status_code == 200
+
+    response = flask_app_client.get('/metrics')
+    assert response.status_code == 200
+    endpoint_metrics = response.json['request_phases']['app.modules.users.resources.UserMe.get']
+    assert endpoint_metrics['count'] >= 1
+    assert set(endpoint_metrics['phases']) >= {'auth', 'permission', 'handler', 'dump', 'total'}
+    assert set(endpoint_metrics['phases']['total']) == {'p50', 'p95', 'p99'}
+
+
+def test_metrics_are_not_available_remotely(flask_app_client):
+    response = flask_app_client.get('/metrics', environ_base={'REMOTE_ADDR': '10.0.0.1'})
+    assert response.status_code == 403
+
+
+def test_metrics_are_not_served_in_production(monkeypatch):
+    from app import create_app
+    from config import ProductionConfig
+    monkeypatch.setattr(ProductionConfig, 'SQLALCHEMY_DATABASE_URI', 'sqlite://')
+    monkeypatch.setattr(ProductionConfig, 'SECRET_KEY', 'secret')
+
+    app = create_app('production')
+    assert 'instrumentation_metrics' not in app.view_functions
+
+
+def test_pool_statistics(tmpdir):
+    pool_statistics = PoolStatistics(max_samples=10)
+    engine = sqlalchemy.create_engine(
+        'sqlite:///%s' % tmpdir.join('pool.db'),
+        poolclass=pool_statistics.get_pool_class(QueuePool),
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.01,
+        connect_args={'check_same_thread': False}
+    )
+    pool_statistics.attach(engine)
+
+    connection = engine.connect()
+    overflow_connection = engine.connect()
+    with pytest.raises(sqlalchemy.exc.TimeoutError):
+        engine.connect()
+    overflow_connection.invalidate()
+    overflow_connection.close()
+    connection.close()
+
+    metrics = pool_statistics.get_metrics()
+    assert metrics['pool_class'] == 'QueuePool'
+    assert metrics['checkouts'] == 3
+    assert metrics['waits'] == 1
+    assert metrics['overflow_checkouts'] == 1
+    assert metrics['connects'] == 2
+    assert metrics['invalidations'] == 1
+    assert metrics['checked_out'] == 0
+    assert set(metrics['wait_ms']) == {'p50', 'p95', 'p99'}
+
+    # Statistics survive the pool recreation
+    engine.dispose()
+    engine.raw_connection().close()
+    assert pool_statistics.get_metrics()['connects'] == 3
+    assert pool_statistics.get_metrics()['checkouts'] == 4
+
+
+def test_pools_metrics(flask_app_client, regular_user):
+    with flask_app_client.login(regular_user, auth_scopes=('users:read', )):
+        flask_app_client.get('/api/v1/users/me')
+
+    response = flask_app_client.get('/metrics')
+    assert response.status_code == 200
+    assert response.json['db_pools']['sqlite://']['checkouts'] >= 1
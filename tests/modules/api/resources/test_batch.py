@@ -0,0 +1,93 @@
+# encoding: utf-8
+# pylint: disable=missing-docstring
+import json
+
+import pytest
+
+
+def test_batch_requests(flask_app_client, regular_user, admin_user):
+    with flask_app_client.login(regular_user, auth_scopes=('users:read', )):
+        response = flask_app_client.post(
+            '/api/v1/batch',
+            content_type='application/json',
+            data=json.dumps([
+                {'path': '/api/v1/users/me'},
+                {'path': '/api/v1/users/%d' % admin_user.id},
+                {'path': '/api/v1/users/me', 'query': {'fields': 'id'}},
+                {'path': '/api/v1/teams/'},
+            ])
+        )
+
+    assert response.status_code == 200
+    assert response.content_type == 'application/json'
+    assert [result['status'] for result in response.json] == [200, 403, 200, 401]
+    assert response.json[0]['body']['id'] == regular_user.id
+    assert ['Content-Type', 'application/json'] in response.json[0]['headers']
+    assert response.json[2]['body'] == {'id': regular_user.id}
+    assert set(response.json[1]['body'].keys()) >= {'status', 'message'}
+
+
+def test_batch_requests_with_empty_json_bodies(flask_app_client, regular_user):
+    with flask_app_client.login(regular_user, auth_scopes=('teams:read', )):
+        response = flask_app_client.post(
+            '/api/v1/batch',
+            content_type='application/json',
+            data=json.dumps([{'path': '/api/v1/teams/', 'query': {'offset': 1000}}])
+        )
+
+    assert response.status_code == 200
+    assert response.json[0]['status'] == 200
+    assert response.json[0]['body'] == []
+
+
+def test_batch_requests_in_threads(monkeypatch, flask_app, flask_app_client, regular_user):
+    monkeypatch.setitem(flask_app.config, 'BATCH_API_WORKERS', 2)
+    with flask_app_client.login(regular_user, auth_scopes=('users:read', )):
+        response = flask_app_client.post(
+            '/api/v1/batch',
+            content_type='application/json',
+            data=json.dumps([{'path': '/api/v1/users/me'}] * 3)
+        )
+
+    assert response.status_code == 200
+    assert [result['status'] for result in response.json] == [200, 200, 200]
+    assert set(result['body']['id'] for result in response.json) == {regular_user.id}
+
+
+@pytest.mark.parametrize('sub_requests', (
+    [{'path': '/api/v1/batch', 'method': 'POST'}],
+    [{'path': 'api/v1/users/me'}],
+    [{'path': '/api/v1/users/me', 'method': 'TRACE'}],
+    [{'path': '/api/v1/users/me'}] * 31,
+))
+def test_batch_requests_with_invalid_data_must_fail(flask_app_client, sub_requests):
+    response = flask_app_client.post(
+        '/api/v1/batch',
+        content_type='application/json',
+        data=json.dumps(sub_requests)
+    )
+
+    assert response.status_code == 422
+    assert response.content_type == 'application/json'
+    assert set(response.json.keys()) >= {'status', 'message'}
+
+
+def test_batch_sub_request_repeated_headers(monkeypatch, flask_app):
+    import flask
+    from werkzeug.test import EnvironBuilder
+
+    from app.modules.api.resources import _dispatch_sub_request
+
+    def full_dispatch_request():
+        response = flask.Response('', mimetype='application/json')
+        response.headers.add('Set-Cookie', 'first=1')
+        response.headers.add('Set-Cookie', 'second=2')
+        return response
+
+    monkeypatch.setattr(flask_app, 'full_dispatch_request', full_dispatch_request)
+    result = _dispatch_sub_request(flask_app, EnvironBuilder(path='/').get_environ())
+
+    assert result['body'] is None
+    assert [value for name, value in result['headers'] if name == 'Set-Cookie'] == [
+        'first=1', 'second=2'
+    ]
@@ -0,0 +1,97 @@
+# encoding: utf-8
+# pylint: disable=missing-docstring
+import json
+
+from app.modules.teams import models
+
+
+def test_bulk_add_team_members(
+        flask_app_client,
+        db,
+        regular_user,
+        readonly_user,
+        admin_user,
+        team_for_regular_user
+):
+    # pylint: disable=invalid-name
+    with flask_app_client.login(regular_user, auth_scopes=('teams:write', )):
+        response = flask_app_client.post(
+            '/api/v1/teams/%d/members/bulk' % team_for_regular_user.id,
+            content_type='application/json',
+            data=json.dumps([
+                {'user_id': admin_user.id, 'is_leader': True},
+                {'user_id': readonly_user.id},
+                {'user_id': 100500},
+                {'user_id': admin_user.id},
+            ])
+        )
+
+    assert response.status_code == 200
+    assert response.content_type == 'application/json'
+    assert [(result['user_id'], result['status']) for result in response.json] == [
+        (admin_user.id, 200),
+        (readonly_user.id, 409),
+        (100500, 404),
+        (admin_user.id, 409),
+    ]
+
+    team_member = models.TeamMember.query.filter_by(
+        team=team_for_regular_user,
+        user=admin_user
+    ).one()
+    assert team_member.is_leader is True
+    db.session.refresh(team_for_regular_user)
+    assert team_for_regular_user.member_count == 3
+
+    # Cleanup
+    with db.session.begin():
+        db.session.delete(team_member)
+
+
+def test_bulk_add_team_members_by_non_owner_must_fail(
+        flask_app_client,
+        readonly_user,
+        admin_user,
+        team_for_regular_user
+):
+    # pylint: disable=invalid-name
+    with flask_app_client.login(readonly_user, auth_scopes=('teams:write', )):
+        response = flask_app_client.post(
+            '/api/v1/teams/%d/members/bulk' % team_for_regular_user.id,
+            content_type='application/json',
+            data=json.dumps([{'user_id': admin_user.id}])
+        )
+
+    assert response.status_code == 403
+    assert response.content_type == 'application/json'
+    assert set(response.json.keys()) >= {'status', 'message'}
+
+
+def test_bulk_remove_team_members(
+        flask_app_client,
+        db,
+        regular_user,
+        readonly_user,
+        admin_user,
+        team_for_regular_user
+):
+    # pylint: disable=invalid-name
+    with flask_app_client.login(regular_user, auth_scopes=('teams:write', )):
+        response = flask_app_client.delete(
+            '/api/v1/teams/%d/members/bulk' % team_for_regular_user.id,
+            query_string={'user_ids': [readonly_user.id, admin_user.id, readonly_user.id]}
+        )
+
+    assert response.status_code == 200
+    assert response.content_type == 'application/json'
+    # The duplicate user id gets a single result
+    assert [(result['user_id'], result['status']) for result in response.json] == [
+        (readonly_user.id, 200),
+        (admin_user.id, 404),
+    ]
+    assert models.TeamMember.query.filter_by(
+        team=team_for_regular_user,
+        user=readonly_user
+    ).first() is None
+    db.session.refresh(team_for_regular_user)
+    assert team_for_regular_user.member_count == 1
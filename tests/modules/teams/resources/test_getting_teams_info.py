@@ -36,9 +36,10 @@ def test_getting_list_of_teams_by_authorized_user(
     assert int(response.headers['X-Total-Count']) == 1
     assert response.content_type == 'application/json'
     assert isinstance(response.json, list)
-    assert set(response.json[0].keys()) >= {'id', 'title'}
+    assert set(response.json[0].keys()) >= {'id', 'title', 'member_count'}
     if response.json[0]['id'] == team_for_regular_user.id:
         assert response.json[0]['title'] == team_for_regular_user.title
+        assert response.json[0]['member_count'] == 2
 
 
 @pytest.mark.parametrize('auth_scopes', (
@@ -116,3 +117,86 @@ def test_getting_list_of_team_members_by_authorized_user(
     assert set(response.json[0].keys()) >= {'team', 'user', 'is_leader'}
     assert set(member['team']['id'] for member in response.json) == {team_for_regular_user.id}
     assert regular_user.id in set(member['user']['id'] for member in response.json)
+
+
+def test_getting_list_of_current_user_teams(
+        flask_app_client,
+        db,
+        regular_user,
+        readonly_user,
+        team_for_regular_user,
+        team_for_nobody
+):
+    from app.modules.teams.models import TeamMember
+
+    with db.session.begin():
+        db.session.add(TeamMember(team=team_for_nobody, user=readonly_user, is_leader=True))
+
+    teams = []
+    query_string = {'limit': 1}
+    with flask_app_client.login(readonly_user, auth_scopes=('teams:read', )):
+        for _ in range(2):
+            response = flask_app_client.get('/api/v1/users/me/teams', query_string=query_string)
+            assert response.status_code == 200
+            assert response.content_type == 'application/json'
+            assert len(response.json) == 1
+            assert set(response.json[0].keys()) == {'team', 'is_leader'}
+            teams.extend(
+                (member['team']['id'], member['is_leader']) for member in response.json
+            )
+            query_string['cursor'] = response.headers.get('X-Next-Cursor')
+    assert query_string['cursor'] is None
+    assert teams == [(team_for_regular_user.id, False), (team_for_nobody.id, True)]
+
+    with flask_app_client.login(regular_user, auth_scopes=('teams:read', )):
+        response = flask_app_client.get('/api/v1/users/me/teams')
+    assert response.status_code == 200
+    assert [(member['team']['id'], member['is_leader']) for member in response.json] == [
+        (team_for_regular_user.id, True)
+    ]
+    assert response.json[0]['team']['member_count'] == 2
+
+
+@pytest.mark.parametrize('cursor', ('invalid', 'W10=', 'WyJhIl0=', 'WzEsMl0='))
+def test_getting_list_of_current_user_teams_with_invalid_cursor_must_fail(
+        flask_app_client,
+        regular_user,
+        cursor
+):
+    # pylint: disable=invalid-name
+    with flask_app_client.login(regular_user, auth_scopes=('teams:read', )):
+        response = flask_app_client.get('/api/v1/users/me/teams', query_string={'cursor': cursor})
+
+    assert response.status_code == 422
+    assert set(response.json.keys()) >= {'status', 'message'}
+
+
+@pytest.mark.parametrize('username,status_code', (
+    ('regular_user', 200),
+    ('admin_user', 200),
+    ('readonly_user', 403),
+))
+def test_getting_list_of_user_teams(
+        flask_app_client,
+        regular_user,
+        readonly_user,
+        admin_user,
+        team_for_regular_user,
+        username,
+        status_code
+):
+    # pylint: disable=too-many-arguments
+    user = {
+        'regular_user': regular_user,
+        'readonly_user': readonly_user,
+        'admin_user': admin_user,
+    }[username]
+    with flask_app_client.login(user, auth_scopes=('teams:read', )):
+        response = flask_app_client.get('/api/v1/users/%d/teams' % regular_user.id)
+
+    assert response.status_code == status_code
+    assert response.content_type == 'application/json'
+    if status_code == 200:
+        assert [member['team']['id'] for member in response.json] == [team_for_regular_user.id]
+    else:
+        assert set(response.json.keys()) >= {'status', 'message'}
@@ -56,6 +56,21 @@ def test_new_team_creation_with_invalid_data_must_fail(flask_app_client, regular
     assert response.content_type == 'application/json'
     assert set(response.json.keys()) >= {'status', 'message'}
 
+def test_new_team_creation_with_unknown_sparse_fieldset_must_fail(flask_app_client, regular_user):
+    # pylint: disable=invalid-name
+    team_title = "Sparse Team Title"
+    with flask_app_client.login(regular_user, auth_scopes=('teams:write', )):
+        response = flask_app_client.post(
+            '/api/v1/teams/',
+            data={'title': team_title},
+            query_string={'fields': 'id,bogus'}
+        )
+
+    assert response.status_code == 400
+    assert response.json['message'] == "Unknown field(s) requested: bogus"
+    # The fieldset is validated before the team is created
+    assert models.Team.query.filter_by(title=team_title).count() == 0
+
 
 def test_update_team_info(flask_app_client, regular_user, team_for_regular_user):
     # pylint: disable=invalid-name
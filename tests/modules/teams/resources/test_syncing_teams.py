@@ -0,0 +1,134 @@
+# encoding: utf-8
+# pylint: disable=missing-docstring
+from datetime import datetime
+import json
+
+import pytest
+
+
+def get_all_pages(flask_app_client, path, **query_string):
+    items = []
+    while True:
+        response = flask_app_client.get(path, query_string=query_string)
+        assert response.status_code == 200
+        assert response.content_type == 'application/json'
+        assert 'X-Total-Count' not in response.headers
+        items.extend(response.json)
+        query_string = {'cursor': response.headers['X-Next-Cursor'], 'limit': 2}
+        if len(response.json) < 2:
+            return items, query_string
+
+
+def test_syncing_teams(flask_app_client, db, regular_user):
+    # pylint: disable=invalid-name
+    from app.modules.teams.models import Team
+
+    sync_start = datetime.utcnow()
+    teams = [Team(title="Synced team %d" % index) for index in range(3)]
+    with db.session.begin():
+        db.session.add_all(teams)
+
+    with flask_app_client.login(regular_user, auth_scopes=('teams:read', 'teams:write')):
+        synced_teams, next_sync = get_all_pages(
+            flask_app_client,
+            '/api/v1/teams/',
+            updated_since=sync_start.isoformat(),
+            limit=2
+        )
+        assert [team['id'] for team in synced_teams] == [team.id for team in teams]
+
+        # Nothing has changed since the last sync
+        assert get_all_pages(flask_app_client, '/api/v1/teams/', **next_sync) == (
+            [], next_sync
+        )
+
+        with db.session.begin():
+            teams[0].title = "Renamed synced team"
+        with db.session.begin():
+            db.session.delete(teams[1])
+
+        synced_teams, _ = get_all_pages(flask_app_client, '/api/v1/teams/', **next_sync)
+        assert [team['title'] for team in synced_teams] == ["Renamed synced team"]
+
+        deleted_teams, _ = get_all_pages(
+            flask_app_client,
+            '/api/v1/teams/tombstones',
+            updated_since=sync_start.isoformat()
+        )
+        assert deleted_teams == [
+            {'team_id': teams[1].id, 'user_id': None, 'deleted': deleted_teams[0]['deleted']}
+        ]
+
+    # Cleanup
+    with db.session.begin():
+        db.session.delete(teams[0])
+        db.session.delete(teams[2])
+
+
+def test_syncing_team_members(
+        flask_app_client,
+        db,
+        regular_user,
+        readonly_user,
+        admin_user,
+        team_for_regular_user
+):
+    # pylint: disable=invalid-name,too-many-arguments
+    team_id = team_for_regular_user.id
+    sync_start = datetime.utcnow()
+    with flask_app_client.login(regular_user, auth_scopes=('teams:read', 'teams:write')):
+        response = flask_app_client.post(
+            '/api/v1/teams/%d/members/bulk' % team_id,
+            content_type='application/json',
+            data=json.dumps([{'user_id': admin_user.id}])
+        )
+        assert response.status_code == 200
+        response = flask_app_client.delete(
+            '/api/v1/teams/%d/members/%d' % (team_id, readonly_user.id)
+        )
+        assert response.status_code == 200
+        response = flask_app_client.delete(
+            '/api/v1/teams/%d/members/bulk' % team_id,
+            query_string={'user_ids': [admin_user.id]}
+        )
+        assert response.status_code == 200
+
+        synced_members, _ = get_all_pages(
+            flask_app_client,
+            '/api/v1/teams/%d/members/' % team_id,
+            updated_since=sync_start.isoformat()
+        )
+        assert synced_members == []
+
+        deleted_members, _ = get_all_pages(
+            flask_app_client,
+            '/api/v1/teams/%d/members/tombstones' % team_id,
+            updated_since=sync_start.isoformat()
+        )
+        assert [member['user_id'] for member in deleted_members] == [
+            readonly_user.id, admin_user.id
+        ]
+
+    with flask_app_client.login(readonly_user, auth_scopes=('teams:read', )):
+        response = flask_app_client.get('/api/v1/teams/%d/members/tombstones' % team_id)
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize('query_string', (
+    {'updated_since': 'yesterday'},
+    {'cursor': 'WyIyMDIwLTAxLTAxVDAwOjAwOjAwIl0='},
+    {'cursor': 'WyJ4IiwxXQ=='},
+    # A valid cursor of another collection (team members have composite keys)
+    {'cursor': 'WyIyMDIwLTAxLTAxVDAwOjAwOjAwLjAwMDAwMCIsMSwyXQ=='},
+))
+def test_syncing_teams_with_invalid_parameters_must_fail(
+        flask_app_client,
+        regular_user,
+        query_string
+):
+    # pylint: disable=invalid-name
+    with flask_app_client.login(regular_user, auth_scopes=('teams:read', )):
+        response = flask_app_client.get('/api/v1/teams/', query_string=query_string)
+
+    assert response.status_code == 422
+    assert set(response.json.keys()) >= {'status', 'message'}
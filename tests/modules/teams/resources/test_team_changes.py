@@ -0,0 +1,129 @@
+# encoding: utf-8
+# pylint: disable=missing-docstring
+import json
+import threading
+import time
+
+import pytest
+
+
+def get_changes(flask_app_client, since, wait=0):
+    response = flask_app_client.get(
+        '/api/v1/teams/changes',
+        query_string={'since': since, 'wait': wait}
+    )
+    assert response.status_code == 200
+    assert response.content_type == 'application/json'
+    return response.json, int(response.headers['X-Last-Sequence'])
+
+
+def test_following_team_changes(
+        flask_app_client,
+        admin_user,
+        regular_user,
+        readonly_user
+):
+    # pylint: disable=invalid-name
+    with flask_app_client.login(admin_user, auth_scopes=('teams:read', 'teams:write')):
+        _, last_sequence = get_changes(flask_app_client, since=0)
+        # There are no new changes yet
+        assert get_changes(flask_app_client, since=last_sequence) == ([], last_sequence)
+
+        response = flask_app_client.post('/api/v1/teams/', data={'title': "Changed team"})
+        assert response.status_code == 200
+        team_id = response.json['id']
+        response = flask_app_client.post(
+            '/api/v1/teams/%d/members/bulk' % team_id,
+            content_type='application/json',
+            data=json.dumps([{'user_id': regular_user.id}, {'user_id': readonly_user.id}])
+        )
+        assert response.status_code == 200
+        response = flask_app_client.delete(
+            '/api/v1/teams/%d/members/%d' % (team_id, regular_user.id)
+        )
+        assert response.status_code == 200
+        response = flask_app_client.delete('/api/v1/teams/%d' % team_id)
+        assert response.status_code == 204
+
+        team_changes, next_sequence = get_changes(flask_app_client, since=last_sequence)
+
+    assert [
+        (change['team_id'], change['user_id'], change['action']) for change in team_changes
+    ] == [
+        (team_id, admin_user.id, 'member_added'),
+        (team_id, regular_user.id, 'member_added'),
+        (team_id, readonly_user.id, 'member_added'),
+        (team_id, regular_user.id, 'member_removed'),
+        (team_id, None, 'team_deleted'),
+    ]
+    assert [change['id'] for change in team_changes] == sorted(
+        change['id'] for change in team_changes
+    )
+    assert next_sequence == team_changes[-1]['id']
+
+
+def test_waiting_for_team_changes(
+        flask_app,
+        flask_app_client,
+        db,
+        admin_user,
+        team_for_regular_user
+):
+    # pylint: disable=invalid-name,too-many-arguments
+    from app.modules.teams.models import TeamMember
+
+    def add_team_member():
+        with flask_app.app_context():
+            with db.session.begin():
+                db.session.add(
+                    TeamMember(team_id=team_for_regular_user.id, user_id=admin_user.id)
+                )
+
+    with flask_app_client.login(admin_user, auth_scopes=('teams:read', )):
+        _, last_sequence = get_changes(flask_app_client, since=0)
+
+        writer = threading.Timer(0.2, add_team_member)
+        writer.start()
+        try:
+            start_time = time.time()
+            team_changes, _ = get_changes(flask_app_client, since=last_sequence, wait=30)
+            duration = time.time() - start_time
+        finally:
+            writer.join()
+
+    # The waiting request is woken up by the commit instead of polling
+    assert duration < flask_app.config['TEAMS_CHANGES_POLL_INTERVAL']
+    assert [(change['user_id'], change['action']) for change in team_changes] == [
+        (admin_user.id, 'member_added'),
+    ]
+
+    # Cleanup
+    with db.session.begin():
+        db.session.delete(TeamMember.find(team_for_regular_user.id, admin_user.id))
+
+
+def test_following_team_changes_by_regular_user_must_fail(flask_app_client, regular_user):
+    # pylint: disable=invalid-name
+    with flask_app_client.login(regular_user, auth_scopes=('teams:read', )):
+        response = flask_app_client.get('/api/v1/teams/changes')
+
+    assert response.status_code == 403
+    assert set(response.json.keys()) >= {'status', 'message'}
+
+
+@pytest.mark.parametrize('query_string', (
+    {'since': -1},
+    {'wait': 61},
+    {'limit': 0},
+))
+def test_following_team_changes_with_invalid_parameters_must_fail(
+        flask_app_client,
+        admin_user,
+        query_string
+):
+    # pylint: disable=invalid-name
+    with flask_app_client.login(admin_user, auth_scopes=('teams:read', )):
+        response = flask_app_client.get('/api/v1/teams/changes', query_string=query_string)
+
+    assert response.status_code == 422
+    assert set(response.json.keys()) >= {'status', 'message'}
@@ -1,5 +1,9 @@
 # encoding: utf-8
 # pylint: disable=missing-docstring,invalid-name
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import sqlalchemy
 
 from app.modules.teams import models
 
@@ -26,3 +30,209 @@ def test_Team_check_owner(readonly_user, regular_user, team_for_regular_user):
     assert team_for_regular_user.check_owner(regular_user)
     assert not team_for_regular_user.check_owner(None)
     assert not team_for_regular_user.check_owner(readonly_user)
+
+def test_Team_member_count(db, regular_user, readonly_user, admin_user, team_for_regular_user):
+    team = team_for_regular_user
+    assert team.member_count == 2
+
+    team_member = models.TeamMember(team=team, user=admin_user)
+    with db.session.begin():
+        db.session.add(team_member)
+    db.session.refresh(team)
+    assert team.member_count == 3
+
+    with db.session.begin():
+        db.session.delete(team_member)
+    db.session.refresh(team)
+    assert team.member_count == 2
+
+    another_team = models.Team(title="Another team")
+    with db.session.begin():
+        db.session.add(another_team)
+        db.session.add(models.TeamMember(team=another_team, user=readonly_user))
+    db.session.refresh(another_team)
+    assert another_team.member_count == 1
+
+    # Cleanup
+    with db.session.begin():
+        db.session.delete(another_team)
+
+def test_Team_member_count_reconciliation(db, team_for_regular_user):
+    from tasks.app.teams import reconcile_member_counts
+
+    team = team_for_regular_user
+    team_for_nobody = models.Team(title="Nobody's team")
+    with db.session.begin():
+        db.session.add(team_for_nobody)
+    db.session.execute(
+        models.Team.__table__.update().values(member_count=models.Team.member_count + 5)
+    )
+
+    # NOTE: The task is run in the current app context (and the session)
+    reconcile_member_counts.body.__wrapped__(None, batch_size=1)
+
+    db.session.refresh(team)
+    db.session.refresh(team_for_nobody)
+    assert team.member_count == 2
+    assert team_for_nobody.member_count == 0
+
+    # Cleanup
+    with db.session.begin():
+        db.session.delete(team_for_nobody)
+
+def test_TeamTombstone_purge(db):
+    from tasks.app.teams import purge_tombstones
+
+    team = models.Team(title="Deleted team")
+    with db.session.begin():
+        db.session.add(team)
+    with db.session.begin():
+        db.session.delete(team)
+    with db.session.begin():
+        models.TeamTombstone.record(-1, user_ids=(1, 2, 3))
+        db.session.execute(
+            models.TeamTombstone.__table__.update().where(
+                models.TeamTombstone.team_id == -1
+            ).values(
+                deleted=datetime.utcnow() - timedelta(days=31)
+            )
+        )
+
+    purge_tombstones.body.__wrapped__(None, days=30, batch_size=2)
+
+    remaining_teams_ids = {
+        tombstone.team_id for tombstone in models.TeamTombstone.query.filter(
+            models.TeamTombstone.team_id.in_((-1, team.id))
+        )
+    }
+    assert remaining_teams_ids == {team.id}
+
+def test_TeamChange_member_updated(db, readonly_user, team_for_regular_user):
+    team_member = models.TeamMember.find(team_for_regular_user.id, readonly_user.id)
+    last_change_id = db.session.query(sqlalchemy.func.max(models.TeamChange.id)).scalar()
+
+    with db.session.begin():
+        team_member.is_leader = True
+    with db.session.begin():
+        # Only the timestamps are updated, which is not a membership change
+        team_member.created = datetime.utcnow()
+    with db.session.begin():
+        team_member.is_leader = False
+
+    assert [
+        (change.user_id, change.action) for change in models.TeamChange.query.filter(
+            models.TeamChange.id > last_change_id
+        ).order_by(models.TeamChange.id)
+    ] == [
+        (readonly_user.id, models.TeamChange.Actions.member_updated),
+        (readonly_user.id, models.TeamChange.Actions.member_updated),
+    ]
+
+def test_TeamMember_find(readonly_user, regular_user, team_for_regular_user):
+    team_member = models.TeamMember.find(team_for_regular_user.id, readonly_user.id)
+    assert team_member.user == readonly_user
+    assert not team_member.is_leader
+    assert models.TeamMember.find(team_for_regular_user.id, -1) is None
+
+
+@contextmanager
+def count_statements(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        # pylint: disable=unused-argument
+        statements.append(statement)
+
+    sqlalchemy.event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        sqlalchemy.event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_Team_delete_cascades_in_database(db):
+    from app.modules.users.models import User
+
+    members_count = 10000
+    now = datetime.now()
+    team = models.Team(title="Huge team")
+    with db.session.begin():
+        db.session.add(team)
+    with db.session.begin():
+        # The lightweight table allows to skip hashing of 10k passwords
+        db.session.execute(
+            sqlalchemy.table(
+                'user',
+                *[sqlalchemy.column(name) for name in (
+                    'username', 'email', 'password', 'first_name', 'middle_name',
+                    'last_name', 'static_roles', 'created', 'updated'
+                )]
+            ).insert(),
+            [
+                {
+                    'username': 'huge_team_member_%d' % index,
+                    'email': 'huge_team_member_%d@email.com' % index,
+                    'password': b'',
+                    'first_name': '',
+                    'middle_name': '',
+                    'last_name': '',
+                    'static_roles': 0,
+                    'created': now,
+                    'updated': now,
+                }
+                for index in range(members_count)
+            ]
+        )
+        huge_team_members = User.query.filter(User.username.like('huge_team_member_%'))
+        db.session.execute(
+            models.TeamMember.__table__.insert().from_select(
+                ['team_id', 'user_id', 'is_leader'],
+                huge_team_members.with_entities(
+                    sqlalchemy.literal(team.id), User.id, sqlalchemy.false()
+                )
+            )
+        )
+    assert models.TeamMember.query.filter_by(team_id=team.id).count() == members_count
+
+    with count_statements(db.engine) as statements:
+        with db.session.begin():
+            db.session.delete(team)
+    # The team deletion is recorded with a single tombstone and a single change
+    assert [statement.split()[0] for statement in statements] == ['DELETE', 'INSERT', 'INSERT']
+    assert models.TeamMember.query.filter_by(team_id=team.id).count() == 0
+
+    # The memberships of deleted users are deleted by the database as well
+    user = huge_team_members.first()
+    team = models.Team(title="Another huge team")
+    with db.session.begin():
+        db.session.add(models.TeamMember(team=team, user=user))
+    db.session.refresh(user)
+    with count_statements(db.engine) as statements:
+        with db.session.begin():
+            db.session.delete(user)
+    # The memberships are recorded as tombstones and changes, and the members
+    # counts of the user teams are updated with a single statement each
+    assert [statement.split()[0] for statement in statements] == [
+        'INSERT', 'INSERT', 'UPDATE', 'DELETE'
+    ]
+    assert models.TeamMember.query.filter_by(team_id=team.id).count() == 0
+    db.session.refresh(team)
+    assert team.member_count == 0
+
+    # Cleanup
+    with db.session.begin():
+        huge_team_members.delete(synchronize_session=False)
+        db.session.delete(team)
+
+def test_TeamMember_get_user_memberships_uses_index(db, regular_user, team_for_regular_user):
+    user_id = regular_user.id
+    with count_statements(db.engine) as statements:
+        team_members = models.TeamMember.get_user_memberships(user_id, limit=10)
+    assert [team_member.team for team_member in team_members] == [team_for_regular_user]
+    assert len(statements) == 1
+
+    plan = db.engine.execute('EXPLAIN QUERY PLAN %s' % statements[0], user_id, 10, 0).fetchall()
+    assert 'SEARCH team_member USING INDEX ix_team_member_user_id_team_id (user_id=?)' in [
+        row[3] for row in plan
+    ]
+    assert not any('TEMP B-TREE' in row[3] for row in plan)
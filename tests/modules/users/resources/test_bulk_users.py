@@ -0,0 +1,96 @@
+# encoding: utf-8
+# pylint: disable=missing-docstring
+import json
+
+import pytest
+
+from app.modules.users import models
+
+
+@pytest.mark.parametrize('hashing_threads', (0, 2))
+def test_bulk_users_creation(
+        monkeypatch,
+        flask_app,
+        flask_app_client,
+        admin_user,
+        regular_user,
+        db,
+        hashing_threads
+):
+    # pylint: disable=invalid-name,too-many-arguments
+    monkeypatch.setitem(flask_app.config, 'USERS_BULK_HASHING_THREADS', hashing_threads)
+    with flask_app_client.login(admin_user, auth_scopes=('users:write', )):
+        response = flask_app_client.post(
+            '/api/v1/users/bulk',
+            content_type='application/json',
+            data=json.dumps([
+                {'username': 'bulk_user1', 'email': 'bulk_user1@email.com', 'password': 'q'},
+                {'username': regular_user.username, 'email': 'x@email.com', 'password': 'q'},
+                {
+                    'username': 'bulk_user2',
+                    'email': 'bulk_user2@email.com',
+                    'password': 'w',
+                    'first_name': "Bulk",
+                    'is_regular_user': False,
+                },
+                {'username': 'bulk_user1', 'email': 'bulk_user3@email.com', 'password': 'q'},
+            ])
+        )
+
+    assert response.status_code == 200
+    assert response.content_type == 'application/json'
+    assert [result['status'] for result in response.json] == [200, 409, 200, 409]
+
+    user1 = models.User.query.get(response.json[0]['id'])
+    user2 = models.User.query.get(response.json[2]['id'])
+    try:
+        assert user1.username == 'bulk_user1'
+        assert user1.password == 'q'
+        assert user1.is_active and user1.is_regular_user and not user1.is_admin
+        assert user2.first_name == "Bulk"
+        assert user2.password == 'w'
+        assert user2.is_active and not user2.is_regular_user
+    finally:
+        # Cleanup
+        with db.session.begin():
+            db.session.delete(user1)
+            db.session.delete(user2)
+
+
+def test_bulk_users_creation_by_regular_user_must_fail(flask_app_client, regular_user):
+    # pylint: disable=invalid-name
+    with flask_app_client.login(regular_user, auth_scopes=('users:write', )):
+        response = flask_app_client.post(
+            '/api/v1/users/bulk',
+            content_type='application/json',
+            data=json.dumps([
+                {'username': 'bulk_user1', 'email': 'bulk_user1@email.com', 'password': 'q'},
+            ])
+        )
+
+    assert response.status_code == 403
+    assert response.content_type == 'application/json'
+    assert set(response.json.keys()) >= {'status', 'message'}
+
+
+def test_bulk_users_creation_over_limit_must_fail(
+        monkeypatch,
+        flask_app,
+        flask_app_client,
+        admin_user
+):
+    # pylint: disable=invalid-name
+    monkeypatch.setitem(flask_app.config, 'USERS_BULK_MAX_USERS', 1)
+    with flask_app_client.login(admin_user, auth_scopes=('users:write', )):
+        response = flask_app_client.post(
+            '/api/v1/users/bulk',
+            content_type='application/json',
+            data=json.dumps([
+                {'username': 'bulk_user1', 'email': 'bulk_user1@email.com', 'password': 'q'},
+                {'username': 'bulk_user2', 'email': 'bulk_user2@email.com', 'password': 'w'},
+            ])
+        )
+
+    assert response.status_code == 422
+    assert response.content_type == 'application/json'
+    assert set(response.json.keys()) >= {'status', 'message'}
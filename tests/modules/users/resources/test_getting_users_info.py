@@ -80,3 +80,88 @@ def test_getting_user_me_info(flask_app_client, regular_user):
     assert isinstance(response.json, dict)
     assert set(response.json.keys()) >= {'id', 'username'}
     assert 'password' not in response.json.keys()
+
+def test_getting_user_info_with_sparse_fieldset(flask_app_client, regular_user):
+    # pylint: disable=invalid-name
+    with flask_app_client.login(regular_user, auth_scopes=('users:read',)):
+        response = flask_app_client.get(
+            '/api/v1/users/%d' % regular_user.id,
+            query_string={'fields': 'id,username,is_admin'}
+        )
+
+    assert response.status_code == 200
+    assert response.content_type == 'application/json'
+    assert set(response.json.keys()) == {'id', 'username', 'is_admin'}
+    assert response.json['username'] == regular_user.username
+
+def test_getting_list_of_users_with_sparse_fieldset(flask_app_client, admin_user):
+    # pylint: disable=invalid-name
+    with flask_app_client.login(admin_user, auth_scopes=('users:read',)):
+        response = flask_app_client.get('/api/v1/users/', query_string={'fields': 'id'})
+
+    assert response.status_code == 200
+    assert response.content_type == 'application/json'
+    assert isinstance(response.json, list)
+    assert all(set(user.keys()) == {'id'} for user in response.json)
+
+def test_getting_user_info_with_unknown_sparse_fieldset_must_fail(
+        flask_app_client,
+        regular_user
+):
+    # pylint: disable=invalid-name
+    with flask_app_client.login(regular_user, auth_scopes=('users:read',)):
+        response = flask_app_client.get(
+            '/api/v1/users/%d' % regular_user.id,
+            query_string={'fields': 'id,password'}
+        )
+
+    assert response.status_code == 400
+    assert response.content_type == 'application/json'
+    assert set(response.json.keys()) >= {'status', 'message'}
+
+@pytest.mark.parametrize('filters,expected_users,unexpected_users', (
+    ({'is_admin': 'true'}, ('admin_user', ), ('regular_user', 'readonly_user')),
+    ({'is_admin': 'false'}, ('regular_user', 'readonly_user'), ('admin_user', )),
+    (
+        {'is_regular_user': 'false', 'is_active': 'true'},
+        ('readonly_user', ),
+        ('regular_user', 'admin_user'),
+    ),
+))
+def test_getting_list_of_users_filtered_by_roles(
+        flask_app_client,
+        admin_user,
+        regular_user,
+        readonly_user,
+        filters,
+        expected_users,
+        unexpected_users
+):
+    # pylint: disable=invalid-name,too-many-arguments,unused-argument
+    query_string = dict(filters, limit=100)
+    with flask_app_client.login(admin_user, auth_scopes=('users:read',)):
+        response = flask_app_client.get('/api/v1/users/', query_string=query_string)
+
+    assert response.status_code == 200
+    usernames = {user['username'] for user in response.json}
+    assert usernames >= set(expected_users)
+    assert not usernames & set(unexpected_users)
+    assert int(response.headers['X-Total-Count']) == len(response.json)
+
+def test_syncing_list_of_users(flask_app_client, db, admin_user, regular_user):
+    # pylint: disable=invalid-name
+    from datetime import datetime
+
+    sync_start = datetime.utcnow()
+    with db.session.begin():
+        regular_user.first_name = "Synced"
+    with flask_app_client.login(admin_user, auth_scopes=('users:read',)):
+        response = flask_app_client.get(
+            '/api/v1/users/',
+            query_string={'updated_since': sync_start.isoformat()}
+        )
+
+    assert response.status_code == 200
+    assert [user['id'] for user in response.json] == [regular_user.id]
+    assert 'X-Next-Cursor' in response.headers
+    assert 'X-Total-Count' not in response.headers
@@ -2,6 +2,8 @@
 # pylint: disable=missing-docstring
 import json
 
+import pytest
+
 
 def test_modifying_user_info_by_owner(flask_app_client, regular_user, db):
     # pylint: disable=invalid-name
@@ -220,3 +222,245 @@ def test_modifying_user_info_with_conflict_data_must_fail(
     assert response.content_type == 'application/json'
     assert isinstance(response.json, dict)
     assert set(response.json.keys()) >= {'status', 'message'}
+
+
+def test_modifying_user_info_with_failed_test_operation_must_fail(
+        flask_app_client,
+        regular_user
+):
+    # pylint: disable=invalid-name
+    saved_middle_name = regular_user.middle_name
+    with flask_app_client.login(regular_user, auth_scopes=('users:write',)):
+        response = flask_app_client.patch(
+            '/api/v1/users/%d' % regular_user.id,
+            content_type='application/json',
+            data=json.dumps([
+                {
+                    'op': 'test',
+                    'path': '/current_password',
+                    'value': regular_user.password_secret,
+                },
+                {
+                    'op': 'replace',
+                    'path': '/middle_name',
+                    'value': "Modified Middle Name",
+                },
+                {
+                    'op': 'test',
+                    'path': '/first_name',
+                    'value': "Not The First Name",
+                },
+            ])
+        )
+
+    assert response.status_code == 409
+    assert response.content_type == 'application/json'
+    assert set(response.json.keys()) >= {'status', 'message'}
+
+    from app.modules.users.models import User
+    assert User.query.get(regular_user.id).middle_name == saved_middle_name
+
+
+@pytest.mark.parametrize('tested_middle_name,expected_status_code', (
+    ("Modified Middle Name", 200),
+    (None, 409),
+))
+def test_modifying_user_info_tests_values_in_operations_order(
+        flask_app_client,
+        regular_user,
+        db,
+        tested_middle_name,
+        expected_status_code
+):
+    # pylint: disable=invalid-name
+    saved_middle_name = regular_user.middle_name
+    if tested_middle_name is None:
+        tested_middle_name = saved_middle_name
+    with flask_app_client.login(regular_user, auth_scopes=('users:write',)):
+        response = flask_app_client.patch(
+            '/api/v1/users/%d' % regular_user.id,
+            content_type='application/json',
+            data=json.dumps([
+                {
+                    'op': 'test',
+                    'path': '/current_password',
+                    'value': regular_user.password_secret,
+                },
+                {
+                    'op': 'replace',
+                    'path': '/middle_name',
+                    'value': "Modified Middle Name",
+                },
+                {
+                    'op': 'test',
+                    'path': '/middle_name',
+                    'value': tested_middle_name,
+                },
+            ])
+        )
+
+    assert response.status_code == expected_status_code
+
+    from app.modules.users.models import User
+    user1_instance = User.query.get(regular_user.id)
+    if expected_status_code == 200:
+        assert user1_instance.middle_name == "Modified Middle Name"
+        # Restore original state
+        user1_instance.middle_name = saved_middle_name
+        with db.session.begin():
+            db.session.merge(user1_instance)
+    else:
+        assert user1_instance.middle_name == saved_middle_name
+
+
+def test_bulk_modifying_users_roles_by_admin(
+        flask_app_client,
+        admin_user,
+        regular_user,
+        readonly_user,
+        db
+):
+    # pylint: disable=invalid-name
+    with flask_app_client.login(admin_user, auth_scopes=('users:write',)):
+        response = flask_app_client.patch(
+            '/api/v1/users/',
+            content_type='application/json',
+            data=json.dumps({
+                'user_ids': [regular_user.id, readonly_user.id, 100500],
+                'operations': [
+                    {
+                        'op': 'test',
+                        'path': '/current_password',
+                        'value': admin_user.password_secret,
+                    },
+                    {
+                        'op': 'test',
+                        'path': '/is_regular_user',
+                        'value': True,
+                    },
+                    {
+                        'op': 'replace',
+                        'path': '/is_regular_user',
+                        'value': False,
+                    },
+                ],
+            })
+        )
+
+    assert response.status_code == 200
+    assert response.content_type == 'application/json'
+    assert [(result['id'], result['status']) for result in response.json] == [
+        (regular_user.id, 200),
+        (readonly_user.id, 409),
+        (100500, 404),
+    ]
+
+    from app.modules.users.models import User
+    updated_user = User.query.get(regular_user.id)
+    assert updated_user.is_regular_user is False
+    assert updated_user.is_active is True
+
+    # Restore original state
+    with db.session.begin():
+        updated_user.is_regular_user = True
+
+
+@pytest.mark.parametrize('user_fixture_name,password,expected_status_code', (
+    ('admin_user', 'wrong_password', 403),
+    ('regular_user', None, 403),
+))
+def test_bulk_modifying_users_roles_must_fail(
+        flask_app_client,
+        request,
+        readonly_user,
+        user_fixture_name,
+        password,
+        expected_status_code
+):
+    # pylint: disable=invalid-name,too-many-arguments
+    user = request.getfixturevalue(user_fixture_name)
+    with flask_app_client.login(user, auth_scopes=('users:write',)):
+        response = flask_app_client.patch(
+            '/api/v1/users/',
+            content_type='application/json',
+            data=json.dumps({
+                'user_ids': [readonly_user.id],
+                'operations': [
+                    {
+                        'op': 'test',
+                        'path': '/current_password',
+                        'value': password or user.password_secret,
+                    },
+                    {
+                        'op': 'replace',
+                        'path': '/is_active',
+                        'value': False,
+                    },
+                ],
+            })
+        )
+
+    assert response.status_code == expected_status_code
+    assert response.content_type == 'application/json'
+    assert set(response.json.keys()) >= {'status', 'message'}
+    assert readonly_user.is_active is True
+
+
+def test_bulk_modifying_users_roles_changed_concurrently_must_fail(
+        flask_app_client,
+        admin_user,
+        regular_user,
+        db
+):
+    # pylint: disable=invalid-name
+    import sqlalchemy
+    from app.modules.users.models import User
+
+    def change_roles_concurrently(conn, cursor, statement, *args):
+        # pylint: disable=unused-argument
+        # The user stops being a regular user right after the `test`
+        # operations were checked
+        if statement.startswith('SELECT') and 'CASE WHEN' in statement:
+            cursor.connection.execute(
+                'UPDATE user SET static_roles = static_roles & ? WHERE id = ?',
+                (~User.StaticRoles.REGULAR_USER.mask, regular_user.id)
+            )
+
+    sqlalchemy.event.listen(db.engine, 'after_cursor_execute', change_roles_concurrently)
+    try:
+        with flask_app_client.login(admin_user, auth_scopes=('users:write',)):
+            response = flask_app_client.patch(
+                '/api/v1/users/',
+                content_type='application/json',
+                data=json.dumps({
+                    'user_ids': [regular_user.id],
+                    'operations': [
+                        {
+                            'op': 'test',
+                            'path': '/current_password',
+                            'value': admin_user.password_secret,
+                        },
+                        {
+                            'op': 'test',
+                            'path': '/is_regular_user',
+                            'value': True,
+                        },
+                        {
+                            'op': 'replace',
+                            'path': '/is_admin',
+                            'value': True,
+                        },
+                    ],
+                })
+            )
+    finally:
+        sqlalchemy.event.remove(db.engine, 'after_cursor_execute', change_roles_concurrently)
+
+    assert response.status_code == 409
+    assert set(response.json.keys()) >= {'status', 'message'}
+    db.session.refresh(regular_user)
+    assert regular_user.is_admin is False
+
+    # Restore original state (the concurrent change is rolled back as well)
+    with db.session.begin():
+        regular_user.is_regular_user = True
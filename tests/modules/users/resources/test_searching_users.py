@@ -0,0 +1,168 @@
+# encoding: utf-8
+# pylint: disable=missing-docstring,redefined-outer-name
+import pytest
+
+from tests import utils
+
+
+@pytest.yield_fixture(scope='module')
+def searchable_users(db):
+    from app.modules.users.models import User
+
+    users = [
+        utils.generate_user_instance(
+            username='johnny', email='jd@example.com', first_name='John', last_name='Doe'
+        ),
+        utils.generate_user_instance(
+            username='jdoe', email='doe.jane@example.com', first_name='Jane', last_name='Doe'
+        ),
+        utils.generate_user_instance(
+            username='mary', email='mary@example.com', first_name='Mary', last_name='Johnson'
+        ),
+    ] + [
+        utils.generate_user_instance(
+            username='searchable_%d' % index, first_name='Search', last_name='Page'
+        )
+        for index in range(5)
+    ]
+    with db.session.begin():
+        db.session.add_all(users)
+
+    yield users
+
+    User.query.filter(User.id.in_([user.id for user in users])).delete(synchronize_session=False)
+
+
+def search_users(flask_app_client, user, **query_string):
+    with flask_app_client.login(user, auth_scopes=('users:read',)):
+        return flask_app_client.get('/api/v1/users/search', query_string=query_string)
+
+
+def test_searching_users_by_regular_user_must_fail(flask_app_client, regular_user):
+    # pylint: disable=invalid-name
+    response = search_users(flask_app_client, regular_user, q='john')
+
+    assert response.status_code == 403
+    assert response.content_type == 'application/json'
+    assert set(response.json.keys()) >= {'status', 'message'}
+
+@pytest.mark.parametrize('text,expected_usernames', (
+    # username matches weigh more than names matches
+    ('john', ['johnny']),
+    ('johnson', ['mary']),
+    ('jo', ['johnny']),
+    ('doe', ['jdoe', 'johnny']),
+    ('Doe J', ['jdoe', 'johnny']),
+    ('doe jane', ['jdoe']),
+    ('jane', ['jdoe']),
+    ('nobody', []),
+    ('%', []),
+))
+def test_searching_users(
+        flask_app_client,
+        admin_user,
+        searchable_users,
+        text,
+        expected_usernames
+):
+    # pylint: disable=invalid-name,unused-argument
+    response = search_users(flask_app_client, admin_user, q=text)
+
+    assert response.status_code == 200
+    assert response.content_type == 'application/json'
+    assert [user['username'] for user in response.json] == expected_usernames
+    assert 'X-Next-Cursor' not in response.headers
+
+@pytest.mark.parametrize('text,expected_usernames', (
+    ('doe', ['jdoe', 'johnny']),
+    ('searchable_1', ['searchable_1']),
+    # `_` is not a wildcard
+    ('j_oe', []),
+))
+def test_searching_users_without_search_index(
+        monkeypatch,
+        searchable_users,
+        text,
+        expected_usernames
+):
+    # pylint: disable=invalid-name,unused-argument
+    from app.modules.users import search
+    monkeypatch.setattr(search, '_get_matches', search._get_generic_matches)
+
+    assert sorted(
+        user.username for user, _ in search.search_users(text, limit=10)
+    ) == expected_usernames
+
+def test_searching_users_pages(flask_app_client, admin_user, searchable_users):
+    # pylint: disable=invalid-name,unused-argument
+    usernames = []
+    query_string = {'q': 'search', 'limit': 2}
+    for _ in range(2):
+        response = search_users(flask_app_client, admin_user, **query_string)
+        assert response.status_code == 200
+        assert len(response.json) == 2
+        usernames.extend(user['username'] for user in response.json)
+        query_string['cursor'] = response.headers['X-Next-Cursor']
+
+    response = search_users(flask_app_client, admin_user, **query_string)
+    assert response.status_code == 200
+    assert 'X-Next-Cursor' not in response.headers
+    usernames.extend(user['username'] for user in response.json)
+
+    assert usernames == ['searchable_%d' % index for index in range(5)]
+
+def test_searching_users_truncated_candidates(
+        monkeypatch,
+        flask_app_client,
+        admin_user,
+        searchable_users
+):
+    # pylint: disable=invalid-name,unused-argument
+    from app.modules.users import search
+
+    response = search_users(flask_app_client, admin_user, q='search')
+    assert response.headers['X-Search-Max-Candidates'] == str(search.MAX_SEARCH_CANDIDATES)
+    assert response.headers['X-Search-Truncated'] == 'false'
+
+    monkeypatch.setattr(search, 'MAX_SEARCH_CANDIDATES', 3)
+    response = search_users(flask_app_client, admin_user, q='search')
+    assert response.status_code == 200
+    assert len(response.json) == 3
+    assert response.headers['X-Search-Max-Candidates'] == '3'
+    assert response.headers['X-Search-Truncated'] == 'true'
+
+@pytest.mark.parametrize('cursor', ('invalid', 'e30=', 'WzEsMiwzXQ==', 'WyJhIiwxXQ=='))
+def test_searching_users_with_invalid_cursor_must_fail(
+        flask_app_client,
+        admin_user,
+        cursor
+):
+    # pylint: disable=invalid-name
+    response = search_users(flask_app_client, admin_user, q='john', cursor=cursor)
+
+    assert response.status_code == 422
+    assert response.content_type == 'application/json'
+    assert set(response.json.keys()) >= {'status', 'message'}
+
+def test_users_search_index_is_kept_in_sync(db, searchable_users):
+    from app.modules.users.search import search_users as search
+
+    user = searchable_users[2]
+    with db.session.begin():
+        user.username = 'marianne'
+        user.last_name = 'Smith'
+    try:
+        assert [found_user for found_user, _ in search('mari smith', limit=10)] == [user]
+        assert search('johnson', limit=10) == []
+    finally:
+        with db.session.begin():
+            user.username = 'mary'
+            user.last_name = 'Johnson'
+
+    new_user = utils.generate_user_instance(username='ephemeral')
+    with db.session.begin():
+        db.session.add(new_user)
+    assert [found_user for found_user, _ in search('ephem', limit=10)] == [new_user]
+    with db.session.begin():
+        db.session.delete(new_user)
+    assert search('ephem', limit=10) == []
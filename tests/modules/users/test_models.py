@@ -115,3 +115,32 @@ def test_User_find_with_password(patch_User_password_scheme, db): # pylint: disa
     with db.session.begin():
         db.session.delete(user1)
         db.session.delete(user2)
+
+
+def test_User_static_roles_queries(db, admin_user, regular_user, readonly_user):
+    # pylint: disable=unused-argument
+    User = models.User
+    assert admin_user in User.query.filter(User.is_admin).all()
+    assert regular_user not in User.query.filter(User.is_admin).all()
+    assert readonly_user in User.query.filter(~User.is_regular_user, User.is_active).all()
+    assert regular_user not in User.query.filter(~User.is_regular_user).all()
+
+
+@pytest.mark.parametrize('role_filter,index_name', (
+    (lambda User: User.is_admin, 'ix_user_is_admin'),
+    (lambda User: User.is_internal, 'ix_user_is_internal'),
+    (lambda User: ~User.is_active, 'ix_user_is_not_active'),
+))
+def test_User_static_roles_filters_use_partial_indexes(db, role_filter, index_name):
+    from sqlalchemy.dialects import sqlite
+
+    query = models.User.query.filter(role_filter(models.User)).order_by(models.User.id).limit(20)
+    statement = str(query.statement.compile(dialect=sqlite.dialect()))
+    connection = db.engine.raw_connection()
+    try:
+        plan = connection.cursor().execute(
+            'EXPLAIN QUERY PLAN %s' % statement, [20, 0]
+        ).fetchall()
+    finally:
+        connection.close()
+    assert [row[3] for row in plan] == ['SCAN user USING INDEX %s' % index_name]
@@ -46,3 +46,38 @@ def test_UserSignupFormSchema_dump():
     dumped_result = schemas.UserSignupFormSchema().dump(form_data)
     assert dumped_result.errors == {}
     assert dumped_result.data == form_data
+
+def test_DetailedUserSchema_sparse_copy_is_cached():
+    schema = schemas.DetailedUserSchema()
+    sparse_schema = schema.sparse(('id', 'username'))
+    assert set(sparse_schema.fields.keys()) == {'id', 'username'}
+    assert schema.sparse(('id', 'username')) is sparse_schema
+    # The fieldsets are normalized
+    assert schema.sparse(('username', 'id', 'id')) is sparse_schema
+
+def test_DetailedUserSchema_sparse_copies_cache_is_bounded():
+    from flask_restplus_patched.model import MAX_SPARSE_SCHEMAS
+
+    schema = schemas.DetailedUserSchema()
+    fields = sorted(schema.fields.keys())
+    fieldsets = [
+        (first_field, second_field)
+        for first_field in fields
+        for second_field in fields
+        if first_field < second_field
+    ]
+    assert len(fieldsets) > MAX_SPARSE_SCHEMAS
+    for fieldset in fieldsets:
+        schema.sparse(fieldset)
+    assert len(schema._sparse_schemas) == MAX_SPARSE_SCHEMAS  # pylint: disable=protected-access
+
+def test_DetailedUserSchema_query_options_skip_password(db):
+    # pylint: disable=unused-argument
+    from app.modules.users.models import User
+    query = User.query.options(*schemas.DetailedUserSchema().get_query_options())
+    assert 'password' not in str(query.statement)
+    assert 'static_roles' in str(query.statement)
+
+    sparse_schema = schemas.DetailedUserSchema().sparse(('username', ))
+    query = User.query.options(*sparse_schema.get_query_options())
+    assert set(column.name for column in query.statement.columns) == {'id', 'username'}
@@ -44,3 +44,37 @@ def test_create_app_with_broken_import_config():
     with pytest.raises(ImportError):
         create_app('broken-import-config')
     del CONFIG_NAME_MAPPER['broken-import-config']
+
+def test_create_app_with_lazy_modules_loading(monkeypatch):
+    from config import TestingConfig
+    from app import modules
+    monkeypatch.setattr(TestingConfig, 'MODULES_LAZY_LOADING', True)
+
+    def get_rules():
+        return {rule.rule for rule in app.url_map.iter_rules()}
+
+    # Only the applications served by WSGI servers only defer the loading
+    app = create_app('testing')
+    assert '/api/v1/users/' in get_rules()
+
+    app = create_app('testing', wsgi_only=True)
+    assert '/api/v1/users/' not in get_rules()
+    modules.ensure_loaded(app)
+    assert '/api/v1/users/' in get_rules()
+    # Loading happens only once
+    modules.ensure_loaded(app)
+
+def test_migrations_config_loads_lazy_modules(monkeypatch):
+    import flask
+    from config import TestingConfig
+    from tasks.app.db import _get_config
+    monkeypatch.setattr(TestingConfig, 'MODULES_LAZY_LOADING', True)
+    app = create_app('testing', wsgi_only=True)
+
+    # NOTE: A new app context would remove the DB session of the tests on its
+    # teardown
+    monkeypatch.setattr(flask, 'current_app', app)
+    _get_config('migrations')
+
+    # The models are registered for autogenerate along with the modules
+    assert '/api/v1/users/' in {rule.rule for rule in app.url_map.iter_rules()}
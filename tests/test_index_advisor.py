@@ -0,0 +1,83 @@
+# encoding: utf-8
+# pylint: disable=missing-docstring
+import pytest
+
+from tasks.app import _index_advisor
+
+
+@pytest.fixture()
+def advisor(db):
+    return _index_advisor.IndexAdvisor(db.metadata)
+
+
+@pytest.mark.parametrize('statement,issues,proposed_columns', (
+    (
+        "SELECT team_member.team_id FROM team_member WHERE ? = team_member.is_leader",
+        ["SCAN team_member"],
+        [('team_member', ('is_leader', ))],
+    ),
+    (
+        "SELECT oauth2_token.id FROM oauth2_token WHERE oauth2_token.expires < ?",
+        ["SCAN oauth2_token"],
+        [('oauth2_token', ('expires', ))],
+    ),
+    (
+        "SELECT user_1.id FROM user AS user_1 WHERE user_1.static_roles IN (?) "
+        "ORDER BY user_1.username",
+        ["SCAN user_1"],
+        [('user', ('static_roles', 'username'))],
+    ),
+    (
+        "SELECT team.id FROM team ORDER BY team.created DESC LIMIT ? OFFSET ?",
+        ["SCAN team", "USE TEMP B-TREE FOR ORDER BY"],
+        [('team', ('created', ))],
+    ),
+    (
+        "SELECT user.id FROM user JOIN team_member ON user.id = team_member.user_id "
+        "WHERE team_member.team_id = ? AND team_member.is_leader = ?",
+        [],
+        [],
+    ),
+    (
+        "SELECT user.id FROM user WHERE user.username = ?",
+        [],
+        [],
+    ),
+))
+def test_index_advisor(advisor, statement, issues, proposed_columns):
+    advice = advisor.advise(statement)
+    assert [issue.split(' USING ')[0] for issue in advice.issues] == issues
+    assert [
+        (proposal.table_name, proposal.columns) for proposal in advice.proposals
+    ] == proposed_columns
+
+
+def test_index_advisor_migration(advisor, tmpdir):
+    query_log_path = tmpdir.join('queries.log')
+    query_log_path.write(
+        "-- Captured queries\n"
+        "10\tSELECT team_member.team_id FROM team_member WHERE team_member.is_leader = ?\n"
+        "SELECT team_member.user_id FROM team_member WHERE team_member.is_leader = ?\n"
+        "SELECT item.id FROM item WHERE item.name = ?\n"
+    )
+    statements = _index_advisor.read_query_log(str(query_log_path))
+    assert len(statements) == 3
+    advices = [advisor.advise(statement, count) for statement, count in statements.items()]
+    assert sum(1 for advice in advices if advice.plan is None) == 1
+
+    proposal, = advisor.proposals.values()
+    assert proposal.name == 'ix_team_member_is_leader'
+    assert sum(proposal.statements.values()) == 11
+
+    migration = _index_advisor.render_migration(
+        [proposal],
+        revision='0123456789ab',
+        down_revision='5c52ff116e31',
+        create_date='2026-10-19 00:00:00',
+        message="Add indexes"
+    )
+    namespace = {}
+    exec(compile(migration, 'migration.py', 'exec'), namespace)  # pylint: disable=exec-used
+    assert namespace['revision'] == '0123456789ab'
+    assert "op.create_index('ix_team_member_is_leader', 'team_member', ['is_leader']" in migration
+    assert "op.drop_index('ix_team_member_is_leader', table_name='team_member')" in migration
@@ -0,0 +1,42 @@
+# encoding: utf-8
+# pylint: disable=missing-docstring
+import gc
+
+from app import preload
+
+
+def test_warm_up(flask_app):
+    from app.extensions import api
+    from app.modules.users.parameters import PatchUserDetailsParameters
+
+    api.api_v1.invalidate_specs()
+    preload.warm_up(flask_app)
+
+    assert api.api_v1.__dict__['_encoded_specs'] is not None
+    assert '_patch_plan' in PatchUserDetailsParameters.__dict__
+
+
+def test_dispose_db_connections(monkeypatch, flask_app):
+    from app.extensions import db
+
+    disposed_binds = []
+
+    class FakeEngine(object):
+
+        def __init__(self, bind):
+            self.bind = bind
+
+        def dispose(self):
+            disposed_binds.append(self.bind)
+
+    monkeypatch.setattr(db, 'get_engine', lambda app, bind=None: FakeEngine(bind))
+    monkeypatch.setitem(flask_app.config, 'SQLALCHEMY_BINDS', {'replica': 'sqlite://'})
+    preload.dispose_db_connections(flask_app)
+    assert disposed_binds == [None, 'replica']
+
+
+def test_freeze_heap():
+    preload.freeze_heap()
+    if hasattr(gc, 'freeze'):
+        assert gc.get_freeze_count() > 0
+        gc.unfreeze()